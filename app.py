@@ -1,28 +1,307 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_file
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, flash, send_file, stream_with_context
+from flask import before_render_template, current_app, g, has_app_context, template_rendered
+from sqlalchemy import event
+from werkzeug.exceptions import HTTPException
 from werkzeug.utils import secure_filename
+import click
 import os
 import json
-from datetime import datetime
+import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
 import uuid
 
 # Import our modules
 from config import config
-from database.models import db, ProcessingSession, DocumentVersion, FeedbackHistory
+from database.models import db, engine_options, tune_sqlite, upgrade_schema, JobDescription, ProcessingSession, DocumentVersion, FeedbackHistory, StoredDocument, ANALYSIS_STAGES
 from modules.document_parser import DocumentParser
-from modules.job_analyzer import JobAnalyzer
+from modules.document_scorer import DocumentScorer
+from modules.document_store import DocumentStore
+from modules.parse_pool import ParsePool
+from modules.instrumentation import ELAPSED_KEY, Instrumentation, timed_result
+from modules.upload_ingest import IngestRequest
+from modules.job_analyzer import JobAnalyzer, run_concurrently
+from modules.keyword_extractor import KeywordExtractor
+from modules.llm_cache import LLMResponseCache
+from modules.llm_client import ConnectionMetrics, create_http_client
+from modules.llm_providers import create_provider
+from modules.llm_scheduler import LLMScheduler
+from modules.progress_events import ProgressEventBroker
+from modules.request_profiler import ProfilingMiddleware
+from modules.prompt_budget import PromptBudget
+from modules.task_queue import TaskQueue
 
-def create_app(config_name='development'):
+def _commit_started(session):
+    session.info['commit_started'] = time.perf_counter()
+
+def _commit_finished(session):
+    started = session.info.pop('commit_started', None)
+    if started is not None and has_app_context():
+        instrumentation = current_app.extensions.get('instrumentation')
+        if instrumentation is not None:
+            instrumentation.observe('db_commit', time.perf_counter() - started)
+
+def create_app(config_name='development', overrides=None):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    # Applied before extensions read them (the database engine is bound in init_app)
+    app.config.update(overrides or {})
     
-    # Initialize database
+    # Uploads are hashed, sniffed and stored while the request body is read
+    app.request_class = IngestRequest
+    
+    # Initialize database (pooled; WAL and a busy timeout on SQLite so concurrent writers queue)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
     db.init_app(app)
+    with app.app_context():
+        tune_sqlite(db.engine,
+                    busy_timeout=app.config.get('SQLITE_BUSY_TIMEOUT', 30.0),
+                    synchronous=app.config.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+                    wal=app.config.get('SQLITE_WAL', True))
+    
+    # Background jobs (Celery when Redis is reachable, in-process pool otherwise)
+    task_queue = TaskQueue(app)
+    
+    # Live progress for the processing page (Server-Sent Events)
+    events = app.extensions['progress_events'] = ProgressEventBroker()
+    
+    # Per-stage timings of the hot path, exported at /metrics (the hooks are no-ops while disabled)
+    instrumentation = app.extensions['instrumentation'] = Instrumentation(
+        enabled=app.config.get('INSTRUMENTATION_ENABLED', False)
+    )
+    
+    # db.session is shared by every app, so its commit hooks are registered once and look up the current app
+    if not event.contains(db.session, 'before_commit', _commit_started):
+        event.listen(db.session, 'before_commit', _commit_started)
+        event.listen(db.session, 'after_commit', _commit_finished)
+    
+    def template_started(sender, template, context, **extra):
+        if instrumentation.enabled:
+            g.setdefault('template_timers', []).append(time.perf_counter())
+    
+    def template_finished(sender, template, context, **extra):
+        timers = g.get('template_timers')
+        if timers:
+            instrumentation.observe('template_render', time.perf_counter() - timers.pop(), template=template.name)
+    
+    # Strong references: these closures are otherwise only held by the signals
+    before_render_template.connect(template_started, app, weak=False)
+    template_rendered.connect(template_finished, app, weak=False)
     
     # Create upload directories
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     os.makedirs(app.config['PROCESSED_FOLDER'], exist_ok=True)
     os.makedirs(app.config['TEMP_FOLDER'], exist_ok=True)
     
+    def get_llm_cache():
+        """App-wide LLM response cache shared by every JobAnalyzer, created on first use"""
+        
+        if not app.config.get('LLM_CACHE_ENABLED'):
+            return None
+        
+        if 'llm_cache' not in app.extensions:
+            app.extensions.setdefault('llm_cache', LLMResponseCache(
+                path=app.config['LLM_CACHE_PATH'],
+                ttl=app.config['LLM_CACHE_TTL'],
+                max_entries=app.config['LLM_CACHE_MAX_ENTRIES']
+            ))
+        return app.extensions['llm_cache']
+    
+    def get_llm_scheduler():
+        """App-wide LLM request scheduler - one set of rate limits for every analyzer"""
+        
+        if 'llm_scheduler' not in app.extensions:
+            app.extensions.setdefault('llm_scheduler', LLMScheduler(
+                requests_per_minute=app.config.get('LLM_REQUESTS_PER_MINUTE', 500),
+                tokens_per_minute=app.config.get('LLM_TOKENS_PER_MINUTE', 200000),
+                max_concurrency=app.config.get('LLM_MAX_CONCURRENCY', 8),
+                max_retries=app.config.get('LLM_MAX_RETRIES', 5)
+            ))
+        return app.extensions['llm_scheduler']
+    
+    def get_llm_http_client():
+        """App-wide keep-alive connection pool shared by every OpenAI client"""
+        
+        if 'llm_http_client' not in app.extensions:
+            metrics = app.extensions.setdefault('llm_connection_metrics', ConnectionMetrics())
+            app.extensions.setdefault('llm_http_client', create_http_client(
+                max_connections=app.config.get('LLM_POOL_MAX_CONNECTIONS', 20),
+                max_keepalive_connections=app.config.get('LLM_POOL_MAX_KEEPALIVE', 10),
+                keepalive_expiry=app.config.get('LLM_POOL_KEEPALIVE_EXPIRY', 30.0),
+                timeout=app.config.get('LLM_TIMEOUT', 60.0),
+                connect_timeout=app.config.get('LLM_CONNECT_TIMEOUT', 5.0),
+                http2=app.config.get('LLM_HTTP2', True),
+                metrics=metrics
+            ))
+        return app.extensions['llm_http_client']
+    
+    def get_prompt_budget():
+        """App-wide prompt token budget; also totals the tokens it saves"""
+        
+        if 'prompt_budget' not in app.extensions:
+            app.extensions.setdefault('prompt_budget', PromptBudget(
+                max_prompt_tokens=app.config.get('LLM_PROMPT_TOKEN_BUDGET', 6000),
+                max_completion_tokens=app.config.get('LLM_INSIGHTS_MAX_TOKENS', 1500)
+            ))
+        return app.extensions['prompt_budget']
+    
+    def build_llm_provider(kind, model=None, base_url=None, model_path=None):
+        if kind == 'openai':
+            # The scheduler owns retries, so the client's own are off
+            return create_provider(kind, api_key=app.config.get('OPENAI_API_KEY'), model=model, base_url=base_url,
+                                   http_client=get_llm_http_client(), max_retries=0,
+                                   structured_output=app.config.get('LLM_STRUCTURED_OUTPUT'))
+        if kind == 'llama_cpp':
+            return create_provider(kind, model=model, model_path=model_path)
+        if kind == 'fake':
+            return create_provider(kind, model=model, latency=app.config.get('LLM_FAKE_LATENCY'))
+        return create_provider(kind)
+    
+    def get_llm_providers():
+        """
+        App-wide LLM providers and task routes, created on first use
+        
+        LLM_PROVIDER/LLM_MODEL/LLM_BASE_URL/LLM_MODEL_PATH configure the default; the
+        same settings prefixed LLM_ANALYSIS_ or LLM_INSIGHTS_ give that task its own
+        provider, inheriting unset values from the default when it's the same kind.
+        """
+        
+        if 'llm_providers' not in app.extensions:
+            settings = {key: app.config.get(f'LLM_{key.upper()}') for key in ('provider', 'model', 'base_url', 'model_path')}
+            settings['provider'] = settings['provider'] or 'openai'
+            providers = {'default': build_llm_provider(settings['provider'], settings['model'],
+                                                       settings['base_url'], settings['model_path'])}
+            routes = {}
+            
+            for task in ('analysis', 'insights'):
+                overrides = {key: app.config.get(f'LLM_{task.upper()}_{key.upper()}') for key in settings}
+                if not any(overrides.values()):
+                    continue
+                kind = overrides['provider'] or settings['provider']
+                if kind == settings['provider']:
+                    overrides = {key: overrides[key] or settings[key] for key in settings}
+                providers[task] = build_llm_provider(kind, overrides['model'], overrides['base_url'],
+                                                     overrides['model_path'])
+                routes[task] = task
+            
+            app.extensions.setdefault('llm_providers', (providers, routes))
+        return app.extensions['llm_providers']
+    
+    job_analyzers = app.extensions['job_analyzers'] = {}
+    job_analyzers_lock = threading.Lock()
+    
+    def get_job_analyzer(priority='interactive'):
+        """App-scoped JobAnalyzer per scheduler priority, sharing providers and the connection pool"""
+        
+        with job_analyzers_lock:
+            if priority not in job_analyzers:
+                providers, routes = get_llm_providers()
+                job_analyzers[priority] = JobAnalyzer(
+                    cache=get_llm_cache(),
+                    scheduler=get_llm_scheduler(),
+                    priority=priority,
+                    prompt_budget=get_prompt_budget(),
+                    providers=providers,
+                    routes=routes,
+                    instrumentation=instrumentation,
+                    reask_missing=app.config.get('LLM_REASK_MISSING_FIELDS', True)
+                )
+            return job_analyzers[priority]
+    
+    def get_parse_pool():
+        """App-wide document parsing pool, created on first use"""
+        
+        if 'parse_pool' not in app.extensions:
+            app.extensions.setdefault('parse_pool', ParsePool(
+                max_workers=app.config.get('PARSE_POOL_WORKERS', 3),
+                timeout=app.config.get('PARSE_TIMEOUT', 30.0)
+            ))
+        return app.extensions['parse_pool']
+    
+    document_scorers = app.extensions['document_scorers'] = OrderedDict()
+    document_scorers_lock = threading.Lock()
+    
+    def get_document_scorer(session):
+        """Scorer for a session's posting - shared by every candidate for the same job"""
+        
+        keywords = session.extracted_keywords or '{}'
+        requirements = session.job_requirements or '{}'
+        key = (session.job_description_id, hash(keywords), hash(requirements))
+        
+        with document_scorers_lock:
+            scorer = document_scorers.get(key)
+            if scorer is None:
+                scorer = document_scorers[key] = DocumentScorer(json.loads(keywords), json.loads(requirements))
+                if len(document_scorers) > app.config.get('DOCUMENT_SCORER_CACHE_SIZE', 128):
+                    document_scorers.popitem(last=False)
+            else:
+                document_scorers.move_to_end(key)
+        return scorer
+    
+    def get_document_parse():
+        """Parse function for the parse pool, carrying the configured PDF budgets (and timing itself when instrumented)"""
+        
+        parse = functools.partial(
+            DocumentParser.parse_document,
+            pdf_max_pages=app.config.get('PDF_MAX_PAGES', 50),
+            pdf_time_budget=app.config.get('PDF_TIME_BUDGET', 10.0)
+        )
+        return functools.partial(timed_result, parse) if instrumentation.enabled else parse
+    
+    def ingest_uploads(uploads):
+        """
+        Store uploads by content hash and parse them concurrently
+        
+        A file uploaded before is neither written nor parsed again. Returns
+        (name -> StoredDocument, name -> parse result); failed uploads have no StoredDocument.
+        """
+        
+        store = DocumentStore(app.config['UPLOAD_FOLDER'])
+        documents = {}
+        sources = {}
+        file_types = {}
+        parsed = {}
+        
+        for name, file in uploads.items():
+            # Uploads were hashed and sniffed while the request body was read
+            extension = os.path.splitext(file.filename)[1].lower()
+            sniffed = getattr(file.stream, 'file_type', extension.lstrip('.'))
+            if extension.lstrip('.') in app.config['ALLOWED_EXTENSIONS'] and sniffed != extension.lstrip('.'):
+                parsed[name] = {'success': False, 'error': f'File content does not look like a {extension} file'}
+                continue
+            
+            # In-memory uploads are parsed from the buffer, spilled ones from their stored copy
+            if getattr(file.stream, 'in_memory', False):
+                sources[name] = (file.stream.getvalue(), extension)
+            with instrumentation.span('upload_save', file_type=sniffed):
+                stored = store.save(file.stream, secure_filename(file.filename))
+                documents[name] = StoredDocument.get_or_create(stored.content_hash, stored.path, stored.size)
+            sources.setdefault(name, stored.path)
+            file_types[name] = sniffed
+        
+        # Parse whatever isn't cached yet, concurrently
+        pending = {}
+        for name, document in documents.items():
+            cached = document.get_parse()
+            if cached is None:
+                pending[name] = sources[name]
+            else:
+                parsed[name] = cached
+        
+        for name, result in get_parse_pool().parse_many(pending, get_document_parse()).items():
+            elapsed = result.pop(ELAPSED_KEY, None)
+            if elapsed is not None:
+                instrumentation.observe('parse', elapsed, file_type=file_types[name])
+            parsed[name] = result
+            if result['success']:
+                documents[name].store_parse(result)
+        
+        return documents, parsed
+    
     def allowed_file(filename):
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
@@ -36,11 +315,6 @@ def create_app(config_name='development'):
     def upload_documents():
         """Handle document uploads and create processing session"""
         
-        print("\n📁 Upload endpoint called!")  # Debug line
-        print(f"Request method: {request.method}")  # Debug line
-        print(f"Request files: {list(request.files.keys())}")  # Debug line
-        print(f"Job description text length: {len(request.form.get('job_description_text', ''))}")  # Debug line
-        
         try:
             # Check job description (file OR text)
             job_desc_file = request.files.get('job_description')
@@ -69,59 +343,42 @@ def create_app(config_name='development'):
             session_id = str(uuid.uuid4())
             session = ProcessingSession(id=session_id)
             
-            # Handle job description (text input or file)
             job_desc_file = request.files.get('job_description')
             job_desc_text = request.form.get('job_description_text', '')
+            uploads = {}
             
             if job_desc_file and job_desc_file.filename:
-                # Save and parse job description file
-                filename = secure_filename(f"{session_id}_job_desc_{job_desc_file.filename}")
-                job_desc_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                job_desc_file.save(job_desc_path)
-                
-                # Parse job description
-                parsed_job = DocumentParser.parse_document(job_desc_path)
-                if parsed_job['success']:
-                    session.job_description_text = parsed_job['text']
-                else:
-                    flash(f'Error parsing job description: {parsed_job["error"]}')
-                    return redirect(url_for('index'))
-            else:
-                # Use text input
-                session.job_description_text = job_desc_text
+                uploads['job_description'] = job_desc_file
             
-            # Handle resume file
             resume_file = request.files['resume']
             if resume_file and allowed_file(resume_file.filename):
-                filename = secure_filename(f"{session_id}_resume_{resume_file.filename}")
-                resume_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                resume_file.save(resume_path)
-                session.original_resume_path = resume_path
-                
-                # Parse resume
-                parsed_resume = DocumentParser.parse_document(resume_path)
-                if parsed_resume['success']:
-                    session.original_resume_text = parsed_resume['text']
-                else:
-                    flash(f'Error parsing resume: {parsed_resume["error"]}')
-                    return redirect(url_for('index'))
+                uploads['resume'] = resume_file
             
-            # Handle cover letter file
             cover_letter_file = request.files['cover_letter']
             if cover_letter_file and allowed_file(cover_letter_file.filename):
-                filename = secure_filename(f"{session_id}_cover_letter_{cover_letter_file.filename}")
-                cover_letter_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                cover_letter_file.save(cover_letter_path)
-                session.original_cover_letter_path = cover_letter_path
-                
-                # Parse cover letter
-                parsed_cover = DocumentParser.parse_document(cover_letter_path)
-                if parsed_cover['success']:
-                    session.original_cover_letter_text = parsed_cover['text']
-                else:
-                    flash(f'Error parsing cover letter: {parsed_cover["error"]}')
+                uploads['cover_letter'] = cover_letter_file
+            
+            documents, parsed = ingest_uploads(uploads)
+            
+            session.original_resume_path = documents['resume'].path if 'resume' in documents else None
+            session.original_cover_letter_path = documents['cover_letter'].path if 'cover_letter' in documents else None
+            
+            for name, label in (('job_description', 'job description'), ('resume', 'resume'), ('cover_letter', 'cover letter')):
+                if name in parsed and not parsed[name]['success']:
+                    flash(f'Error parsing {label}: {parsed[name]["error"]}')
                     return redirect(url_for('index'))
             
+            # Attached after ingest, whose lookups would otherwise flush the half-built session
+            if 'job_description' in parsed:
+                session.job_description_text = parsed['job_description']['text']
+            else:
+                # Use text input
+                session.job_description_text = job_desc_text
+            if 'resume' in parsed:
+                session.original_resume_text = parsed['resume']['text']
+            if 'cover_letter' in parsed:
+                session.original_cover_letter_text = parsed['cover_letter']['text']
+
             # Save session to database
             db.session.add(session)
             db.session.commit()
@@ -140,113 +397,535 @@ def create_app(config_name='development'):
         session = ProcessingSession.query.get_or_404(session_id)
         return render_template('processing.html', session=session)
     
-    @app.route('/api/analyze/<session_id>', methods=['POST'])
-    def analyze_documents(session_id):
-        """API endpoint to analyze documents and generate optimizations"""
+    @task_queue.task
+    def run_analysis(session_id):
+        """Background job: analyze the job description, generate insights and score the documents"""
         
-        try:
-            session = ProcessingSession.query.get_or_404(session_id)
-            session.status = 'processing'
-            db.session.commit()
-            
-            # Initialize job analyzer
+        # Stage timings are kept per session for ?timings=1 on the analysis endpoints
+        with instrumentation.trace(key=session_id):
             try:
-                analyzer = JobAnalyzer()
+                analyze_session(session_id)
             except Exception as e:
-                print(f"Error initializing JobAnalyzer: {e}")
-                return jsonify({'success': False, 'error': f'OpenAI configuration error: {str(e)}'})
-            
-            # Analyze job description
+                # A session left in a running stage could never be queued again
+                db.session.rollback()
+                session = db.session.get(ProcessingSession, session_id)
+                if session is not None:
+                    states = session.get_stage_states()
+                    stage = next((stage for stage in ANALYSIS_STAGES if states[stage] == 'running'),
+                                 next((stage for stage in ANALYSIS_STAGES if states[stage] != 'done'), ANALYSIS_STAGES[-1]))
+                    fail_analysis(session, stage, f'Analysis error: {str(e)}')
+                raise
+    
+    def set_analysis_stage(session, stage, state):
+        session.set_stage(stage, state)
+        events.publish(session.id, 'stage', {'stage': stage, 'state': state})
+    
+    def report_fallback(stage, error):
+        """Log an LLM step that failed over to local extraction and count it for /metrics"""
+        
+        app.logger.warning('%s failed, using local extraction: %s', stage, error)
+        instrumentation.count('llm_fallbacks', stage=stage)
+    
+    def fail_analysis(session, stage, error):
+        """Mark stage failed (other running stages go back to pending) and record the error"""
+        
+        for other, state in session.get_stage_states().items():
+            if state == 'running' and other != stage:
+                set_analysis_stage(session, other, 'pending')
+        set_analysis_stage(session, stage, 'failed')
+        session.error_message = error
+        db.session.commit()
+        events.publish(session.id, 'error', {'error': error})
+    
+    def analyze_session(session_id):
+        session = db.session.get(ProcessingSession, session_id)
+        if session is None:
+            return
+        
+        def set_stage(stage, state):
+            set_analysis_stage(session, stage, state)
+        
+        def stream_tokens(stage):
+            return lambda text: events.publish(session_id, 'token', {'stage': stage, 'text': text})
+        
+        def fail(stage, error):
+            fail_analysis(session, stage, error)
+        
+        # Documents were parsed during upload
+        events.publish(session_id, 'stage', {'stage': 'parsing', 'state': 'done'})
+        
+        if session.job_description is None:
+            return fail('analyzing_job', 'No job description provided')
+        
+        # Offline extractor: the whole analysis in 'local' mode, the fallback otherwise
+        local_analyzer = KeywordExtractor()
+        
+        # Initialize job analyzer (a misconfigured LLM falls back to the offline extractor)
+        if app.config.get('ANALYSIS_MODE') == 'local':
+            analyzer = local_analyzer
+        else:
             try:
-                job_analysis = analyzer.analyze_job_description(session.job_description_text)
+                analyzer = get_job_analyzer()
             except Exception as e:
-                print(f"Error in job analysis: {e}")
-                # Fallback analysis
-                job_analysis = {
-                    'success': True,
-                    'analysis': {
-                        'keywords': {
-                            'high_priority': ['python', 'sql', 'api', 'rest'],
-                            'medium_priority': ['git', 'docker', 'linux'],
-                            'low_priority': ['agile', 'scrum']
-                        },
-                        'requirements': {
-                            'technical_skills': ['Python', 'SQL', 'REST APIs'],
-                            'soft_skills': ['Communication', 'Problem solving'],
-                            'education': ['Bachelor\'s degree'],
-                            'experience': ['2+ years experience'],
-                            'certifications': []
-                        },
-                        'experience_level': 'mid',
-                        'industry': 'technology',
-                        'company_culture': ['collaborative', 'innovative'],
-                        'job_type': 'full-time'
-                    }
-                }
-            if not job_analysis['success']:
-                return jsonify({'success': False, 'error': job_analysis['error']})
-            
-            # Store analysis results
-            session.extracted_keywords = json.dumps(job_analysis['analysis']['keywords'])
-            session.job_requirements = json.dumps(job_analysis['analysis']['requirements'])
-            
-            # Get optimization insights
-            try:
-                insights = analyzer.extract_optimization_insights(
-                    session.job_description_text,
+                report_fallback('analyzer_init', e)
+                analyzer = local_analyzer
+        
+        # Job analysis and optimization insights are independent - run both prompts at once
+        set_stage('generating_insights', 'running')
+        set_stage('analyzing_job', 'running')
+        db.session.commit()
+        
+        calls = [
+            (analyzer.extract_optimization_insights, (
+                session.job_description_text,
+                session.original_resume_text,
+                session.original_cover_letter_text,
+                stream_tokens('generating_insights')
+            ))
+        ]
+        
+        # A posting already analysed for another candidate is reused, not sent again
+        stored_analysis = session.job_description.get_analysis()
+        if stored_analysis is None:
+            calls.append((analyzer.analyze_job_description, (
+                session.job_description_text,
+                stream_tokens('analyzing_job')
+            )))
+        
+        results = run_concurrently(calls, return_exceptions=True)
+        insights = results[0]
+        job_analysis = results[1] if stored_analysis is None else {'success': True, 'analysis': stored_analysis}
+        
+        # JobAnalyzer reports API errors as success False rather than raising
+        is_fallback = isinstance(job_analysis, Exception) or not job_analysis['success']
+        if is_fallback:
+            report_fallback('analyzing_job', job_analysis if isinstance(job_analysis, Exception) else job_analysis['error'])
+            # Fallback analysis from the posting itself
+            job_analysis = local_analyzer.analyze_job_description(session.job_description_text)
+        if not job_analysis['success']:
+            return fail('analyzing_job', job_analysis['error'])
+        
+        # Store analysis results on the shared posting (only LLM analyses are reused)
+        if stored_analysis is None:
+            session.job_description.store_analysis(
+                job_analysis['analysis'],
+                reusable=not is_fallback and analyzer is not local_analyzer
+            )
+        set_stage('analyzing_job', 'done')
+        
+        if isinstance(insights, Exception) or not insights['success']:
+            report_fallback('generating_insights', insights if isinstance(insights, Exception) else insights['error'])
+            # Fallback insights from keyword gaps
+            insights = {
+                'success': True,
+                'insights': local_analyzer.build_insights(
+                    job_analysis['analysis'],
                     session.original_resume_text,
                     session.original_cover_letter_text
                 )
+            }
+        
+        if not insights['success']:
+            return fail('generating_insights', insights['error'])
+        
+        session.optimization_insights = json.dumps(insights['insights'])
+        set_stage('generating_insights', 'done')
+        
+        # Score documents
+        set_stage('scoring', 'running')
+        db.session.commit()
+        
+        # Generate optimized resume (placeholder - will implement optimization module)
+        session.optimized_resume_text = session.original_resume_text  # Temporary
+        session.optimized_cover_letter_text = session.original_cover_letter_text  # Temporary
+        
+        # Score against the posting's keywords and requirements
+        session.set_scores(get_document_scorer(session).score_session(
+            session.optimized_resume_text,
+            session.optimized_cover_letter_text
+        ))
+        
+        set_stage('scoring', 'done')
+        session.status = 'completed'
+        db.session.commit()
+        events.publish(session_id, 'done', session.to_dict())
+    
+    def bulk_optimize(job_description_text, candidates, max_workers=None):
+        """
+        Analyse one posting once and optimize many candidates against it
+        
+        candidates is a list of dicts with 'name', 'resume' and 'cover_letter' text, or
+        'name' and 'error' for candidates whose documents couldn't be parsed. Yields a
+        'job' event once the posting is analysed, a 'candidate' event as each candidate
+        finishes (in completion order) and finally the 'ranking' of all candidates.
+        """
+        
+        local_analyzer = KeywordExtractor()
+        if app.config.get('ANALYSIS_MODE') == 'local':
+            analyzer = local_analyzer
+        else:
+            try:
+                analyzer = get_job_analyzer('bulk')
             except Exception as e:
-                print(f"Error generating insights: {e}")
-                # Fallback insights
-                insights = {
-                    'success': True,
-                    'insights': {
-                        'resume_gaps': ['Add more technical keywords', 'Include quantifiable achievements'],
-                        'cover_letter_gaps': ['Mention company culture fit', 'Add specific examples'],
-                        'keyword_opportunities': ['API development', 'Database management'],
-                        'experience_matching': {
-                            'strong_matches': ['Programming experience', 'Problem solving'],
-                            'weak_matches': ['Leadership experience'],
-                            'missing_experiences': ['Cloud platforms']
-                        },
-                        'ats_recommendations': ['Use standard section headers', 'Include more keywords'],
-                        'priority_actions': ['Add technical skills section', 'Quantify achievements']
-                    }
-                }
-            
-            if insights['success']:
-                # Generate optimized resume (placeholder - will implement optimization module)
-                session.optimized_resume_text = session.original_resume_text  # Temporary
-                session.optimized_cover_letter_text = session.original_cover_letter_text  # Temporary
-                
-                # Calculate preliminary scores (placeholder)
-                session.keyword_match_score = 7.5
-                session.ats_compatibility_score = 8.0
-                session.content_relevance_score = 7.8
-                session.overall_score = 7.7
+                report_fallback('analyzer_init', e)
+                analyzer = local_analyzer
+        
+        # The posting is analysed once, or not at all if another session already did
+        job_description = JobDescription.get_or_create(job_description_text)
+        analysis = job_description.get_analysis()
+        reused = analysis is not None
+        
+        if analysis is None:
+            try:
+                result = analyzer.analyze_job_description(job_description_text)
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            is_fallback = not result['success']
+            if is_fallback:
+                report_fallback('analyzing_job', result['error'])
+                result = local_analyzer.analyze_job_description(job_description_text)
+            if not result['success']:
+                raise ValueError(result['error'])
+            analysis = result['analysis']
+            job_description.store_analysis(analysis, reusable=not is_fallback and analyzer is not local_analyzer)
+        db.session.commit()
+        
+        yield {
+            'event': 'job',
+            'job_description_id': job_description.id,
+            'reused_analysis': reused,
+            'analysis': analysis,
+            'candidates': len(candidates)
+        }
+        
+        def generate_insights(candidate):
+            try:
+                result = analyzer.extract_optimization_insights(
+                    job_description_text, candidate['resume'], candidate['cover_letter']
+                )
+                if result['success']:
+                    return result['insights']
+                report_fallback('generating_insights', result['error'])
+            except Exception as e:
+                report_fallback('generating_insights', e)
+            # Fallback insights from keyword gaps
+            return local_analyzer.build_insights(analysis, candidate['resume'], candidate['cover_letter'])
+        
+        ranking = []
+        for index, candidate in enumerate(candidates):
+            if 'error' in candidate:
+                yield {'event': 'candidate', 'index': index, 'name': candidate['name'], 'error': candidate['error']}
+        
+        # Insights are the only LLM call per candidate - fan them out over a bounded pool
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers or app.config.get('BULK_MAX_WORKERS', 8),
+            thread_name_prefix='bulk'
+        )
+        futures = {}
+        try:
+            futures = {
+                executor.submit(generate_insights, candidate): index
+                for index, candidate in enumerate(candidates) if 'error' not in candidate
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                candidate = candidates[index]
                 
+                session = ProcessingSession(
+                    id=str(uuid.uuid4()),
+                    job_description=job_description,
+                    original_resume_text=candidate['resume'],
+                    original_cover_letter_text=candidate['cover_letter'],
+                    optimized_resume_text=candidate['resume'],
+                    optimized_cover_letter_text=candidate['cover_letter'],
+                    optimization_insights=json.dumps(future.result())
+                )
+                for stage in ANALYSIS_STAGES:
+                    session.set_stage(stage, 'done')
                 session.status = 'completed'
+                db.session.add(session)
+                db.session.flush()
+                
+                session.set_scores(get_document_scorer(session).score_session(
+                    session.optimized_resume_text,
+                    session.optimized_cover_letter_text
+                ))
                 db.session.commit()
                 
-                return jsonify({
-                    'success': True,
-                    'analysis': job_analysis['analysis'],
-                    'insights': insights['insights'],
-                    'scores': {
-                        'keyword_match': session.keyword_match_score,
-                        'ats_compatibility': session.ats_compatibility_score,
-                        'content_relevance': session.content_relevance_score,
-                        'overall': session.overall_score
+                result = {
+                    'index': index,
+                    'name': candidate['name'],
+                    'session_id': session.id,
+                    'scores': session.to_dict()['scores']
+                }
+                ranking.append(result)
+                yield {'event': 'candidate', **result, 'insights': json.loads(session.optimization_insights)}
+        finally:
+            # Stop queued work if the client went away (shutdown's cancel_futures needs Python 3.9)
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+        
+        ranking.sort(key=lambda result: (-result['scores']['overall'], -result['scores']['keyword_match'], result['index']))
+        yield {
+            'event': 'ranking',
+            'results': [{'rank': rank, **result} for rank, result in enumerate(ranking, 1)]
+        }
+    
+    @app.route('/api/bulk', methods=['POST'])
+    def bulk_optimize_documents():
+        """
+        API endpoint to rank many candidates against one job description
+        
+        Accepts JSON ({"job_description": ..., "candidates": [{"name", "resume", "cover_letter"}]})
+        or a form with a job_description file or job_description_text plus 'resumes' and
+        optional 'cover_letters' files paired by position. Streams newline-delimited JSON events.
+        """
+        
+        try:
+            if request.is_json:
+                data = request.get_json()
+                job_text = (data.get('job_description') or '').strip()
+                candidates = [
+                    {
+                        'name': candidate.get('name') or f'Candidate {index + 1}',
+                        'resume': candidate.get('resume') or '',
+                        'cover_letter': candidate.get('cover_letter') or ''
                     }
-                })
+                    for index, candidate in enumerate(data.get('candidates') or [])
+                ]
             else:
-                return jsonify({'success': False, 'error': insights['error']})
+                job_text, candidates = parse_bulk_uploads()
+            
+            if not job_text:
+                return jsonify({'success': False, 'error': 'Please provide a job description'}), 400
+            if not candidates:
+                return jsonify({'success': False, 'error': 'Please provide at least one candidate'}), 400
+            if len(candidates) > app.config.get('BULK_MAX_CANDIDATES', 500):
+                return jsonify({
+                    'success': False,
+                    'error': f"At most {app.config.get('BULK_MAX_CANDIDATES', 500)} candidates per request"
+                }), 400
+            
+            events_iter = bulk_optimize(job_text, candidates)
+            first = next(events_iter)  # Surface configuration and analysis errors as a JSON error
+            
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)})
+        
+        def generate():
+            yield json.dumps(first) + '\n'
+            for event in events_iter:
+                yield json.dumps(event) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    def parse_bulk_uploads():
+        """Job description text and candidates from a bulk upload form"""
+        
+        uploads = {}
+        job_desc_file = request.files.get('job_description')
+        if job_desc_file and job_desc_file.filename:
+            uploads['job_description'] = job_desc_file
+        
+        resumes = [file for file in request.files.getlist('resumes') if file.filename]
+        cover_letters = [file for file in request.files.getlist('cover_letters') if file.filename]
+        if cover_letters and len(cover_letters) != len(resumes):
+            raise ValueError('Provide one cover letter per resume, or none')
+        
+        for index, file in enumerate(resumes):
+            uploads[f'resume_{index}'] = file
+        for index, file in enumerate(cover_letters):
+            uploads[f'cover_letter_{index}'] = file
+        
+        _, parsed = ingest_uploads(uploads)
+        
+        if 'job_description' in parsed:
+            if not parsed['job_description']['success']:
+                raise ValueError(f"Error parsing job description: {parsed['job_description']['error']}")
+            job_text = parsed['job_description']['text'].strip()
+        else:
+            job_text = request.form.get('job_description_text', '').strip()
+        
+        return job_text, bulk_candidates(
+            [file.filename for file in resumes],
+            [parsed[f'resume_{index}'] for index in range(len(resumes))],
+            [parsed[f'cover_letter_{index}'] for index in range(len(cover_letters))]
+        )
+    
+    def bulk_candidates(names, parsed_resumes, parsed_cover_letters):
+        """Candidate dicts for bulk_optimize from parse results paired by position"""
+        
+        candidates = []
+        for index, (name, resume) in enumerate(zip(names, parsed_resumes)):
+            cover_letter = parsed_cover_letters[index] if parsed_cover_letters else {'success': True, 'text': ''}
+            if not resume['success']:
+                candidates.append({'name': name, 'error': f"Error parsing resume: {resume['error']}"})
+            elif not cover_letter['success']:
+                candidates.append({'name': name, 'error': f"Error parsing cover letter: {cover_letter['error']}"})
+            else:
+                candidates.append({'name': name, 'resume': resume['text'], 'cover_letter': cover_letter['text']})
+        return candidates
+    
+    @app.cli.command('upgrade-db')
+    def upgrade_db_command():
+        """Upgrade a database created by an earlier version to the current schema"""
+        
+        moved = upgrade_schema()
+        click.echo(f'Schema is up to date; {moved} session(s) moved to shared job descriptions')
+    
+    @app.cli.command('bulk-optimize')
+    @click.option('--job', 'job_path', type=click.Path(exists=True, dir_okay=False), help='Job description file')
+    @click.option('--job-text', help='Job description text')
+    @click.option('--resume', 'resumes', multiple=True, required=True,
+                  type=click.Path(exists=True, dir_okay=False), help='Resume file (repeatable)')
+    @click.option('--cover-letter', 'cover_letters', multiple=True,
+                  type=click.Path(exists=True, dir_okay=False), help='Cover letter file, paired with --resume by position')
+    @click.option('--workers', type=int, help='Concurrent insight requests')
+    def bulk_optimize_command(job_path, job_text, resumes, cover_letters, workers):
+        """Rank many candidates against one job description, printing JSON lines"""
+        
+        if cover_letters and len(cover_letters) != len(resumes):
+            raise click.UsageError('Provide one --cover-letter per --resume, or none')
+        if not job_path and not job_text:
+            raise click.UsageError('Provide --job or --job-text')
+        
+        db.create_all()
+        
+        paths = {f'resume_{index}': path for index, path in enumerate(resumes)}
+        paths.update({f'cover_letter_{index}': path for index, path in enumerate(cover_letters)})
+        if job_path:
+            paths['job_description'] = job_path
+        parsed = get_parse_pool().parse_many(paths, get_document_parse())
+        
+        if job_path:
+            if not parsed['job_description']['success']:
+                raise click.ClickException(f"Error parsing job description: {parsed['job_description']['error']}")
+            job_text = parsed['job_description']['text']
+        
+        candidates = bulk_candidates(
+            [os.path.basename(path) for path in resumes],
+            [parsed[f'resume_{index}'] for index in range(len(resumes))],
+            [parsed[f'cover_letter_{index}'] for index in range(len(cover_letters))]
+        )
+        
+        for event in bulk_optimize(job_text.strip(), candidates, max_workers=workers):
+            click.echo(json.dumps(event))
+    
+    def add_timings(response, session):
+        """With ?timings=1, attach the stage timings of a finished analysis to an API response"""
+        
+        if request.args.get('timings') and instrumentation.enabled and session.status in ('completed', 'failed'):
+            response['timings'] = instrumentation.get_trace(session.id)
+    
+    @app.route('/api/analyze/<session_id>', methods=['POST'])
+    def analyze_documents(session_id):
+        """API endpoint to queue document analysis - returns 202 and a status URL to poll"""
+        
+        try:
+            session = ProcessingSession.query.get_or_404(session_id)
+            
+            # Don't queue a second job while one is in flight, unless it has gone quiet
+            # for longer than any run takes (its process restarted or its message was lost)
+            stale_before = datetime.utcnow() - timedelta(seconds=app.config.get('ANALYSIS_STALE_AFTER', 900))
+            in_flight = (session.status in ('queued', *ANALYSIS_STAGES)
+                         and session.updated_at is not None and session.updated_at > stale_before)
+            if not in_flight:
+                session.status = 'queued'
+                session.stage_states = None
+                session.error_message = None
+                db.session.commit()
                 
+                events.reset(session_id)
+                task_queue.enqueue('run_analysis', session_id)
+                db.session.refresh(session)
+            
+            response = {
+                'success': True,
+                'session_id': session_id,
+                'status': session.status,
+                'status_url': url_for('analysis_status', session_id=session_id)
+            }
+            add_timings(response, session)
+            return jsonify(response), 202
+            
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
     
+    @app.route('/api/analyze/<session_id>/status')
+    def analysis_status(session_id):
+        """API endpoint to poll analysis progress and fetch results once completed"""
+        
+        try:
+            session = ProcessingSession.query.get_or_404(session_id)
+            response = {'success': session.status != 'failed', **session.to_dict()}
+            
+            if session.status == 'failed':
+                response['error'] = session.error_message or 'Analysis failed'
+            elif session.status == 'completed':
+                response['analysis'] = json.loads(session.job_analysis) if session.job_analysis else {}
+                response['insights'] = json.loads(session.optimization_insights) if session.optimization_insights else {}
+            
+            add_timings(response, session)
+            return jsonify(response)
+            
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)})
+    
+    @app.route('/api/analyze/<session_id>/events')
+    def analysis_events(session_id):
+        """Server-Sent Events stream of stage changes and partial LLM output for a session"""
+        
+        session = ProcessingSession.query.get_or_404(session_id)
+        last_event_id = request.headers.get('Last-Event-ID', type=int) or 0
+        poll_interval = app.config.get('SSE_POLL_INTERVAL', 2.0)
+        
+        def format_event(event, data, event_id=None):
+            message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            return f"id: {event_id}\n{message}" if event_id else message
+        
+        def is_finished(snapshot):
+            # Nothing will be published for a finished run this process didn't execute
+            return snapshot['status'] in ('completed', 'failed') and not events.has_channel(session_id)
+        
+        snapshot = session.to_dict()
+        # The stream can stay open for minutes - don't hold a pooled connection while it waits
+        db.session.remove()
+        
+        def generate():
+            nonlocal snapshot
+            yield format_event('status', snapshot)
+            if is_finished(snapshot):
+                yield format_event('done' if snapshot['status'] == 'completed' else 'error', snapshot)
+                return
+            
+            for item in events.subscribe(session_id, last_event_id, timeout=poll_interval):
+                if item is not None:
+                    yield format_event(item[1], item[2], item[0])
+                    continue
+                
+                # Keep-alive, and pick up progress from jobs running in a Celery worker
+                yield ': keep-alive\n\n'
+                try:
+                    current = db.session.get(ProcessingSession, session_id)
+                    current = current.to_dict() if current is not None else snapshot
+                finally:
+                    db.session.remove()
+                if current != snapshot:
+                    snapshot = current
+                    yield format_event('status', snapshot)
+                if is_finished(snapshot):
+                    yield format_event('done' if snapshot['status'] == 'completed' else 'error', snapshot)
+                    return
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
     @app.route('/review/<session_id>')
     def review_documents(session_id):
         """Review page - side-by-side comparison with editing capability"""
@@ -307,18 +986,11 @@ def create_app(config_name='development'):
             
             db.session.add(version)
             
-            # TODO: Recalculate scores based on updated content
-            # For now, slightly adjust scores
-            if document_type == 'resume':
-                session.keyword_match_score = min(10, session.keyword_match_score + 0.2)
-            else:
-                session.content_relevance_score = min(10, session.content_relevance_score + 0.1)
-            
-            session.overall_score = (
-                session.keyword_match_score + 
-                session.ats_compatibility_score + 
-                session.content_relevance_score
-            ) / 3
+            # Recalculate scores - only edited lines are re-analysed
+            session.set_scores(get_document_scorer(session).score_session(
+                session.optimized_resume_text or session.original_resume_text,
+                session.optimized_cover_letter_text or session.original_cover_letter_text
+            ))
             
             db.session.commit()
             
@@ -335,6 +1007,30 @@ def create_app(config_name='development'):
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
     
+    @app.route('/api/score/<session_id>', methods=['POST'])
+    def score_document(session_id):
+        """API endpoint for live re-scoring while editing - nothing is saved"""
+        
+        try:
+            session = ProcessingSession.query.get_or_404(session_id)
+            data = request.get_json()
+            
+            document_type = data.get('document_type')  # 'resume' or 'cover_letter'
+            content = data.get('content') or ''
+            
+            resume_text = session.optimized_resume_text or session.original_resume_text
+            cover_letter_text = session.optimized_cover_letter_text or session.original_cover_letter_text
+            if document_type == 'resume':
+                resume_text = content
+            elif document_type == 'cover_letter':
+                cover_letter_text = content
+            
+            scores = get_document_scorer(session).score_session(resume_text, cover_letter_text)
+            return jsonify({'success': True, 'scores': scores})
+            
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)})
+    
     @app.route('/download/<session_id>')
     def download_page(session_id):
         """Download page with final documents and feedback"""
@@ -342,6 +1038,37 @@ def create_app(config_name='development'):
         session = ProcessingSession.query.get_or_404(session_id)
         return render_template('download.html', session=session)
     
+    def collect_llm_stats():
+        metrics = app.extensions.get('llm_connection_metrics')
+        scheduler = app.extensions.get('llm_scheduler')
+        cache = app.extensions.get('llm_cache')
+        prompt_budget = app.extensions.get('prompt_budget')
+        
+        return {
+            'connections': metrics.stats() if metrics else None,
+            'scheduler': scheduler.stats() if scheduler else None,
+            'cache': cache.stats() if cache else None,
+            'prompt_budget': prompt_budget.stats() if prompt_budget else None
+        }
+    
+    @app.route('/api/llm/stats')
+    def llm_stats():
+        """Connection reuse, scheduler, response cache and prompt budget counters for this process"""
+        
+        return jsonify(collect_llm_stats())
+    
+    @app.route('/metrics')
+    def metrics():
+        """Stage latency histograms, LLM token counters and the LLM stats in Prometheus text format"""
+        
+        gauges = {}
+        for section, stats in collect_llm_stats().items():
+            for key, value in (stats or {}).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauges[f'llm_{section}_{key}'] = value
+        
+        return Response(instrumentation.render_prometheus(gauges), mimetype='text/plain; version=0.0.4')
+    
     @app.route('/api/generate-feedback/<session_id>')
     def generate_feedback(session_id):
         """Generate detailed feedback for the optimized documents"""
@@ -374,6 +1101,36 @@ def create_app(config_name='development'):
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
     
+    def describe_request(environ, headers):
+        """(route, session id) of a finished request, for naming its profile"""
+        
+        adapter = app.url_map.bind_to_environ(environ)
+        try:
+            rule, view_args = adapter.match(return_rule=True)
+        except HTTPException:
+            return environ.get('PATH_INFO', ''), None
+        
+        session_id = view_args.get('session_id')
+        location = dict(headers).get('Location')
+        if session_id is None and location:
+            # /upload creates the session and redirects to its processing page
+            try:
+                session_id = adapter.match(urlsplit(location).path, method='GET')[1].get('session_id')
+            except HTTPException:
+                pass
+        return rule.rule, session_id
+    
+    # Opt-in cProfile dumps of slow (or a sample of) requests
+    if app.config.get('PROFILE_SLOW_REQUEST_SECONDS') or app.config.get('PROFILE_SAMPLE_RATE'):
+        app.wsgi_app = ProfilingMiddleware(
+            app.wsgi_app,
+            output_dir=os.path.join(app.config['TEMP_FOLDER'], 'profiles'),
+            slow_threshold=app.config.get('PROFILE_SLOW_REQUEST_SECONDS') or None,
+            sample_rate=app.config.get('PROFILE_SAMPLE_RATE') or 0.0,
+            max_profiles=app.config.get('PROFILE_MAX_FILES', 50),
+            describe=describe_request
+        )
+    
     # Error handlers
     @app.errorhandler(404)
     def not_found_error(error):
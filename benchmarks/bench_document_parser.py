@@ -0,0 +1,139 @@
+# benchmarks/bench_document_parser.py - DocumentParser throughput over a corpus of PDFs, DOCXs and TXTs
+#
+# Usage: python -m benchmarks.bench_document_parser [--corpus DIR] [--documents 30] [--repeat 3] [--output FILE]
+#
+# Without --corpus a synthetic corpus of resumes is generated (seeded, so runs are comparable).
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from benchmarks.bench_docx_reader import make_resume
+from benchmarks.harness import Timer, metadata, peak_rss_mb, summarize
+from modules.document_parser import DocumentParser
+
+EXTENSIONS = ('pdf', 'docx', 'txt')
+
+WORDS = ('python', 'developed', 'services', 'team', 'sql', 'reduced', 'latency', 'docker',
+         'customers', 'platform', 'migrated', 'led', 'designed', 'api', 'reporting', 'pipeline')
+
+
+def make_pdf(pages):
+    """Build a minimal PDF where each page is a list of text lines"""
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # Pages, filled in below
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    page_ids = []
+    for lines in pages:
+        ops = [b'BT /F1 11 Tf 72 760 Td 14 TL']
+        for line in lines:
+            escaped = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            ops.append(f'({escaped}) Tj T*'.encode('latin-1'))
+        ops.append(b'ET')
+        content = b'\n'.join(ops)
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % (len(objects))
+        )
+        page_ids.append(len(objects))
+    kids = b' '.join(b'%d 0 R' % page_id for page_id in page_ids)
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_ids))
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def resume_lines(rng, count):
+    return [' '.join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize() + '.' for _ in range(count)]
+
+
+def make_document(extension, seed):
+    """One synthetic resume of 1-3 pages in the given format"""
+    rng = random.Random(seed)
+    pages = rng.randint(1, 3)
+    if extension == 'pdf':
+        return make_pdf([resume_lines(rng, 45) for _ in range(pages)])
+    if extension == 'docx':
+        return make_resume(pages * 40, seed=seed)
+    return '\n'.join(resume_lines(rng, pages * 45)).encode()
+
+
+def make_corpus(directory, documents=30, seed=42):
+    """Write documents spread evenly over PDF, DOCX and TXT; returns their paths"""
+    paths = []
+    for index in range(documents):
+        extension = EXTENSIONS[index % len(EXTENSIONS)]
+        path = os.path.join(directory, f'resume_{index:03d}.{extension}')
+        with open(path, 'wb') as f:
+            f.write(make_document(extension, seed + index))
+        paths.append(path)
+    return paths
+
+
+def load_corpus(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.rsplit('.', 1)[-1].lower() in EXTENSIONS
+    )
+
+
+def run(paths, repeat=3):
+    latencies = {extension: [] for extension in EXTENSIONS}
+    errors = dict.fromkeys(EXTENSIONS, 0)
+    sizes = dict.fromkeys(EXTENSIONS, 0)
+
+    for _ in range(repeat):
+        for path in paths:
+            extension = path.rsplit('.', 1)[-1].lower()
+            with Timer() as timer:
+                result = DocumentParser.parse_document(path)
+            latencies[extension].append(timer.ms)
+            errors[extension] += not result['success']
+            sizes[extension] += os.path.getsize(path)
+
+    results = {}
+    for extension in EXTENSIONS:
+        if not latencies[extension]:
+            continue
+        summary = summarize(latencies[extension], errors[extension])
+        total_seconds = sum(latencies[extension]) / 1000
+        summary['documents_per_second'] = round(len(latencies[extension]) / total_seconds, 2)
+        summary['mb_per_second'] = round(sizes[extension] / (1024 * 1024) / total_seconds, 3)
+        results[extension] = summary
+
+    return {'parse': results, 'peak_rss_mb': peak_rss_mb()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--corpus', help='directory of .pdf/.docx/.txt files (default: generate one)')
+    parser.add_argument('--documents', type=int, default=30, help='size of the generated corpus')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write JSON here as well as to stdout')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        paths = load_corpus(args.corpus) if args.corpus else make_corpus(scratch, args.documents)
+        results = {
+            'benchmark': 'document_parser',
+            **metadata(corpus=args.corpus or 'generated', documents=len(paths), repeat=args.repeat),
+            **run(paths, args.repeat),
+        }
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
@@ -0,0 +1,74 @@
+# benchmarks/bench_docx_reader.py - Single-pass DOCX reader vs python-docx + docx2txt
+#
+# Usage: python -m benchmarks.bench_docx_reader [--paragraphs 3000]
+import argparse
+import io
+import json
+import random
+import time
+
+import docx2txt
+from docx import Document
+
+from benchmarks.bench_keyword_matcher import best_of
+from modules.docx_reader import DocxReader
+
+
+def double_parse(data):
+    """The original _parse_docx: python-docx for paragraphs and styles, then docx2txt for the text"""
+    doc = Document(io.BytesIO(data))
+    paragraphs = [(para.text, para.style.name if para.style else 'Normal') for para in doc.paragraphs if para.text.strip()]
+    text = docx2txt.process(io.BytesIO(data))
+    return text, paragraphs
+
+
+def single_parse(data):
+    paragraphs = list(DocxReader(io.BytesIO(data)).paragraphs())
+    return '\n'.join(paragraph.text for paragraph in paragraphs), paragraphs
+
+
+def make_resume(paragraph_count, seed=42):
+    """A long resume: headings, bullet points, a skills table and a page header"""
+    rng = random.Random(seed)
+    words = ('python', 'developed', 'services', 'team', 'sql', 'reduced', 'latency', 'docker',
+             'customers', 'platform', 'migrated', 'led', 'designed', 'api', 'reporting', 'pipeline')
+
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = 'Jane Doe - jane@example.com - (555) 123-4567'
+
+    for index in range(paragraph_count):
+        if index % 25 == 0:
+            document.add_heading(f'Experience {index // 25 + 1}', level=2)
+        else:
+            document.add_paragraph(' '.join(rng.choices(words, k=rng.randint(8, 25))), style='List Bullet')
+
+    table = document.add_table(rows=20, cols=3)
+    for row in table.rows:
+        for cell in row.cells:
+            cell.text = rng.choice(words)
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def run(paragraph_count=3000, repeat=3):
+    data = make_resume(paragraph_count)
+
+    return {
+        'paragraphs': paragraph_count,
+        'docx_bytes': len(data),
+        'double_parse_ms': round(best_of(lambda: double_parse(data), repeat), 3),
+        'single_pass_ms': round(best_of(lambda: single_parse(data), repeat), 3),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--paragraphs', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.paragraphs, args.repeat)
+    results['speedup'] = round(results['double_parse_ms'] / results['single_pass_ms'], 2)
+    print(json.dumps(results, indent=2))
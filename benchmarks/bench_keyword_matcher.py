@@ -0,0 +1,70 @@
+# benchmarks/bench_keyword_matcher.py - Aho–Corasick matcher vs per-keyword str.count
+#
+# Usage: python -m benchmarks.bench_keyword_matcher [--keywords 500] [--size 50000]
+import argparse
+import json
+import random
+import string
+import time
+
+from modules.keyword_matcher import KeywordMatcher
+
+
+def naive_counts(text, keywords):
+    """The original _calculate_keyword_density loop: one substring scan per keyword"""
+    text_lower = text.lower()
+    return {keyword: text_lower.count(keyword.lower()) for keyword in keywords}
+
+
+def make_corpus(keyword_count, text_size, seed=42):
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(3000)]
+
+    keywords = set()
+    while len(keywords) < keyword_count:
+        keywords.add(' '.join(rng.choices(vocabulary, k=rng.choice((1, 1, 1, 2, 3)))))
+    keywords = sorted(keywords)
+
+    words = []
+    size = 0
+    while size < text_size:
+        word = rng.choice(keywords) if rng.random() < 0.1 else rng.choice(vocabulary)
+        words.append(word + rng.choice((' ', ' ', ' ', ', ', '. ', '\n')))
+        size += len(words[-1])
+    return keywords, ''.join(words)[:text_size]
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def run(keyword_count=500, text_size=50_000, repeat=5):
+    keywords, text = make_corpus(keyword_count, text_size)
+    matcher = KeywordMatcher(keywords)
+
+    return {
+        'keywords': keyword_count,
+        'text_bytes': len(text),
+        'naive_count_ms': round(best_of(lambda: naive_counts(text, keywords), repeat), 3),
+        'matcher_build_ms': round(best_of(lambda: KeywordMatcher(keywords), repeat), 3),
+        'matcher_count_ms': round(best_of(lambda: matcher.count(text), repeat), 3),
+        'matcher_find_all_ms': round(best_of(lambda: matcher.find_all(text), repeat), 3),
+        # Scoring resume + cover letter + job text against one keyword set
+        'naive_3_documents_ms': round(best_of(lambda: [naive_counts(text, keywords) for _ in range(3)], repeat), 3),
+        'matcher_3_documents_ms': round(best_of(lambda: [matcher.count(text) for _ in range(3)], repeat), 3),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--keywords', type=int, default=500)
+    parser.add_argument('--size', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.keywords, args.size, args.repeat), indent=2))
@@ -0,0 +1,176 @@
+# benchmarks/bench_pipeline.py - Load test of upload -> analyze -> review against a latency-injecting fake LLM
+#
+# Usage: python -m benchmarks.bench_pipeline [--sessions 40] [--concurrency 8] [--llm-latency 0.5]
+#                                            [--queue sync|thread] [--parse-workers 0] [--output FILE]
+#
+# Each simulated user uploads a job description, a DOCX resume and a PDF cover letter,
+# runs the analysis, saves an edit and fetches feedback. Requests go through the real
+# WSGI app in-process (no network), with LLM calls answered by the fake provider after
+# --llm-latency seconds, so results reflect this code rather than OpenAI.
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from benchmarks.bench_document_parser import make_pdf, resume_lines
+from benchmarks.bench_docx_reader import make_resume
+from benchmarks.harness import Timer, metadata, peak_rss_mb, summarize
+
+JOB_DESCRIPTION = """Senior Python Developer
+We are looking for a backend engineer with 5+ years of Python, SQL and REST API design.
+Experience with Docker, Kubernetes, AWS and CI/CD pipelines is a plus.
+Strong communication and collaboration skills. Remote friendly, full-time."""
+
+STAGES = ('upload', 'analyze', 'update_document', 'generate_feedback')
+
+
+def create_benchmark_app(workdir, llm_latency=0.5, queue='sync', parse_workers=0, llm_cache=False):
+    from app import create_app
+    from database.models import db
+
+    app = create_app('development', overrides={
+        'TESTING': False,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'UPLOAD_FOLDER': os.path.join(workdir, 'uploads'),
+        'PROCESSED_FOLDER': os.path.join(workdir, 'processed'),
+        'TEMP_FOLDER': os.path.join(workdir, 'temp'),
+        'TASK_QUEUE_BACKEND': queue,
+        'PARSE_POOL_WORKERS': parse_workers,
+        'LLM_PROVIDER': 'fake',
+        'LLM_FAKE_LATENCY': llm_latency,
+        'LLM_CACHE_ENABLED': llm_cache,
+        'LLM_CACHE_PATH': os.path.join(workdir, 'llm_cache.db'),
+    })
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def make_documents(index):
+    """A distinct resume and cover letter per user, so upload dedupe doesn't short-circuit parsing"""
+    resume = make_resume(80, seed=index)
+    cover_letter = make_pdf([['Dear Hiring Manager,'] + resume_lines(random.Random(index), 20)])
+    return resume, cover_letter
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {stage: [] for stage in STAGES}
+        self.errors = dict.fromkeys(STAGES, 0)
+        self.failures = []
+
+    def record(self, stage, ms, ok, detail=None):
+        with self.lock:
+            self.latencies[stage].append(ms)
+            if not ok:
+                self.errors[stage] += 1
+                if len(self.failures) < 10:
+                    self.failures.append({'stage': stage, 'detail': detail})
+
+
+def wait_for_analysis(client, session_id, timeout=120):
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get(f'/api/analyze/{session_id}/status').get_json()
+        if status.get('status') in ('completed', 'failed') or time.monotonic() > deadline:
+            return status
+        time.sleep(0.05)
+
+
+def run_session(app, index, recorder):
+    """One user's journey through the pipeline; stops at the first failing stage"""
+    client = app.test_client()
+    resume, cover_letter = make_documents(index)
+
+    with Timer() as timer:
+        response = client.post('/upload', data={
+            'job_description_text': JOB_DESCRIPTION,
+            'resume': (BytesIO(resume), f'resume_{index}.docx'),
+            'cover_letter': (BytesIO(cover_letter), f'cover_letter_{index}.pdf'),
+        }, content_type='multipart/form-data')
+    location = response.headers.get('Location', '')
+    ok = response.status_code == 302 and '/process/' in location
+    recorder.record('upload', timer.ms, ok, location or response.status_code)
+    if not ok:
+        return
+    session_id = location.rstrip('/').rsplit('/', 1)[-1]
+
+    with Timer() as timer:
+        response = client.post(f'/api/analyze/{session_id}')
+        status = wait_for_analysis(client, session_id) if response.status_code == 202 else {}
+    ok = status.get('status') == 'completed'
+    recorder.record('analyze', timer.ms, ok, status.get('error') or response.status_code)
+    if not ok:
+        return
+
+    with Timer() as timer:
+        response = client.post(f'/api/update-document/{session_id}', json={
+            'document_type': 'resume',
+            'content': '\n'.join(resume_lines(random.Random(index), 40) + ['Deployed services on Kubernetes and AWS.']),
+        })
+    body = response.get_json(silent=True) or {}
+    recorder.record('update_document', timer.ms, body.get('success') is True, body.get('error'))
+
+    with Timer() as timer:
+        response = client.get(f'/api/generate-feedback/{session_id}')
+    body = response.get_json(silent=True) or {}
+    recorder.record('generate_feedback', timer.ms, body.get('success') is True, body.get('error'))
+
+
+def run(sessions=40, concurrency=8, llm_latency=0.5, queue='sync', parse_workers=0, llm_cache=False):
+    workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    try:
+        app = create_benchmark_app(workdir, llm_latency, queue, parse_workers, llm_cache)
+        recorder = Recorder()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='user') as executor:
+            for future in [executor.submit(run_session, app, index, recorder) for index in range(sessions)]:
+                future.result()
+        wall_seconds = time.perf_counter() - started
+
+        requests = sum(len(values) for values in recorder.latencies.values())
+        completed = len(recorder.latencies['generate_feedback']) - recorder.errors['generate_feedback']
+        return {
+            'stages': {stage: summarize(recorder.latencies[stage], recorder.errors[stage]) for stage in STAGES},
+            'wall_seconds': round(wall_seconds, 3),
+            'sessions_completed': completed,
+            'sessions_per_second': round(completed / wall_seconds, 3),
+            'requests_per_second': round(requests / wall_seconds, 3),
+            'peak_rss_mb': peak_rss_mb(),
+            'failures': recorder.failures,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sessions', type=int, default=40, help='simulated users')
+    parser.add_argument('--concurrency', type=int, default=8, help='users in flight at once')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='seconds per fake LLM completion')
+    parser.add_argument('--queue', choices=('sync', 'thread'), default='sync', help='TASK_QUEUE_BACKEND')
+    parser.add_argument('--parse-workers', type=int, default=0, help='PARSE_POOL_WORKERS (0 parses inline)')
+    parser.add_argument('--llm-cache', action='store_true', help='enable the LLM response cache')
+    parser.add_argument('--output', help='write JSON here as well as to stdout')
+    args = parser.parse_args()
+
+    parameters = {key: value for key, value in vars(args).items() if key != 'output'}
+    # The app's debug prints would corrupt the JSON on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        results = {'benchmark': 'pipeline', **metadata(**parameters), **run(**parameters)}
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
@@ -0,0 +1,58 @@
+# benchmarks/compare.py - Diff two benchmark JSON results (e.g. from two commits)
+#
+# Usage: python -m benchmarks.compare before.json after.json [--threshold 5]
+#
+# Prints every numeric metric present in both files with its relative change; changes
+# beyond --threshold percent are flagged. Timing metrics (_ms) are better when lower,
+# throughput metrics (_per_second) when higher.
+import argparse
+import json
+
+SKIP = ('parameters', 'commit', 'timestamp', 'python', 'platform', 'failures')
+
+
+def flatten(results, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}, numeric leaves only"""
+    flat = {}
+    for key, value in results.items():
+        if key in SKIP:
+            continue
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(before, after, threshold=5.0):
+    """Rows of (metric, before, after, change %, verdict)"""
+    old, new = flatten(before), flatten(after)
+    rows = []
+    for metric in sorted(old.keys() & new.keys()):
+        change = (new[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+        verdict = ''
+        if abs(change) >= threshold:
+            if metric.endswith('_per_second'):
+                verdict = 'better' if change > 0 else 'worse'
+            elif metric.endswith(('_ms', '_mb', 'errors', '_seconds')):
+                verdict = 'better' if change < 0 else 'worse'
+        rows.append((metric, old[metric], new[metric], round(change, 1), verdict))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=5.0, help='percent change worth flagging')
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    for metric, old, new, change, verdict in compare(before, after, args.threshold):
+        print(f'{metric:45} {old:>12} {new:>12} {change:>+8.1f}%  {verdict}')
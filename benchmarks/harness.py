@@ -0,0 +1,71 @@
+# benchmarks/harness.py - Shared helpers: latency summaries, peak RSS and run metadata
+import math
+import platform
+import subprocess
+import sys
+import time
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms, errors=0):
+    """count, errors and mean/p50/p95/p99/max latency in ms"""
+    values = sorted(latencies_ms)
+    summary = {'count': len(values), 'errors': errors}
+    if values:
+        summary.update({
+            'mean_ms': round(sum(values) / len(values), 3),
+            'p50_ms': round(percentile(values, 0.50), 3),
+            'p95_ms': round(percentile(values, 0.95), 3),
+            'p99_ms': round(percentile(values, 0.99), 3),
+            'max_ms': round(values[-1], 3),
+        })
+    return summary
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where resource isn't available)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metadata(**parameters):
+    """What produced a result, so two JSON files can be compared fairly"""
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parameters': parameters,
+    }
+
+
+class Timer:
+    """Context manager recording elapsed milliseconds"""
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.started) * 1000
+        return False
@@ -0,0 +1,7 @@
+# Celery worker entry point for background analysis jobs
+# Usage: celery -A celery_worker.celery worker --loglevel=info
+import os
+from app import create_app
+
+app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+celery = app.extensions['task_queue'].make_celery()
@@ -8,17 +8,91 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///job_optimizer.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Database connection pool (any database) and SQLite tuning
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 20)
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT') or 30)  # seconds to wait for a free connection
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', 'true').lower() == 'true'
+    SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT') or 30)  # seconds a writer waits for the lock
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'  # OFF, NORMAL, FULL, EXTRA
+    
     # OpenAI Configuration
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+    ANALYSIS_MODE = os.environ.get('ANALYSIS_MODE') or 'llm'  # llm, or local for offline keyword extraction only
+    
+    # LLM Response Cache
+    LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH') or 'instance/llm_cache.db'
+    LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL') or 7 * 24 * 3600)  # seconds
+    LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES') or 5000)
+    
+    # LLM Providers: openai (or any OpenAI-compatible server via LLM_BASE_URL), llama_cpp, fake.
+    # LLM_ANALYSIS_* / LLM_INSIGHTS_* (PROVIDER, MODEL, BASE_URL, MODEL_PATH) route one task elsewhere
+    LLM_PROVIDER = os.environ.get('LLM_PROVIDER') or 'openai'
+    LLM_MODEL = os.environ.get('LLM_MODEL') or 'gpt-3.5-turbo'
+    LLM_BASE_URL = os.environ.get('LLM_BASE_URL')
+    LLM_MODEL_PATH = os.environ.get('LLM_MODEL_PATH')  # GGUF file for llama_cpp
+    LLM_ANALYSIS_PROVIDER = os.environ.get('LLM_ANALYSIS_PROVIDER')
+    LLM_ANALYSIS_MODEL = os.environ.get('LLM_ANALYSIS_MODEL')
+    LLM_ANALYSIS_BASE_URL = os.environ.get('LLM_ANALYSIS_BASE_URL')
+    LLM_ANALYSIS_MODEL_PATH = os.environ.get('LLM_ANALYSIS_MODEL_PATH')
+    LLM_INSIGHTS_PROVIDER = os.environ.get('LLM_INSIGHTS_PROVIDER')
+    LLM_INSIGHTS_MODEL = os.environ.get('LLM_INSIGHTS_MODEL')
+    LLM_INSIGHTS_BASE_URL = os.environ.get('LLM_INSIGHTS_BASE_URL')
+    LLM_INSIGHTS_MODEL_PATH = os.environ.get('LLM_INSIGHTS_MODEL_PATH')
+    LLM_FAKE_LATENCY = float(os.environ.get('LLM_FAKE_LATENCY') or 0)  # seconds per fake completion
+    LLM_STRUCTURED_OUTPUT = os.environ.get('LLM_STRUCTURED_OUTPUT') or 'json_object'  # json_schema, json_object, off
+    LLM_REASK_MISSING_FIELDS = os.environ.get('LLM_REASK_MISSING_FIELDS', 'true').lower() == 'true'
+    
+    # LLM Request Scheduler (shared by every request in this process)
+    LLM_REQUESTS_PER_MINUTE = int(os.environ.get('LLM_REQUESTS_PER_MINUTE') or 500)
+    LLM_TOKENS_PER_MINUTE = int(os.environ.get('LLM_TOKENS_PER_MINUTE') or 200000)
+    LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY') or 8)
+    LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES') or 5)
+    
+    # Pooled OpenAI HTTP client (one keep-alive pool per process)
+    LLM_POOL_MAX_CONNECTIONS = int(os.environ.get('LLM_POOL_MAX_CONNECTIONS') or 20)
+    LLM_POOL_MAX_KEEPALIVE = int(os.environ.get('LLM_POOL_MAX_KEEPALIVE') or 10)
+    LLM_POOL_KEEPALIVE_EXPIRY = float(os.environ.get('LLM_POOL_KEEPALIVE_EXPIRY') or 30)  # idle seconds
+    LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT') or 60)  # seconds per request
+    LLM_CONNECT_TIMEOUT = float(os.environ.get('LLM_CONNECT_TIMEOUT') or 5)
+    LLM_HTTP2 = os.environ.get('LLM_HTTP2', 'true').lower() == 'true'  # needs the h2 package
+    
+    # Prompt Token Budget (optimization insights)
+    LLM_PROMPT_TOKEN_BUDGET = int(os.environ.get('LLM_PROMPT_TOKEN_BUDGET') or 6000)  # job + resume + cover letter
+    LLM_INSIGHTS_MAX_TOKENS = int(os.environ.get('LLM_INSIGHTS_MAX_TOKENS') or 1500)  # completion
     
     # File Upload Configuration
     UPLOAD_FOLDER = 'static/uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
+    MAX_UPLOAD_FILE_SIZE = int(os.environ.get('MAX_UPLOAD_FILE_SIZE') or MAX_CONTENT_LENGTH)
+    UPLOAD_MEMORY_LIMIT = int(os.environ.get('UPLOAD_MEMORY_LIMIT') or 1024 * 1024)  # larger uploads spill to disk
+    PARSE_POOL_WORKERS = int(os.environ.get('PARSE_POOL_WORKERS') or 3)  # 0 parses inline
+    PARSE_TIMEOUT = float(os.environ.get('PARSE_TIMEOUT') or 30)  # seconds per file
+    PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES') or 50)  # later pages are skipped
+    PDF_TIME_BUDGET = float(os.environ.get('PDF_TIME_BUDGET') or 10)  # seconds of extraction per PDF
     
     # Redis Configuration (for Celery)
     REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
     
+    # Background Task Configuration
+    TASK_QUEUE_BACKEND = os.environ.get('TASK_QUEUE_BACKEND') or 'auto'  # auto, celery, thread, sync
+    TASK_QUEUE_WORKERS = int(os.environ.get('TASK_QUEUE_WORKERS') or 4)
+    ANALYSIS_STALE_AFTER = float(os.environ.get('ANALYSIS_STALE_AFTER') or 900)  # seconds before a stuck run can be re-queued
+    BULK_MAX_WORKERS = int(os.environ.get('BULK_MAX_WORKERS') or 8)  # concurrent insight requests per bulk run
+    BULK_MAX_CANDIDATES = int(os.environ.get('BULK_MAX_CANDIDATES') or 500)
+    SSE_POLL_INTERVAL = float(os.environ.get('SSE_POLL_INTERVAL') or 2.0)  # keep-alive / status re-check, seconds
+    
+    # Instrumentation (per-stage timings at /metrics; off costs ~nothing)
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'false').lower() == 'true'
+    
+    # Request Profiling (cProfile dumps in TEMP_FOLDER/profiles; both off by default)
+    # Profiles every request to keep the slow ones - all traffic pays cProfile's overhead while set
+    PROFILE_SLOW_REQUEST_SECONDS = float(os.environ.get('PROFILE_SLOW_REQUEST_SECONDS') or 0)  # 0 turns it off
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE') or 0)  # fraction of requests, e.g. 0.01
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES') or 50)  # oldest profiles are deleted
+    
     # Application Settings
     PROCESSED_FOLDER = 'static/processed'
     TEMP_FOLDER = 'static/temp'
@@ -1,24 +1,198 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
+import json
 import uuid
 
+from modules.document_structure import DocumentStructure
+from modules.text_normalizer import job_description_hash
+
 db = SQLAlchemy()
 
+SQLITE_SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def _is_sqlite_memory(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured database, with pool defaults filled in
+    
+    Every request thread and background worker checks a connection out of one pool
+    (DB_POOL_SIZE kept open, DB_MAX_OVERFLOW more under load). Server databases also
+    get a liveness check on checkout, so connections the server dropped are replaced.
+    An in-memory SQLite database is a single shared connection and is left alone.
+    """
+    
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if _is_sqlite_memory(url):
+        return options
+    
+    options.setdefault('pool_size', config.get('DB_POOL_SIZE', 10))
+    options.setdefault('max_overflow', config.get('DB_MAX_OVERFLOW', 20))
+    options.setdefault('pool_timeout', config.get('DB_POOL_TIMEOUT', 30))
+    if url.get_backend_name() == 'sqlite':
+        # Pooled connections move between request threads
+        options['connect_args'] = {'check_same_thread': False, **options.get('connect_args', {})}
+    else:
+        options.setdefault('pool_pre_ping', True)
+    return options
+
+
+def tune_sqlite(engine, busy_timeout=30.0, synchronous='NORMAL', wal=True):
+    """
+    Set SQLite pragmas on every new connection of engine (no-op for other databases)
+    
+    WAL lets readers carry on while one connection writes, and the busy timeout makes
+    writers queue for the write lock instead of failing with "database is locked".
+    synchronous=NORMAL is durable in WAL mode except for the last commits on power loss.
+    """
+    
+    if engine.dialect.name != 'sqlite':
+        return
+    synchronous = synchronous.upper()
+    if synchronous not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"Unknown SQLite synchronous mode: {synchronous}. "
+                         f"Allowed: {', '.join(SQLITE_SYNCHRONOUS_MODES)}")
+    wal = wal and not _is_sqlite_memory(engine.url)
+    
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if wal:
+            cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout * 1000)}')
+        cursor.execute(f'PRAGMA synchronous={synchronous}')
+        cursor.close()
+
+# Background analysis stages, in the order the pipeline runs them
+ANALYSIS_STAGES = ['analyzing_job', 'generating_insights', 'scoring']
+
+class JobDescription(db.Model):
+    """A job posting stored once per normalized text and analysed once for every session that uses it"""
+    __tablename__ = 'job_descriptions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    text = db.Column(db.Text, nullable=False)  # First submitted copy
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Analysis Results
+    keywords = db.Column(db.Text)      # JSON string
+    requirements = db.Column(db.Text)  # JSON string
+    analysis = db.Column(db.Text)      # JSON string - full analysis payload
+    analyzed_at = db.Column(db.DateTime)  # Only set for real (non-fallback) analyses
+    
+    @classmethod
+    def get_or_create(cls, text):
+        """Return the stored posting with the same normalized text, adding it if new"""
+        
+        content_hash = job_description_hash(text)
+        job_description = cls.query.filter_by(content_hash=content_hash).first()
+        if job_description is not None:
+            return job_description
+        
+        job_description = cls(content_hash=content_hash, text=text)
+        try:
+            with db.session.begin_nested():
+                db.session.add(job_description)
+        except IntegrityError:
+            # Another request stored the same posting first
+            job_description = cls.query.filter_by(content_hash=content_hash).one()
+        return job_description
+    
+    def store_analysis(self, analysis, reusable=True):
+        self.keywords = json.dumps(analysis.get('keywords', {}))
+        self.requirements = json.dumps(analysis.get('requirements', {}))
+        self.analysis = json.dumps(analysis)
+        self.analyzed_at = datetime.utcnow() if reusable else None
+    
+    def get_analysis(self):
+        """Parsed analysis, or None if this posting hasn't been analysed yet"""
+        
+        if self.analyzed_at is None or not self.analysis:
+            return None
+        return json.loads(self.analysis)
+
+class StoredDocument(db.Model):
+    """An uploaded file stored once per content hash, with its cached parse result"""
+    __tablename__ = 'stored_documents'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    path = db.Column(db.String(255), nullable=False)
+    size = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Parse Results
+    text = db.Column(db.Text)
+    structure = db.Column(db.Text)       # JSON string
+    parse_metadata = db.Column(db.Text)  # JSON string
+    parsed_at = db.Column(db.DateTime)
+    
+    @classmethod
+    def get_or_create(cls, content_hash, path, size=None):
+        """Return the stored document for a content hash, adding it if new"""
+        
+        document = cls.query.filter_by(content_hash=content_hash).first()
+        if document is not None:
+            if document.path != path:
+                # Same bytes stored under another extension; keep the newest copy
+                document.path = path
+            return document
+        
+        document = cls(content_hash=content_hash, path=path, size=size)
+        try:
+            with db.session.begin_nested():
+                db.session.add(document)
+        except IntegrityError:
+            # Another request stored the same file first
+            document = cls.query.filter_by(content_hash=content_hash).one()
+        return document
+    
+    def store_parse(self, parsed):
+        self.text = parsed['text']
+        structure = parsed.get('structure') or {}
+        if isinstance(structure, DocumentStructure):
+            structure = structure.to_dict()
+        self.structure = json.dumps(structure)
+        self.parse_metadata = json.dumps(parsed.get('metadata', {}))
+        self.parsed_at = datetime.utcnow()
+    
+    def get_parse(self):
+        """Cached result in DocumentParser.parse_document format, or None if not parsed yet"""
+        
+        if self.parsed_at is None:
+            return None
+        return {
+            'success': True,
+            'text': self.text,
+            'structure': DocumentStructure.from_dict(json.loads(self.structure or '{}')),
+            'metadata': json.loads(self.parse_metadata or '{}'),
+            'cached': True
+        }
+
 class ProcessingSession(db.Model):
     __tablename__ = 'processing_sessions'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    status = db.Column(db.String(20), default='uploaded')  # uploaded, processing, completed, failed
+    status = db.Column(db.String(20), default='uploaded')  # uploaded, queued, <ANALYSIS_STAGES>, completed, failed
+    stage_states = db.Column(db.Text)  # JSON string: stage -> pending/running/done/failed
+    error_message = db.Column(db.Text)
     
     # Original Documents
-    job_description = db.Column(db.Text)
+    job_description_id = db.Column(db.Integer, db.ForeignKey('job_descriptions.id'), index=True)
     original_resume_path = db.Column(db.String(255))
     original_cover_letter_path = db.Column(db.String(255))
     
     # Extracted Text
-    job_description_text = db.Column(db.Text)
     original_resume_text = db.Column(db.Text)
     original_cover_letter_text = db.Column(db.Text)
     
@@ -26,9 +200,8 @@ class ProcessingSession(db.Model):
     optimized_resume_text = db.Column(db.Text)
     optimized_cover_letter_text = db.Column(db.Text)
     
-    # Analysis Results
-    extracted_keywords = db.Column(db.Text)  # JSON string
-    job_requirements = db.Column(db.Text)   # JSON string
+    # Analysis Results (job-level results live on JobDescription)
+    optimization_insights = db.Column(db.Text)  # JSON string
     
     # Scores
     keyword_match_score = db.Column(db.Float)
@@ -39,11 +212,91 @@ class ProcessingSession(db.Model):
     # Feedback
     detailed_feedback = db.Column(db.Text)
     
+    # Relationship
+    job_description = db.relationship('JobDescription', backref=db.backref('sessions', lazy=True))
+    
+    def __init__(self, **kwargs):
+        # The job-level setters write to the posting, so it's attached first whatever the kwarg order
+        for name in ('job_description', 'job_description_text'):
+            if name in kwargs:
+                setattr(self, name, kwargs.pop(name))
+        super().__init__(**kwargs)
+    
+    # Job-level fields are read through the shared JobDescription row
+    @property
+    def job_description_text(self):
+        return self.job_description.text if self.job_description else None
+    
+    @job_description_text.setter
+    def job_description_text(self, text):
+        # The lookup mustn't flush this session while it's still being built
+        with db.session.no_autoflush:
+            self.job_description = JobDescription.get_or_create(text) if text else None
+    
+    def _require_job_description(self, field):
+        if self.job_description is None:
+            raise ValueError(f"Cannot set {field} on a session without a job description")
+        return self.job_description
+    
+    @property
+    def extracted_keywords(self):
+        return self.job_description.keywords if self.job_description else None
+    
+    @extracted_keywords.setter
+    def extracted_keywords(self, value):
+        self._require_job_description('extracted_keywords').keywords = value
+    
+    @property
+    def job_requirements(self):
+        return self.job_description.requirements if self.job_description else None
+    
+    @job_requirements.setter
+    def job_requirements(self, value):
+        self._require_job_description('job_requirements').requirements = value
+    
+    @property
+    def job_analysis(self):
+        return self.job_description.analysis if self.job_description else None
+    
+    def get_stage_states(self):
+        states = {stage: 'pending' for stage in ANALYSIS_STAGES}
+        if self.stage_states:
+            states.update(json.loads(self.stage_states))
+        return states
+    
+    def set_stage(self, stage, state):
+        """Record the state of one analysis stage and mirror it in status"""
+        states = self.get_stage_states()
+        states[stage] = state
+        self.stage_states = json.dumps(states)
+        
+        if state == 'running':
+            self.status = stage
+        elif state == 'failed':
+            self.status = 'failed'
+    
+    def set_scores(self, scores):
+        self.keyword_match_score = scores['keyword_match']
+        self.ats_compatibility_score = scores['ats_compatibility']
+        self.content_relevance_score = scores['content_relevance']
+        self.overall_score = scores['overall']
+    
+    @property
+    def progress(self):
+        """Percentage of analysis stages finished"""
+        if self.status == 'completed':
+            return 100
+        states = self.get_stage_states()
+        done = sum(1 for stage in ANALYSIS_STAGES if states[stage] == 'done')
+        return int(done * 100 / len(ANALYSIS_STAGES))
+    
     def to_dict(self):
         return {
             'id': self.id,
             'created_at': self.created_at.isoformat(),
             'status': self.status,
+            'stages': self.get_stage_states(),
+            'progress': self.progress,
             'scores': {
                 'keyword_match': self.keyword_match_score,
                 'ats_compatibility': self.ats_compatibility_score,
@@ -77,4 +330,69 @@ class FeedbackHistory(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationship
-    session = db.relationship('ProcessingSession', backref=db.backref('feedback_history', lazy=True))
\ No newline at end of file
+    session = db.relationship('ProcessingSession', backref=db.backref('feedback_history', lazy=True))
+
+
+# Columns added to processing_sessions since the first release (create_all doesn't alter tables)
+_ADDED_SESSION_COLUMNS = {
+    'stage_states': 'TEXT',
+    'error_message': 'TEXT',
+    'job_description_id': 'INTEGER REFERENCES job_descriptions (id)',
+    'optimization_insights': 'TEXT'
+}
+
+# Per-session job description columns that moved to job_descriptions
+_LEGACY_JOB_COLUMNS = ('job_description_text', 'job_description', 'extracted_keywords', 'job_requirements', 'job_analysis')
+
+
+def upgrade_schema():
+    """
+    Bring a database created by an earlier version up to the current models
+    
+    Creates the new tables, adds the new processing_sessions columns and moves each
+    session's job description and its analysis into a shared JobDescription row.
+    The old columns are left in place, unused. Safe to run more than once; returns
+    the number of sessions linked to a JobDescription.
+    """
+    
+    db.create_all()
+    columns = {column['name'] for column in inspect(db.engine).get_columns('processing_sessions')}
+    
+    for column, ddl in _ADDED_SESSION_COLUMNS.items():
+        if column not in columns:
+            db.session.execute(text(f'ALTER TABLE processing_sessions ADD COLUMN {column} {ddl}'))
+    db.session.execute(text('CREATE INDEX IF NOT EXISTS ix_processing_sessions_job_description_id '
+                            'ON processing_sessions (job_description_id)'))
+    
+    legacy = [column for column in _LEGACY_JOB_COLUMNS if column in columns]
+    if 'job_description_text' not in legacy and 'job_description' not in legacy:
+        db.session.commit()
+        return 0
+    
+    rows = db.session.execute(text(
+        f"SELECT id, {', '.join(legacy)} FROM processing_sessions WHERE job_description_id IS NULL"
+    )).mappings().all()
+    
+    moved = 0
+    for row in rows:
+        job_text = row.get('job_description_text') or row.get('job_description')
+        if not job_text:
+            continue
+        
+        job_description = JobDescription.get_or_create(job_text)
+        if job_description.analysis is None and row.get('extracted_keywords'):
+            keywords = json.loads(row['extracted_keywords'])
+            requirements = json.loads(row.get('job_requirements') or '{}')
+            analysis = row.get('job_analysis')
+            job_description.keywords = row['extracted_keywords']
+            job_description.requirements = json.dumps(requirements)
+            # Readable by the session as before, but not reused: it may have been a fallback analysis
+            job_description.analysis = analysis or json.dumps({'keywords': keywords, 'requirements': requirements})
+        db.session.flush()
+        
+        db.session.execute(text('UPDATE processing_sessions SET job_description_id = :job WHERE id = :id'),
+                           {'job': job_description.id, 'id': row['id']})
+        moved += 1
+    
+    db.session.commit()
+    return moved
@@ -1,32 +1,56 @@
 import PyPDF2
 import pdfplumber
-from docx import Document
-import docx2txt
+import codecs
+import io
+import itertools
 import os
-from typing import Dict, Optional, Tuple
+import time
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from modules.document_structure import DocumentStructure
+from modules.docx_reader import DocxReader
+
+# Budgets for untrusted PDFs. They are checked between pages; the parse pool's timeout
+# still bounds a single pathological page.
+PDF_MAX_PAGES = 50
+PDF_TIME_BUDGET = 10.0  # seconds
+PDF_SAMPLE_PAGES = 2  # pages PyPDF2 extracts before deciding whether pdfplumber is needed
 
 class DocumentParser:
     """Handles parsing of PDF, DOCX, and TXT files while preserving structure"""
     
     @staticmethod
-    def parse_document(file_path: str) -> Dict[str, any]:
+    def parse_document(source: Union[str, bytes], file_type: Optional[str] = None,
+                       pdf_max_pages: int = PDF_MAX_PAGES, pdf_time_budget: float = PDF_TIME_BUDGET) -> Dict[str, any]:
         """
         Parse document and extract text with structure information
         
+        Args:
+            source: file path, or the file's bytes (then file_type is required)
+            file_type: 'pdf', 'docx' or 'txt'; taken from the path's extension if omitted
+            pdf_max_pages: PDF pages extracted before the rest are skipped
+            pdf_time_budget: seconds of PDF extraction before the remaining pages are skipped
+        
         Returns:
             Dict containing:
             - text: extracted text content
-            - structure: formatting and structure info
+            - structure: DocumentStructure with line/paragraph/page offsets into text
             - metadata: document metadata
             - success: boolean indicating success
             - error: error message if failed
         """
         
         try:
-            file_extension = os.path.splitext(file_path)[1].lower()
+            if file_type:
+                file_extension = '.' + file_type.lower().lstrip('.')
+            else:
+                file_extension = os.path.splitext(source)[1].lower()
+            
+            # In-memory uploads are parsed without touching the disk
+            file_path = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
             
             if file_extension == '.pdf':
-                return DocumentParser._parse_pdf(file_path)
+                return DocumentParser._parse_pdf(file_path, pdf_max_pages, pdf_time_budget)
             elif file_extension == '.docx':
                 return DocumentParser._parse_docx(file_path)
             elif file_extension == '.txt':
@@ -44,108 +68,157 @@ class DocumentParser:
             }
     
     @staticmethod
-    def _parse_pdf(file_path: str) -> Dict[str, any]:
-        """Parse PDF file using pdfplumber for better text extraction"""
+    def _parse_pdf(file_path, max_pages: int = PDF_MAX_PAGES, time_budget: float = PDF_TIME_BUDGET) -> Dict[str, any]:
+        """
+        Parse PDF page by page within page and time budgets
+        
+        PyPDF2 is used by default as it is several times cheaper; pdfplumber only when
+        the first pages look layout-heavy (columns, tables, positioned text) and
+        PyPDF2's text comes out fragmented or empty.
+        """
+        
+        started = time.monotonic()
         
         try:
-            text_content = []
-            structure_info = {
-                'pages': [],
-                'fonts': set(),
-                'formatting': []
-            }
-            
-            with pdfplumber.open(file_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_content.append(page_text)
-                        
-                        # Extract structure information
-                        page_info = {
-                            'page_number': page_num,
-                            'text_length': len(page_text),
-                            'lines': page_text.split('\n')
-                        }
-                        structure_info['pages'].append(page_info)
-            
+            if not isinstance(file_path, str):
+                file_path.seek(0)
+            reader = PyPDF2.PdfReader(file_path)
+            total_pages = len(reader.pages)
+            pages = DocumentParser._iter_pypdf2_pages(reader)
+            sample = list(itertools.islice(pages, PDF_SAMPLE_PAGES))
+            engine = 'pypdf2'
+        except Exception:
+            # PyPDF2 couldn't read it; pdfplumber is more tolerant of broken files
+            reader, total_pages, sample = None, None, []
+        
+        if reader is None or DocumentParser._is_layout_heavy(sample):
+            pages = DocumentParser._iter_pdfplumber_pages(file_path)
+            sample = []
+            engine = 'pdfplumber'
+        
+        text_content = []
+        page_spans = []
+        offset = 0
+        truncated_reason = None
+        page_num = 0
+        
+        try:
+            for page_num, page_text in enumerate(itertools.chain(sample, pages), 1):
+                if page_text:
+                    text_content.append(page_text)
+                    page_spans.append((offset, offset + len(page_text)))
+                    offset += len(page_text) + 2  # joined with a blank line
+                
+                if total_pages is not None and page_num >= total_pages:
+                    break
+                if page_num >= max_pages:
+                    truncated_reason = 'max_pages'
+                    break
+                if time.monotonic() - started > time_budget:
+                    truncated_reason = 'time_budget'
+                    break
+        except Exception as e:
             return {
-                'success': True,
-                'text': '\n\n'.join(text_content),
-                'structure': structure_info,
-                'metadata': {
-                    'total_pages': len(structure_info['pages']),
-                    'file_type': 'pdf'
-                }
+                'success': False,
+                'error': f'Failed to parse PDF: {str(e)}'
             }
-            
-        except Exception as e:
-            # Fallback to PyPDF2 if pdfplumber fails
-            try:
-                return DocumentParser._parse_pdf_fallback(file_path)
-            except:
-                return {
-                    'success': False,
-                    'error': f'Failed to parse PDF: {str(e)}'
-                }
-    
-    @staticmethod
-    def _parse_pdf_fallback(file_path: str) -> Dict[str, any]:
-        """Fallback PDF parsing using PyPDF2"""
+        finally:
+            # Closes the pdfplumber document if we stopped early
+            pages.close()
         
-        text_content = []
+        text = '\n\n'.join(text_content)
         
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            for page in pdf_reader.pages:
-                text_content.append(page.extract_text())
+        # Pages are separated by blank lines, so they aren't paragraph boundaries
+        structure = DocumentStructure.from_text(text, paragraphs=False)
+        for start, end in page_spans:
+            structure.add_page(start, end)
         
         return {
             'success': True,
-            'text': '\n\n'.join(text_content),
-            'structure': {'pages': len(pdf_reader.pages)},
-            'metadata': {'total_pages': len(pdf_reader.pages), 'file_type': 'pdf'}
+            'text': text,
+            'structure': structure,
+            'metadata': {
+                'total_pages': total_pages if total_pages is not None else page_num,
+                'parsed_pages': page_num,
+                'truncated': truncated_reason is not None,
+                'truncated_reason': truncated_reason,
+                'engine': engine,
+                'file_type': 'pdf'
+            }
         }
     
     @staticmethod
-    def _parse_docx(file_path: str) -> Dict[str, any]:
-        """Parse DOCX file preserving structure"""
+    def _iter_pypdf2_pages(reader) -> Iterator[str]:
+        for page in reader.pages:
+            yield page.extract_text() or ''
+    
+    @staticmethod
+    def _iter_pdfplumber_pages(file_path) -> Iterator[str]:
+        if not isinstance(file_path, str):
+            file_path.seek(0)
+        with pdfplumber.open(file_path) as pdf:
+            for page in pdf.pages:
+                page_text = page.extract_text() or ''
+                # Drop the page's parsed layout objects before moving on
+                page.close()
+                yield page_text
+    
+    @staticmethod
+    def _is_layout_heavy(sample: List[str]) -> bool:
+        """Whether PyPDF2's text for the first pages suggests a layout pdfplumber handles better"""
+        
+        if not sample:
+            return False
+        
+        text = '\n'.join(sample)
+        if len(text.strip()) < 50 * len(sample):
+            # Little or no text - PyPDF2 may have missed text positioned glyph by glyph
+            return True
+        
+        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        if sum(1 for line in lines if len(line) <= 3) > 0.3 * len(lines):
+            # Tables and positioned text come out as fragments
+            return True
+        
+        words = text.split()
+        if sum(len(word) for word in words) > 12 * len(words):
+            # Multi-column layouts come out with words run together
+            return True
+        
+        return False
+    
+    @staticmethod
+    def _parse_docx(file_path) -> Dict[str, any]:
+        """Parse DOCX file preserving structure, reading the archive once"""
         
         try:
-            # Extract text with python-docx for structure
-            doc = Document(file_path)
+            if not isinstance(file_path, str):
+                file_path.seek(0)
             
-            paragraphs = []
-            structure_info = {
-                'paragraphs': [],
-                'styles': set(),
-                'headers': [],
-                'formatting': []
-            }
+            lines = []
+            spans = []
+            offset = 0
+            body_paragraphs = 0
+            
+            for paragraph in DocxReader(file_path).paragraphs():
+                lines.append(paragraph.text)
+                if paragraph.text.strip():
+                    spans.append((offset, offset + len(paragraph.text), paragraph.style))
+                    body_paragraphs += paragraph.part == 'body'
+                offset += len(paragraph.text) + 1
             
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    paragraphs.append(para.text)
-                    
-                    # Store structure information
-                    para_info = {
-                        'text': para.text,
-                        'style': para.style.name if para.style else 'Normal',
-                        'alignment': str(para.alignment) if para.alignment else None
-                    }
-                    structure_info['paragraphs'].append(para_info)
-                    structure_info['styles'].add(para.style.name if para.style else 'Normal')
+            text = '\n'.join(lines)
             
-            # Also get simple text extraction as backup
-            simple_text = docx2txt.process(file_path)
+            structure = DocumentStructure.from_text(text, paragraphs=False)
+            for start, end, style in spans:
+                structure.add_paragraph(start, end, style or 'Normal')
             
             return {
                 'success': True,
-                'text': simple_text if simple_text.strip() else '\n'.join(paragraphs),
-                'structure': structure_info,
+                'text': text,
+                'structure': structure,
                 'metadata': {
-                    'total_paragraphs': len(paragraphs),
+                    'total_paragraphs': body_paragraphs,
                     'file_type': 'docx'
                 }
             }
@@ -156,25 +229,38 @@ class DocumentParser:
                 'error': f'Failed to parse DOCX: {str(e)}'
             }
     
+    @staticmethod
+    def _text_encoding(head: bytes) -> str:
+        """utf-16 / utf-32 for text starting with their byte order mark, utf-8 otherwise"""
+        
+        if head.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+            return 'utf-32'
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return 'utf-16'
+        return 'utf-8'
+    
     @staticmethod
     def _parse_txt(file_path: str) -> Dict[str, any]:
         """Parse plain text file"""
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
+            if isinstance(file_path, str):
+                with open(file_path, 'rb') as file:
+                    encoding = DocumentParser._text_encoding(file.read(4))
+                with open(file_path, 'r', encoding=encoding) as file:
+                    content = file.read()
+            else:
+                data = file_path.getvalue()
+                content = data.decode(DocumentParser._text_encoding(data))
             
-            lines = content.split('\n')
+            structure = DocumentStructure.from_text(content)
             
             return {
                 'success': True,
                 'text': content,
-                'structure': {
-                    'lines': lines,
-                    'total_lines': len(lines)
-                },
+                'structure': structure,
                 'metadata': {
-                    'total_lines': len(lines),
+                    'total_lines': content.count('\n') + 1,
                     'file_type': 'txt'
                 }
             }
@@ -182,13 +268,16 @@ class DocumentParser:
         except UnicodeDecodeError:
             # Try different encoding
             try:
-                with open(file_path, 'r', encoding='latin-1') as file:
-                    content = file.read()
+                if isinstance(file_path, str):
+                    with open(file_path, 'r', encoding='latin-1') as file:
+                        content = file.read()
+                else:
+                    content = file_path.getvalue().decode('latin-1')
                 
                 return {
                     'success': True,
                     'text': content,
-                    'structure': {'lines': content.split('\n')},
+                    'structure': DocumentStructure.from_text(content),
                     'metadata': {'file_type': 'txt', 'encoding': 'latin-1'}
                 }
             except Exception as e:
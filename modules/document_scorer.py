@@ -0,0 +1,187 @@
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from modules.keyword_matcher import KeywordMatcher
+
+PRIORITY_WEIGHTS = {'high_priority': 3.0, 'medium_priority': 2.0, 'low_priority': 1.0}
+SKILL_WEIGHT = 2.0
+
+RESUME_SECTIONS = {
+    'experience': re.compile(r'^(?:professional |work )?(?:experience|employment(?: history)?|work history)\b', re.I),
+    'education': re.compile(r'^(?:education|academic background|qualifications)\b', re.I),
+    'skills': re.compile(r'^(?:(?:technical |core |key )?skills|competencies|technologies)\b', re.I),
+    'summary': re.compile(r'^(?:summary|profile|objective|about me|professional summary)\b', re.I),
+}
+_GREETING_RE = re.compile(r'^(?:dear|hello|hi|to whom it may concern)\b', re.I)
+_CLOSING_RE = re.compile(r'^(?:sincerely|best regards|kind regards|regards|yours (?:truly|faithfully|sincerely)|thank you)\b', re.I)
+_BULLET_RE = re.compile(r'^\s*(?:[-*•▪●◦]|\d+[.)])\s+')
+_EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.]+')
+_PHONE_RE = re.compile(r'(?:\+?\d[\d\s().-]{7,}\d)')
+_QUANTIFIED_RE = re.compile(r'\d+\s*(?:%|percent|\+|k\b|x\b)|\$\s*\d', re.I)
+_ATS_HOSTILE_RE = re.compile(r'[|\t│┃─═■□★☆✓✔➤►▶◆◇]')
+
+
+class LineStats:
+    """Everything the scores need from one line of a document"""
+
+    __slots__ = ('words', 'keyword_counts', 'section', 'greeting', 'closing', 'bullet',
+                 'contact', 'quantified', 'hostile_chars', 'chars')
+
+    def __init__(self, line: str, matcher: KeywordMatcher):
+        stripped = line.strip()
+        self.words = len(stripped.split())
+        self.chars = len(stripped)
+        self.keyword_counts = Counter(keyword for _, _, keyword in matcher.find_all(line)) if stripped else Counter()
+
+        # Section headers are short lines
+        self.section = None
+        if 0 < self.words <= 4:
+            header = stripped.rstrip(':').strip()
+            for section, pattern in RESUME_SECTIONS.items():
+                if pattern.match(header):
+                    self.section = section
+                    break
+
+        self.greeting = bool(_GREETING_RE.match(stripped))
+        self.closing = bool(_CLOSING_RE.match(stripped))
+        self.bullet = bool(_BULLET_RE.match(line))
+        self.contact = bool(_EMAIL_RE.search(line) or _PHONE_RE.search(line))
+        self.quantified = bool(_QUANTIFIED_RE.search(line))
+        self.hostile_chars = len(_ATS_HOSTILE_RE.findall(line))
+
+
+class DocumentScorer:
+    """
+    Local keyword match, ATS compatibility and content relevance scores (0-10)
+
+    Per-line statistics are memoized by line content, so re-scoring after an edit
+    only analyses the lines that changed; the rest is a cheap aggregation.
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]], requirements: Optional[Dict] = None, cache_size: int = 20000):
+        self.weights: Dict[str, float] = {}
+        for priority, weight in PRIORITY_WEIGHTS.items():
+            for keyword in keywords.get(priority, []) or []:
+                self.weights.setdefault(keyword.lower(), weight)
+
+        self.skills = [skill.lower() for skill in (requirements or {}).get('technical_skills', []) or []]
+        for skill in self.skills:
+            self.weights.setdefault(skill, SKILL_WEIGHT)
+
+        self.matcher = KeywordMatcher.for_keywords(sorted(self.weights))
+        self.cache_size = cache_size
+        self._lines: 'OrderedDict[str, LineStats]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _line_stats(self, line: str) -> LineStats:
+        with self._lock:
+            stats = self._lines.get(line)
+            if stats is not None:
+                self._lines.move_to_end(line)
+                return stats
+
+        stats = LineStats(line, self.matcher)
+
+        with self._lock:
+            self._lines[line] = stats
+            if len(self._lines) > self.cache_size:
+                self._lines.popitem(last=False)
+        return stats
+
+    def score(self, text: str, document_type: str = 'resume') -> Dict[str, float]:
+        """Score one document; unchanged lines are served from the line cache"""
+
+        lines = [self._line_stats(line) for line in (text or '').split('\n')]
+
+        keyword_counts = Counter()
+        words = chars = hostile = bullets = quantified = 0
+        content_lines = relevant_lines = 0
+        sections = set()
+        greeting = closing = contact = False
+
+        for stats in lines:
+            keyword_counts.update(stats.keyword_counts)
+            words += stats.words
+            chars += stats.chars
+            hostile += stats.hostile_chars
+            bullets += stats.bullet
+            quantified += stats.quantified
+            greeting = greeting or stats.greeting
+            closing = closing or stats.closing
+            contact = contact or stats.contact
+            if stats.section:
+                sections.add(stats.section)
+            if stats.words >= 5:
+                content_lines += 1
+                relevant_lines += bool(stats.keyword_counts)
+
+        keyword_match = self._keyword_match(keyword_counts)
+        relevance = self._content_relevance(keyword_counts, relevant_lines, content_lines)
+
+        if document_type == 'cover_letter':
+            ats = self._cover_letter_ats(words, greeting, closing, hostile, chars, keyword_counts)
+        else:
+            ats = self._resume_ats(words, sections, contact, bullets, quantified, hostile, chars, keyword_counts)
+
+        return {
+            'keyword_match': round(keyword_match, 1),
+            'ats_compatibility': round(ats, 1),
+            'content_relevance': round(relevance, 1),
+            'overall': round((keyword_match + ats + relevance) / 3, 1)
+        }
+
+    def score_session(self, resume_text: str, cover_letter_text: str) -> Dict[str, float]:
+        """Combined application score - the resume carries most of the ATS and keyword weight"""
+
+        resume = self.score(resume_text, 'resume')
+        cover = self.score(cover_letter_text, 'cover_letter')
+
+        combined = {
+            'keyword_match': 0.7 * resume['keyword_match'] + 0.3 * cover['keyword_match'],
+            'ats_compatibility': 0.8 * resume['ats_compatibility'] + 0.2 * cover['ats_compatibility'],
+            'content_relevance': 0.5 * resume['content_relevance'] + 0.5 * cover['content_relevance'],
+        }
+        combined['overall'] = sum(combined.values()) / 3
+        return {name: round(value, 1) for name, value in combined.items()}
+
+    def _keyword_match(self, keyword_counts: Counter) -> float:
+        total = sum(self.weights.values())
+        if not total:
+            return 0.0
+        matched = sum(weight for keyword, weight in self.weights.items() if keyword_counts.get(keyword))
+        return 10 * matched / total
+
+    def _content_relevance(self, keyword_counts: Counter, relevant_lines: int, content_lines: int) -> float:
+        line_ratio = relevant_lines / content_lines if content_lines else 0.0
+        if self.skills:
+            skill_coverage = sum(1 for skill in self.skills if keyword_counts.get(skill)) / len(self.skills)
+        else:
+            skill_coverage = line_ratio
+        return 10 * (0.6 * line_ratio + 0.4 * skill_coverage)
+
+    @staticmethod
+    def _stuffing_penalty(keyword_counts: Counter, words: int) -> float:
+        density = sum(keyword_counts.values()) / words if words else 0.0
+        return 1.5 if density > 0.15 else 0.0
+
+    def _resume_ats(self, words, sections, contact, bullets, quantified, hostile, chars, keyword_counts) -> float:
+        score = 10.0
+        score -= 1.5 * len({'experience', 'education', 'skills'} - sections)
+        score -= 0 if contact else 1.0
+        score -= 0 if bullets else 0.5
+        score -= 0 if quantified else 0.5
+        score -= 1.5 if chars and hostile / chars > 0.01 else 0.0
+        score -= 1.5 if words < 150 else 1.0 if words > 1200 else 0.0
+        score -= self._stuffing_penalty(keyword_counts, words)
+        return max(0.0, min(10.0, score))
+
+    def _cover_letter_ats(self, words, greeting, closing, hostile, chars, keyword_counts) -> float:
+        score = 10.0
+        score -= 0 if greeting else 1.0
+        score -= 0 if closing else 1.0
+        score -= 1.5 if chars and hostile / chars > 0.01 else 0.0
+        score -= 1.5 if words < 100 else 1.0 if words > 600 else 0.0
+        score -= self._stuffing_penalty(keyword_counts, words)
+        return max(0.0, min(10.0, score))
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, NamedTuple
+
+from modules.upload_ingest import IngestBuffer
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StoredFile(NamedTuple):
+    content_hash: str
+    path: str
+    size: int
+    created: bool  # False when an identical file was already stored
+
+
+class DocumentStore:
+    """
+    Content-addressed storage for uploads
+
+    Files are stored once under the SHA-256 of their bytes, so re-uploading the same
+    resume reuses the existing copy instead of writing another one.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, content_hash: str, extension: str) -> str:
+        return os.path.join(self.root, f'{content_hash}{extension.lower()}')
+
+    @staticmethod
+    def hash_stream(stream: BinaryIO) -> str:
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def save(self, stream: BinaryIO, filename: str) -> StoredFile:
+        """Store an upload stream unless identical content is already stored"""
+
+        if isinstance(stream, IngestBuffer):
+            return self._save_ingested(stream, filename)
+
+        content_hash = self.hash_stream(stream)
+        size = stream.tell()
+        path = self.path_for(content_hash, os.path.splitext(filename)[1])
+
+        if os.path.exists(path):
+            return StoredFile(content_hash, path, size, False)
+
+        stream.seek(0)
+        os.makedirs(self.root, exist_ok=True)
+
+        # Write to a temporary name first so concurrent identical uploads never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    out.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        return StoredFile(content_hash, path, size, True)
+
+    def _save_ingested(self, buffer: IngestBuffer, filename: str) -> StoredFile:
+        """Store an upload that was already hashed while the request body was read"""
+
+        path = self.path_for(buffer.content_hash, os.path.splitext(filename)[1])
+
+        if os.path.exists(path):
+            return StoredFile(buffer.content_hash, path, buffer.size, False)
+
+        os.makedirs(self.root, exist_ok=True)
+        if buffer.in_memory:
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    out.write(buffer.getvalue())
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        else:
+            # Large uploads were spilled into the upload folder already - just rename
+            os.replace(buffer.detach_spill(), path)
+
+        return StoredFile(buffer.content_hash, path, buffer.size, True)
@@ -0,0 +1,87 @@
+import re
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_LINE_RE = re.compile(r'[^\n]+')
+_PARAGRAPH_RE = re.compile(r'\S(?:.*?\S)?(?=\n\s*\n|\s*\Z)', re.DOTALL)
+
+SPAN_KINDS = ('lines', 'paragraphs', 'pages')
+
+
+class DocumentStructure:
+    """
+    Layout of a parsed document as character offsets into its text
+
+    Lines, paragraphs and pages are flat arrays of start/end offsets, so the structure
+    costs a few bytes per element instead of a second copy of the text. Paragraph
+    styles are indexes into a shared list of style names.
+    """
+
+    __slots__ = ('lines', 'paragraphs', 'pages', 'styles', 'paragraph_styles')
+
+    def __init__(self):
+        self.lines = array('I')
+        self.paragraphs = array('I')
+        self.pages = array('I')
+        self.styles: List[str] = []
+        self.paragraph_styles = array('H')
+
+    @classmethod
+    def from_text(cls, text: str, paragraphs: bool = True) -> 'DocumentStructure':
+        """Structure with the text's non-empty lines and (optionally) blank-line separated paragraphs"""
+
+        structure = cls()
+        for match in _LINE_RE.finditer(text):
+            structure.lines.extend(match.span())
+        if paragraphs:
+            for match in _PARAGRAPH_RE.finditer(text):
+                structure.paragraphs.extend(match.span())
+        return structure
+
+    def add_page(self, start: int, end: int) -> None:
+        self.pages.extend((start, end))
+
+    def add_paragraph(self, start: int, end: int, style: Optional[str] = None) -> None:
+        self.paragraphs.extend((start, end))
+        if style is not None:
+            if style not in self.styles:
+                self.styles.append(style)
+            # Pad paragraphs added without a style so indexes stay aligned
+            while len(self.paragraph_styles) < len(self.paragraphs) // 2 - 1:
+                self.paragraph_styles.append(0xFFFF)
+            self.paragraph_styles.append(self.styles.index(style))
+
+    def spans(self, kind: str) -> Iterator[Tuple[int, int]]:
+        """(start, end) offsets of every line, paragraph or page"""
+
+        offsets = getattr(self, kind)
+        return zip(offsets[::2], offsets[1::2])
+
+    def texts(self, text: str, kind: str) -> List[str]:
+        return [text[start:end] for start, end in self.spans(kind)]
+
+    def paragraph_style(self, index: int) -> Optional[str]:
+        if index >= len(self.paragraph_styles) or self.paragraph_styles[index] == 0xFFFF:
+            return None
+        return self.styles[self.paragraph_styles[index]]
+
+    def to_dict(self) -> Dict[str, list]:
+        """JSON-serialisable form, omitting empty parts"""
+
+        data = {kind: getattr(self, kind).tolist() for kind in SPAN_KINDS if getattr(self, kind)}
+        if self.styles:
+            data['styles'] = list(self.styles)
+            data['paragraph_styles'] = self.paragraph_styles.tolist()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, list]) -> 'DocumentStructure':
+        structure = cls()
+        for kind in SPAN_KINDS:
+            getattr(structure, kind).extend(data.get(kind, ()))
+        structure.styles = list(data.get('styles', ()))
+        structure.paragraph_styles.extend(data.get('paragraph_styles', ()))
+        return structure
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DocumentStructure) and self.to_dict() == other.to_dict()
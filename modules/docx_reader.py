@@ -0,0 +1,99 @@
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import IO, Dict, Iterator, List, NamedTuple, Optional, Union
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+_P, _T, _TAB, _BR, _CR, _PSTYLE = (W + tag for tag in ('p', 't', 'tab', 'br', 'cr', 'pStyle'))
+_HEADER_RE = re.compile(r'word/header\d*\.xml$')
+_FOOTER_RE = re.compile(r'word/footer\d*\.xml$')
+
+# Word stores these built-in style names in lower case; python-docx shows them capitalised
+_BUILTIN_STYLE_RE = re.compile(r'^(?:caption|footer|header|heading \d)$')
+
+
+class DocxParagraph(NamedTuple):
+    text: str
+    style: Optional[str]
+    part: str  # 'header', 'body' or 'footer'
+
+
+class DocxReader:
+    """
+    Single-pass DOCX reader
+
+    Streams the document's XML parts straight from the zip with an incremental parser
+    and yields paragraphs with their style names, instead of loading the whole
+    document with python-docx and unzipping it again with docx2txt.
+    """
+
+    def __init__(self, source: Union[str, IO[bytes]]):
+        self.source = source
+
+    def paragraphs(self) -> Iterator[DocxParagraph]:
+        """Header, body and footer paragraphs in document order (docx2txt's order)"""
+
+        with zipfile.ZipFile(self.source) as archive:
+            names = archive.namelist()
+            styles = self._read_styles(archive) if 'word/styles.xml' in names else {}
+            default_style = styles.get(None)
+
+            parts = [(name, 'header') for name in names if _HEADER_RE.match(name)]
+            parts.append(('word/document.xml', 'body'))
+            parts += [(name, 'footer') for name in names if _FOOTER_RE.match(name)]
+
+            for name, part in parts:
+                with archive.open(name) as xml:
+                    for text, style_id in self._iter_part(xml):
+                        style = styles.get(style_id, style_id) if style_id else default_style
+                        yield DocxParagraph(text, style, part)
+
+    @staticmethod
+    def _iter_part(xml: IO[bytes]) -> Iterator[tuple]:
+        """(text, style id) for every paragraph; text boxes inside a paragraph become their own paragraphs"""
+
+        stack: List[list] = []  # [text fragments, style id] per open paragraph
+
+        for event, element in ET.iterparse(xml, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                if tag == _P:
+                    stack.append([[], None])
+                continue
+
+            if not stack:
+                continue
+            if tag == _T:
+                stack[-1][0].append(element.text or '')
+            elif tag == _TAB:
+                stack[-1][0].append('\t')
+            elif tag == _BR or tag == _CR:
+                stack[-1][0].append('\n')
+            elif tag == _PSTYLE:
+                stack[-1][1] = element.get(W + 'val')
+            elif tag == _P:
+                fragments, style_id = stack.pop()
+                # Free the finished paragraph's subtree as we go
+                element.clear()
+                yield ''.join(fragments), style_id
+
+    @staticmethod
+    def _read_styles(archive: zipfile.ZipFile) -> Dict[Optional[str], str]:
+        """styleId -> display name for paragraph styles; None maps to the default paragraph style"""
+
+        styles: Dict[Optional[str], str] = {}
+        root = ET.fromstring(archive.read('word/styles.xml'))
+
+        for style in root.iter(W + 'style'):
+            if style.get(W + 'type') != 'paragraph':
+                continue
+            name_element = style.find(W + 'name')
+            name = name_element.get(W + 'val') if name_element is not None else style.get(W + 'styleId')
+            if _BUILTIN_STYLE_RE.match(name):
+                name = name[0].upper() + name[1:]
+            styles[style.get(W + 'styleId')] = name
+            if style.get(W + 'default') in ('1', 'true', 'on'):
+                styles[None] = name
+
+        return styles
@@ -0,0 +1,257 @@
+import contextvars
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Key timed_result adds to a parse result; popped again before the result is stored
+ELAPSED_KEY = 'elapsed_seconds'
+
+# Spans finished while a trace is active are also appended to it (see Instrumentation.trace)
+_current_trace = contextvars.ContextVar('instrumentation_trace', default=None)
+
+
+def timed_result(func, *args, **kwargs) -> Dict:
+    """
+    Call func and add its wall time to the returned dict under ELAPSED_KEY
+
+    Module-level so it pickles: work sent to a worker process times itself there.
+    """
+
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    result[ELAPSED_KEY] = time.perf_counter() - started
+    return result
+
+
+class _NullSpan:
+    """What span() returns while instrumentation is off - does nothing, costs nothing"""
+
+    __slots__ = ()
+    recording = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def annotate(self, **attributes) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Times one stage; annotate() attaches extra values (e.g. token counts) to its trace entry"""
+
+    __slots__ = ('instrumentation', 'stage', 'labels', 'attributes', 'started')
+    recording = True
+
+    def __init__(self, instrumentation: 'Instrumentation', stage: str, labels: Dict[str, str]):
+        self.instrumentation = instrumentation
+        self.stage = stage
+        self.labels = labels
+        self.attributes = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.annotate(error=exc_type.__name__)
+        self.instrumentation.observe(self.stage, time.perf_counter() - self.started,
+                                     attributes=self.attributes, **self.labels)
+        return False
+
+    def annotate(self, **attributes) -> None:
+        if self.attributes is None:
+            self.attributes = {}
+        self.attributes.update(attributes)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+def _le(bound: float) -> str:
+    return f'le="{_format_value(float(bound))}"'
+
+
+class Instrumentation:
+    """
+    Per-stage timings of the request hot path, kept as latency histograms
+
+    Stages are timed with `with instrumentation.span('parse', file_type='pdf'):`
+    and counters (e.g. LLM tokens) bumped with count(). While disabled, span()
+    returns a shared no-op object and observe()/count() return at once, so the
+    hooks left in the hot path cost one attribute check.
+
+    trace(key) additionally collects every span finished inside it - including on
+    threads started through run_concurrently - and keeps the last `max_traces`
+    collections for get_trace(key), e.g. the timings of one analysis session.
+    """
+
+    def __init__(self, enabled: bool = False, buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 namespace: str = 'job_optimizer', max_traces: int = 256):
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self.namespace = namespace
+        self.max_traces = max_traces
+        self._lock = threading.Lock()
+        # (stage, labels) -> [count, sum, per-bucket counts]
+        self._histograms: Dict[Tuple, List] = {}
+        # (name, labels) -> value
+        self._counters: Dict[Tuple, float] = {}
+        self._traces: 'OrderedDict[str, List[Dict]]' = OrderedDict()
+
+    def span(self, stage: str, **labels):
+        """Context manager timing one stage"""
+
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, stage, labels)
+
+    def observe(self, stage: str, seconds: float, attributes: Optional[Dict] = None, **labels) -> None:
+        """Record a stage duration measured elsewhere (e.g. in a worker process)"""
+
+        if not self.enabled:
+            return
+
+        key = (stage, tuple(sorted((name, str(value)) for name, value in labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0, 0.0, [0] * len(self.buckets)]
+            histogram[0] += 1
+            histogram[1] += seconds
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[2][index] += 1
+                    break
+
+        trace = _current_trace.get()
+        if trace is not None:
+            entry = {'stage': stage, 'ms': round(seconds * 1000, 3), **labels}
+            if attributes:
+                entry.update(attributes)
+            trace.append(entry)
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        """Add to a monotonically increasing counter"""
+
+        if not self.enabled:
+            return
+
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def trace(self, key: Optional[str] = None) -> 'Trace':
+        """Collect the spans finished inside the block; kept for get_trace(key) if key is given"""
+
+        return Trace(self, key)
+
+    def get_trace(self, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            spans = self._traces.get(key)
+            return list(spans) if spans is not None else None
+
+    def _keep_trace(self, key: str, spans: List[Dict]) -> None:
+        with self._lock:
+            self._traces[key] = spans
+            self._traces.move_to_end(key)
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """stage -> count, total and mean milliseconds, over every label combination"""
+
+        totals: Dict[str, List] = {}
+        with self._lock:
+            for (stage, _), (count, total, _) in self._histograms.items():
+                stage_totals = totals.setdefault(stage, [0, 0.0])
+                stage_totals[0] += count
+                stage_totals[1] += total
+        return {
+            stage: {'count': count, 'total_ms': round(total * 1000, 3), 'mean_ms': round(total * 1000 / count, 3)}
+            for stage, (count, total) in sorted(totals.items())
+        }
+
+    def render_prometheus(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Histograms, counters and the given gauges in the Prometheus text exposition format"""
+
+        with self._lock:
+            histograms = sorted((key, (count, total, list(buckets)))
+                                for key, (count, total, buckets) in self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        lines = []
+        name = f'{self.namespace}_stage_duration_seconds'
+        lines.append(f'# HELP {name} Time spent in each hot-path stage')
+        lines.append(f'# TYPE {name} histogram')
+        for (stage, labels), (count, total, buckets) in histograms:
+            labels = (('stage', stage),) + labels
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, buckets):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_format_labels(labels, _le(bound))} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, _le(math.inf))} {count}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+        typed = set()
+        for (counter, labels), value in counters:
+            metric = f'{self.namespace}_{counter}_total'
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{_format_labels(labels)} {_format_value(value)}')
+
+        for gauge, value in sorted((gauges or {}).items()):
+            metric = f'{self.namespace}_{gauge}'
+            lines.append(f'# TYPE {metric} gauge')
+            lines.append(f'{metric} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+class Trace:
+    """Context manager collecting spans for Instrumentation.trace(); .spans holds them"""
+
+    def __init__(self, instrumentation: Instrumentation, key: Optional[str]):
+        self.instrumentation = instrumentation
+        self.key = key
+        self.spans: List[Dict] = []
+        self._token = None
+
+    def __enter__(self):
+        if self.instrumentation.enabled:
+            self._token = _current_trace.set(self.spans)
+        return self
+
+    def __exit__(self, *exc):
+        if self._token is not None:
+            _current_trace.reset(self._token)
+            if self.key is not None:
+                self.instrumentation._keep_trace(self.key, self.spans)
+        return False
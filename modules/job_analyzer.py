@@ -1,59 +1,248 @@
-import openai
+import contextvars
 import json
-import re
-import os
-from typing import Dict, List, Optional
-from config import Config
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from modules.instrumentation import Instrumentation
+from modules.json_extractor import ExtractionResult, JSONLocator, extract_json
+from modules.keyword_extractor import INDUSTRY_KEYWORDS
+from modules.keyword_matcher import KeywordMatcher
+from modules.llm_cache import LLMResponseCache
+from modules.llm_providers import LLMProvider, OpenAIProvider
+from modules.llm_schemas import ANALYSIS_SCHEMA, INSIGHTS_SCHEMA, ResponseSchema
+from modules.llm_scheduler import LLMScheduler
+from modules.prompt_budget import PromptBudget, count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def run_concurrently(calls: Sequence[Tuple[Callable, tuple]], max_workers: int = None,
+                     return_exceptions: bool = False) -> List[Any]:
+    """
+    Run independent (func, args) calls on a thread pool and join them
+    
+    Returns results in the same order as calls. With return_exceptions=True an
+    exception raised by a call is returned in its slot instead of being re-raised.
+    Each call runs in a copy of the caller's context, so an active trace sees its spans.
+    """
+    
+    if not calls:
+        return []
+    
+    max_workers = max(1, min(max_workers or len(calls), len(calls)))
+    
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm') as executor:
+        futures = [executor.submit(contextvars.copy_context().run, func, *args) for func, args in calls]
+        
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        
+        return results
+
+class StreamInterrupted(Exception):
+    """A streamed completion failed after part of it was already delivered"""
+
+
+# Completion tokens allowed per field when asking again for fields a response left out
+REASK_TOKENS_PER_FIELD = 250
+
 
 class JobAnalyzer:
     """Analyzes job descriptions to extract keywords, requirements, and optimization insights"""
     
-    def __init__(self, api_key: str = None):
-        # Set the API key
-        api_key = api_key or Config.OPENAI_API_KEY or os.getenv('OPENAI_API_KEY')
+    def __init__(self, api_key: str = None, cache: Optional[LLMResponseCache] = None,
+                 scheduler: Optional[LLMScheduler] = None, priority: str = 'interactive',
+                 http_client=None, prompt_budget: Optional[PromptBudget] = None,
+                 providers: Optional[Dict[str, LLMProvider]] = None, routes: Optional[Dict[str, str]] = None,
+                 instrumentation: Optional[Instrumentation] = None, reask_missing: bool = True):
+        # Optional persistent response cache shared between analyzer instances
+        self.cache = cache
         
-        if not api_key:
-            raise ValueError("OpenAI API key is required. Please set OPENAI_API_KEY environment variable.")
+        # Optional shared scheduler for rate limits, retries and coalescing; priority
+        # is 'interactive' for user-facing requests and 'bulk' for batch jobs
+        self.scheduler = scheduler
+        self.priority = priority
         
-        # Initialize OpenAI client with proper error handling
-        try:
-            self.client = openai.OpenAI(api_key=api_key)
-        except Exception as e:
-            print(f"Error initializing OpenAI client: {e}")
-            # Fallback: try setting the API key globally (for older versions)
-            openai.api_key = api_key
-            self.client = None
+        # Compacts the documents pasted into the insights prompt to a token budget
+        self.prompt_budget = prompt_budget or PromptBudget()
+        
+        # Named LLM backends; 'default' serves any task without a route. routes maps a
+        # task ('analysis', 'insights') to a provider name, e.g. analysis on a small local model
+        if providers is None:
+            providers = {'default': OpenAIProvider(
+                api_key=api_key,
+                http_client=http_client,
+                # The scheduler owns retries; the client's own would hide 429s from it
+                max_retries=0 if scheduler is not None else None
+            )}
+        if 'default' not in providers:
+            raise ValueError("providers needs a 'default' entry")
+        self.providers = providers
+        self.routes = routes or {}
+        
+        # Per-call timings and token counts (a no-op unless enabled)
+        self.instrumentation = instrumentation or Instrumentation()
+        
+        # Ask once more for just the required fields a JSON response left out
+        self.reask_missing = reask_missing
     
-    def _make_openai_request(self, messages, temperature=0.3, max_tokens=1500, model="gpt-3.5-turbo"):
-        """Make OpenAI API request with fallback for different library versions"""
+    @property
+    def client(self):
+        """The default provider's OpenAI client"""
         
-        try:
-            if self.client:
-                # New OpenAI library (v1.0+)
-                response = self.client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-                return response.choices[0].message.content
+        return getattr(self.providers['default'], 'client', None)
+    
+    @client.setter
+    def client(self, client):
+        self.providers['default'].client = client
+    
+    def get_provider(self, provider=None, task: Optional[str] = None) -> LLMProvider:
+        """Provider by instance or name, else the one routed for task, else the default"""
+        
+        if isinstance(provider, LLMProvider):
+            return provider
+        name = provider or self.routes.get(task) or 'default'
+        if name not in self.providers:
+            raise ValueError(f"Unknown LLM provider: {name}. Configured: {', '.join(self.providers)}")
+        return self.providers[name]
+    
+    def _make_openai_request(self, messages, temperature=0.3, max_tokens=1500, model=None,
+                             on_token: Optional[Callable[[str], None]] = None, provider=None,
+                             until: Optional[Callable[[str], bool]] = None, json_schema: Optional[Dict] = None):
+        """
+        Make an LLM request, answering from the response cache when possible
+        
+        provider is a provider name or instance (the default provider if omitted) and
+        model overrides its model. When on_token is given the completion is streamed and
+        on_token is called with each text fragment as it arrives; the full text is still returned.
+        A streamed completion stops early once until(fragment) returns True, e.g. when the
+        JSON object being streamed has closed. json_schema requests provider-native JSON
+        output of that shape where the provider supports it.
+        """
+        
+        provider = self.get_provider(provider)
+        model = model or provider.model
+        
+        with self.instrumentation.span('llm_call', provider=provider.name, model=model) as span:
+            scheduler = self.scheduler if provider.rate_limited else None
+            
+            cache_key = None
+            if self.cache is not None or scheduler is not None:
+                cache_key = LLMResponseCache.make_key(provider.cache_id(model), temperature, max_tokens, messages,
+                                                      json_schema)
+            if self.cache is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    if on_token:
+                        on_token(cached)
+                    span.annotate(cached=True)
+                    return cached
+            
+            sent = []
+            
+            def send():
+                sent.append(True)
+                if not on_token:
+                    return self._send_openai_request(messages, temperature, max_tokens, model, provider, json_schema)
+                
+                fragments = []
+                stream = self.stream_completion(messages, temperature, max_tokens, model, provider, json_schema)
+                try:
+                    for fragment in stream:
+                        fragments.append(fragment)
+                        on_token(fragment)
+                        if until is not None and until(fragment):
+                            # Whatever follows (closing prose, a code fence) isn't needed
+                            close = getattr(stream, 'close', None)
+                            if close:
+                                close()
+                            break
+                except Exception as e:
+                    if fragments:
+                        # Retrying would replay text the caller has already shown
+                        raise StreamInterrupted(str(e)) from e
+                    raise
+                return ''.join(fragments)
+            
+            if scheduler is None:
+                response = send()
             else:
-                # Fallback for older versions
-                response = openai.ChatCompletion.create(
-                    model=model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
+                response = scheduler.submit(
+                    send,
+                    key=cache_key,
+                    estimated_tokens=self.estimate_tokens(messages, max_tokens),
+                    priority=self.priority
                 )
-                return response.choices[0].message.content
-                
-        except Exception as e:
-            print(f"OpenAI API Error: {e}")
-            raise e
+                if on_token and not sent:
+                    # Coalesced onto another caller's request; deliver its text in one go
+                    on_token(response)
+            
+            if response and self.cache is not None:
+                self.cache.set(cache_key, response)
+            if span.recording:
+                self._record_tokens(span, provider, messages, response, coalesced=not sent)
+            return response
     
-    def analyze_job_description(self, job_description: str) -> Dict[str, any]:
+    def _record_tokens(self, span, provider: LLMProvider, messages, response: str, coalesced: bool) -> None:
+        """Annotate an llm_call span with its token counts; only requests actually sent count toward the totals"""
+        
+        prompt_tokens = sum(count_tokens(message.get('content') or '') for message in messages)
+        completion_tokens = count_tokens(response or '')
+        span.annotate(cached=False, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        if not coalesced:
+            self.instrumentation.count('llm_tokens', prompt_tokens, provider=provider.name, kind='prompt')
+            self.instrumentation.count('llm_tokens', completion_tokens, provider=provider.name, kind='completion')
+    
+    @staticmethod
+    def estimate_tokens(messages, max_tokens: int) -> int:
+        """Rough upper bound on a request's token usage (~4 characters per prompt token)"""
+        
+        return sum(len(message.get('content') or '') for message in messages) // 4 + max_tokens
+    
+    def stream_completion(self, messages, temperature=0.3, max_tokens=1500, model=None,
+                          provider=None, json_schema: Optional[Dict] = None) -> Iterator[str]:
+        """Yield completion text fragments as the provider streams them"""
+        
+        return self.get_provider(provider).stream(messages, temperature, max_tokens, model, json_schema)
+    
+    def _evict_cached_response(self, messages, temperature=0.3, max_tokens=1500, model=None, provider=None,
+                               json_schema: Optional[Dict] = None):
+        """Drop a cached response that turned out to be unusable so the next call retries"""
+        
+        if self.cache is not None:
+            provider = self.get_provider(provider)
+            model = provider.cache_id(model or provider.model)
+            self.cache.delete(LLMResponseCache.make_key(model, temperature, max_tokens, messages, json_schema))
+    
+    def _send_openai_request(self, messages, temperature, max_tokens, model, provider=None,
+                             json_schema: Optional[Dict] = None):
+        """Send one non-streamed request to the provider"""
+        
+        return self.get_provider(provider).complete(messages, temperature, max_tokens, model, json_schema)
+    
+    def complete_many(self, message_lists: List[List[Dict]], max_concurrency: int = 4,
+                      return_exceptions: bool = False, **request_kwargs) -> List[Any]:
+        """Send several independent prompts at once, at most max_concurrency in flight"""
+        
+        calls = [
+            (lambda messages=messages: self._make_openai_request(messages=messages, **request_kwargs), ())
+            for messages in message_lists
+        ]
+        return run_concurrently(calls, max_workers=max_concurrency, return_exceptions=return_exceptions)
+    
+    def analyze_job_description(self, job_description: str,
+                                on_token: Optional[Callable[[str], None]] = None,
+                                provider=None) -> Dict[str, any]:
         """
-        Comprehensive analysis of job description
+        Comprehensive analysis of job description (streamed to on_token if given)
+        
+        Runs on provider if given, else on the provider routed for 'analysis'.
         
         Returns:
             Dict containing:
@@ -104,18 +293,13 @@ class JobAnalyzer:
             4. Company values and culture indicators
             """
 
-            response = self._make_openai_request(
-                messages=[
-                    {"role": "system", "content": "You are an expert HR analyst specializing in job description analysis. Provide accurate, detailed analysis in valid JSON format."},
-                    {"role": "user", "content": analysis_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=2000
-            )
-            
-            # Parse JSON response
-            analysis_text = response
-            analysis_data = self._extract_json_from_response(analysis_text)
+            messages = [
+                {"role": "system", "content": "You are an expert HR analyst specializing in job description analysis. Provide accurate, detailed analysis in valid JSON format."},
+                {"role": "user", "content": analysis_prompt}
+            ]
+            provider = self.get_provider(provider, task='analysis')
+            analysis_data = self._request_json(messages, ANALYSIS_SCHEMA, 'analysis', temperature=0.3,
+                                               max_tokens=2000, on_token=on_token, provider=provider).data
             
             if not analysis_data:
                 return {'success': False, 'error': 'Failed to parse analysis response'}
@@ -135,23 +319,33 @@ class JobAnalyzer:
                 'error': f'Job analysis failed: {str(e)}'
             }
     
-    def extract_optimization_insights(self, job_description: str, resume_text: str, cover_letter_text: str) -> Dict[str, any]:
+    def extract_optimization_insights(self, job_description: str, resume_text: str, cover_letter_text: str,
+                                      on_token: Optional[Callable[[str], None]] = None,
+                                      provider=None) -> Dict[str, any]:
         """
-        Generate specific optimization recommendations
+        Generate specific optimization recommendations (streamed to on_token if given)
+        
+        Runs on provider if given, else on the provider routed for 'insights'.
         """
         
         try:
+            provider = self.get_provider(provider, task='insights')
+            
+            # Whitespace, repeats and posting boilerplate cost tokens and say nothing
+            parts, budget_report = self.prompt_budget.fit(job_description, resume_text, cover_letter_text)
+            max_tokens = self.prompt_budget.max_completion_tokens
+            
             optimization_prompt = f"""
             Analyze the job description against the current resume and cover letter to provide specific optimization recommendations:
 
             JOB DESCRIPTION:
-            {job_description}
+            {parts['job_description']}
 
             CURRENT RESUME:
-            {resume_text}
+            {parts['resume']}
 
             CURRENT COVER LETTER:
-            {cover_letter_text}
+            {parts['cover_letter']}
 
             Provide optimization insights in JSON format:
             {{
@@ -168,21 +362,20 @@ class JobAnalyzer:
             }}
             """
 
-            response = self._make_openai_request(
-                messages=[
-                    {"role": "system", "content": "You are an expert resume optimizer. Provide specific, actionable recommendations."},
-                    {"role": "user", "content": optimization_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1500
-            )
+            messages = [
+                {"role": "system", "content": "You are an expert resume optimizer. Provide specific, actionable recommendations."},
+                {"role": "user", "content": optimization_prompt}
+            ]
+            insights_data = self._request_json(messages, INSIGHTS_SCHEMA, 'insights', temperature=0.3,
+                                               max_tokens=max_tokens, on_token=on_token, provider=provider).data
             
-            insights_text = response
-            insights_data = self._extract_json_from_response(insights_text)
+            if not insights_data:
+                return {'success': False, 'error': 'Failed to parse insights response'}
             
             return {
                 'success': True,
-                'insights': insights_data
+                'insights': insights_data,
+                'prompt_tokens': budget_report
             }
             
         except Exception as e:
@@ -191,32 +384,92 @@ class JobAnalyzer:
                 'error': f'Optimization analysis failed: {str(e)}'
             }
     
-    def _extract_json_from_response(self, response_text: str) -> Optional[Dict]:
-        """Extract JSON from OpenAI response, handling various formats"""
+    def _request_json(self, messages, schema: ResponseSchema, task: str, temperature: float, max_tokens: int,
+                      on_token: Optional[Callable[[str], None]] = None, provider=None) -> ExtractionResult:
+        """
+        Request a JSON object of schema's shape and extract it
+        
+        Required fields the response leaves out are asked for once more - just those
+        fields, following on from the first answer - instead of re-running the prompt.
+        """
+        
+        response = self._make_openai_request(
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            on_token=on_token,
+            provider=provider,
+            until=JSONLocator().feed,
+            json_schema=schema.json_schema()
+        )
+        result = self._extract_json_from_response(response, schema, task=task)
+        
+        fields = schema.fields_to_reask(result.data)
+        if fields and self.reask_missing:
+            result = self._reask_missing_fields(messages, response, result, schema.subset(fields), task,
+                                                temperature, max_tokens, provider)
+        
+        if not result.data:
+            self._evict_cached_response(messages, temperature=temperature, max_tokens=max_tokens, provider=provider,
+                                        json_schema=schema.json_schema())
+        return result
+    
+    def _reask_missing_fields(self, messages, response: str, result: ExtractionResult, schema: ResponseSchema,
+                              task: str, temperature: float, max_tokens: int, provider) -> ExtractionResult:
+        """Follow up on response asking only for schema's fields, and merge them into result"""
+        
+        fields = list(schema.fields)
+        reask_messages = messages + [
+            {'role': 'assistant', 'content': response or ''},
+            {'role': 'user', 'content': (
+                f"Your reply is missing or has invalid values for: {', '.join(fields)}. "
+                f"Reply with only a JSON object containing exactly these fields, matching this JSON Schema:\n"
+                f"{json.dumps(schema.json_schema()['schema'])}"
+            )}
+        ]
+        reask_tokens = min(max_tokens, REASK_TOKENS_PER_FIELD * len(fields))
+        self.instrumentation.count('llm_reasks', task=task)
         
         try:
-            # Try direct JSON parsing
-            return json.loads(response_text)
-        except:
-            pass
-        
-        # Try to extract JSON from code blocks
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response_text, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group(1))
-            except:
-                pass
+            reply = self._make_openai_request(reask_messages, temperature=temperature, max_tokens=reask_tokens,
+                                              provider=provider, json_schema=schema.json_schema())
+        except Exception as e:
+            logger.warning('Asking again for %s fields %s failed: %s', task, fields, e)
+            self.instrumentation.count('llm_reask_failures', task=task)
+            return result
         
-        # Try to find JSON-like content
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group(0))
-            except:
-                pass
+        patch = self._extract_json_from_response(reply, schema, task=task)
+        if not patch.data:
+            self._evict_cached_response(reask_messages, temperature=temperature, max_tokens=reask_tokens,
+                                        provider=provider, json_schema=schema.json_schema())
+            return result
         
-        return None
+        data = dict(result.data or {})
+        data.update({key: value for key, value in patch.data.items() if key in schema.fields})
+        missing = [path for path in result.missing if path.split('.', 1)[0] not in patch.data] + patch.missing
+        return ExtractionResult(data, result.repaired, result.errors + patch.errors, missing)
+    
+    def _extract_json_from_response(self, response_text: str, schema: Optional[ResponseSchema] = None,
+                                    task: str = None) -> ExtractionResult:
+        """
+        Extract the JSON object from an LLM response (bare, fenced or surrounded by prose)
+        
+        A response cut off by max_tokens is closed after its last complete value, and
+        fields that don't match schema are dropped and listed in .missing.
+        """
+        
+        with self.instrumentation.span('json_extract', task=task) as span:
+            result = extract_json(response_text, schema.fields if schema is not None else None)
+            span.annotate(repaired=result.repaired, missing=len(result.missing))
+        
+        if result.data is None or result.errors:
+            logger.warning('JSON extraction (%s): %s', task or 'response', '; '.join(result.errors))
+            self.instrumentation.count('json_extract_errors', task=task)
+        elif result.repaired:
+            logger.warning('JSON extraction (%s): repaired a truncated response, missing %s', task or 'response',
+                           result.missing)
+            self.instrumentation.count('json_repairs', task=task)
+        return result
     
     def _flatten_keywords(self, keywords_dict: Dict) -> List[str]:
         """Flatten keywords from priority categories into single list"""
@@ -229,28 +482,11 @@ class JobAnalyzer:
         return list(set(all_keywords))  # Remove duplicates
     
     def _calculate_keyword_density(self, text: str, keywords: List[str]) -> Dict[str, float]:
-        """Calculate keyword density in the text"""
-        
-        text_lower = text.lower()
-        word_count = len(text.split())
+        """Calculate keyword density in the text (whole-word matches, single pass)"""
         
-        density = {}
-        for keyword in keywords:
-            keyword_lower = keyword.lower()
-            count = text_lower.count(keyword_lower)
-            density[keyword] = (count / word_count) * 100 if word_count > 0 else 0
-        
-        return density
+        return KeywordMatcher.for_keywords(sorted(keywords)).density(text)
     
     def get_industry_specific_keywords(self, industry: str) -> List[str]:
         """Get additional industry-specific keywords"""
         
-        industry_keywords = {
-            'technology': ['agile', 'scrum', 'devops', 'ci/cd', 'microservices', 'api', 'cloud', 'aws', 'azure'],
-            'finance': ['compliance', 'risk management', 'sox', 'financial modeling', 'bloomberg', 'excel'],
-            'healthcare': ['hipaa', 'clinical', 'patient care', 'ehr', 'medical records', 'compliance'],
-            'marketing': ['seo', 'sem', 'google analytics', 'social media', 'content marketing', 'brand'],
-            'sales': ['crm', 'salesforce', 'lead generation', 'quota', 'pipeline', 'b2b', 'b2c']
-        }
-        
-        return industry_keywords.get(industry.lower(), [])
\ No newline at end of file
+        return list(INDUSTRY_KEYWORDS.get(industry.lower(), []))
\ No newline at end of file
@@ -0,0 +1,226 @@
+import json
+import re
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Characters that can change the scanner's state; everything between them is skipped in C
+_STRUCTURAL = re.compile(r'[{}\[\]",\\]')
+
+_CLOSERS = {'{': '}', '[': ']'}
+
+# Most recent cut points remembered for truncation repair
+MAX_REPAIR_POINTS = 16
+
+
+class ExtractionResult(NamedTuple):
+    data: Optional[Dict]
+    repaired: bool = False  # the response was cut off and closed here
+    errors: List[str] = []  # why nothing was found, or fields dropped by the schema
+    missing: List[str] = []  # schema fields absent (or dropped) from data, dotted for nested ones
+
+
+class JSONLocator:
+    """
+    Finds the first complete JSON object in text, one chunk at a time
+
+    Only quotes, backslashes, brackets and commas are looked at (found with a regex,
+    so prose and string contents are skipped without a Python-level loop), keeping
+    just a stack of open brackets - no backtracking however long the response is.
+    feed() scans only the new chunk and returns True as soon as an object closes and
+    parses, so a streamed response can stop there. A candidate that turns out not to be JSON (braces in
+    the prose before it) is abandoned and the scan resumes after its opening brace.
+
+    If the text ends inside an object - the completion hit max_tokens - repair()
+    closes it at the last point where a value was complete.
+    """
+
+    def __init__(self):
+        self.value: Optional[Dict] = None
+        self._chunks: List[str] = []
+        self._length = 0
+        self._pos = 0
+        self._restart()
+
+    def _restart(self, start: Optional[int] = None) -> None:
+        self.start = start
+        # Open brackets' closers as a linked list, (closer, rest) - so a cut point keeps it in O(1)
+        self._stack: Optional[Tuple] = ('}', None) if start is not None else None
+        self._in_string = False
+        # (index to cut the text at, closers still open there)
+        self._cuts = deque([(start + 1, self._stack)] if start is not None else [], maxlen=MAX_REPAIR_POINTS)
+
+    @property
+    def complete(self) -> bool:
+        return self.value is not None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far (joined on demand, not on every chunk)"""
+
+        if len(self._chunks) > 1:
+            self._chunks = [''.join(self._chunks)]
+        return self._chunks[0] if self._chunks else ''
+
+    def feed(self, chunk: str) -> bool:
+        """Scan another piece of text; True once a complete object has been found"""
+
+        if self.complete:
+            return True
+        # Positions are absolute; text is the part of the input starting at offset
+        text, offset = chunk, self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+
+        while True:
+            if self._pos < offset:
+                # A candidate was abandoned before this chunk - rescan from the full text
+                text, offset = self.text, 0
+            match = _STRUCTURAL.search(text, self._pos - offset)
+            if match is None:
+                # Past the end when a chunk ended on a backslash inside a string
+                self._pos = max(self._pos, self._length)
+                return False
+
+            char, index = match.group(), offset + match.start()
+            self._pos = index + 1
+
+            if self._in_string:
+                if char == '\\':
+                    self._pos = index + 2  # skip the escaped character
+                elif char == '"':
+                    self._in_string = False
+            elif self.start is None:
+                if char == '{':
+                    self._restart(index)
+            elif char == '"':
+                self._in_string = True
+            elif char in _CLOSERS:
+                self._stack = (_CLOSERS[char], self._stack)
+                self._cuts.append((index + 1, self._stack))
+            elif char == ',':
+                self._cuts.append((index, self._stack))
+            elif char in '}]':
+                if char != self._stack[0]:
+                    self._abandon()
+                    continue
+                self._stack = self._stack[1]
+                if self._stack is None:
+                    if self.start < offset:
+                        text, offset = self.text, 0
+                    try:
+                        value = json.loads(text[self.start - offset:index + 1 - offset])
+                    except ValueError:
+                        value = None
+                    if isinstance(value, dict):
+                        self.value = value
+                        return True
+                    self._abandon()
+
+    def _abandon(self) -> None:
+        """Not JSON after all - look for the next object after this one's opening brace"""
+
+        self._pos = self.start + 1
+        self._restart()
+
+    def repair(self) -> Optional[Dict]:
+        """Close a truncated object, dropping the value that was cut off; None if nothing usable remains"""
+
+        if self.complete:
+            return self.value
+        if self.start is None:
+            return None
+
+        candidates = []
+        if not self._in_string:
+            candidates.append((len(self.text), self._stack))
+        candidates.extend(reversed(self._cuts))
+
+        for cut, stack in candidates:
+            closers = []
+            while stack is not None:
+                closers.append(stack[0])
+                stack = stack[1]
+            try:
+                value = json.loads(self.text[self.start:cut].rstrip() + ''.join(closers))
+            except ValueError:
+                continue
+            if isinstance(value, dict) and value:
+                return value
+        return None
+
+
+def conform(data: Any, schema: Any, path: str = '') -> Tuple[Any, List[str], List[str]]:
+    """
+    Check data against a schema, dropping what doesn't fit
+
+    A schema is a type (str, int, ...), [item schema] for a list, or {key: schema}
+    for an object; keys the schema doesn't mention are kept as they are. Returns
+    (data with mismatched values and list items removed, errors, missing dotted keys).
+    Mismatched or null object fields count as missing, so they can be asked for again.
+    """
+
+    errors: List[str] = []
+    missing: List[str] = []
+
+    if isinstance(schema, dict):
+        if not isinstance(data, dict):
+            return None, [f'{path or "response"}: expected an object'], []
+        clean = dict(data)
+        for key, field_schema in schema.items():
+            field_path = f'{path}.{key}' if path else key
+            if data.get(key) is None:
+                clean.pop(key, None)
+                missing.append(field_path)
+                continue
+            value, field_errors, field_missing = conform(data[key], field_schema, field_path)
+            errors.extend(field_errors)
+            missing.extend(field_missing)
+            if value is None:
+                clean.pop(key)
+                missing.append(field_path)
+            else:
+                clean[key] = value
+        return clean, errors, missing
+
+    if isinstance(schema, list):
+        if not isinstance(data, list):
+            return None, [f'{path}: expected a list'], []
+        clean = []
+        for index, item in enumerate(data):
+            value, item_errors, _ = conform(item, schema[0], f'{path}[{index}]')
+            errors.extend(item_errors)
+            if value is not None:
+                clean.append(value)
+        return clean, errors, missing
+
+    if schema is float and isinstance(data, int) and not isinstance(data, bool):
+        return float(data), [], []
+    if not isinstance(data, schema) or (schema is int and isinstance(data, bool)):
+        return None, [f'{path}: expected {schema.__name__}'], []
+    return data, [], []
+
+
+def extract_json(text: str, schema: Optional[Dict] = None) -> ExtractionResult:
+    """
+    The first JSON object in an LLM response, repaired if truncated and checked against schema
+
+    Handles bare JSON, fenced code blocks and JSON surrounded by prose in one pass.
+    """
+
+    if not text:
+        return ExtractionResult(None, errors=['empty response'])
+
+    locator = JSONLocator()
+    locator.feed(text)
+    data, repaired = locator.value, False
+    if data is None:
+        data = locator.repair()
+        repaired = data is not None
+    if data is None:
+        reason = 'no JSON object in response' if locator.start is None else 'unterminated JSON object could not be repaired'
+        return ExtractionResult(None, errors=[reason])
+
+    if schema is None:
+        return ExtractionResult(data, repaired)
+    data, errors, missing = conform(data, schema)
+    return ExtractionResult(data, repaired, errors, missing)
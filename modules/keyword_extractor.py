@@ -0,0 +1,261 @@
+import re
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional
+
+from modules.keyword_matcher import KeywordMatcher
+
+# Industry skill lexicons (also used by JobAnalyzer.get_industry_specific_keywords)
+INDUSTRY_KEYWORDS = {
+    'technology': ['agile', 'scrum', 'devops', 'ci/cd', 'microservices', 'api', 'cloud', 'aws', 'azure'],
+    'finance': ['compliance', 'risk management', 'sox', 'financial modeling', 'bloomberg', 'excel'],
+    'healthcare': ['hipaa', 'clinical', 'patient care', 'ehr', 'medical records', 'compliance'],
+    'marketing': ['seo', 'sem', 'google analytics', 'social media', 'content marketing', 'brand'],
+    'sales': ['crm', 'salesforce', 'lead generation', 'quota', 'pipeline', 'b2b', 'b2c']
+}
+
+TECHNICAL_SKILLS = [
+    'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'golang', 'rust', 'ruby', 'php', 'scala',
+    'kotlin', 'swift', 'matlab', 'sql', 'nosql', 'postgresql', 'mysql', 'mongodb', 'redis', 'elasticsearch',
+    'html', 'css', 'react', 'angular', 'vue', 'node.js', 'django', 'flask', 'fastapi', 'spring', '.net',
+    'rest api', 'rest apis', 'restful', 'graphql', 'grpc', 'docker', 'kubernetes', 'terraform', 'ansible', 'jenkins',
+    'git', 'linux', 'bash', 'gcp', 'google cloud', 'kafka', 'spark', 'hadoop', 'airflow', 'pandas', 'numpy',
+    'tensorflow', 'pytorch', 'scikit-learn', 'machine learning', 'deep learning', 'nlp', 'computer vision',
+    'data analysis', 'data science', 'data engineering', 'etl', 'tableau', 'power bi', 'jira', 'unit testing',
+    'test automation', 'selenium', 'oauth', 'security', 'networking', 'distributed systems', 'celery'
+]
+
+SOFT_SKILLS = [
+    'communication', 'leadership', 'teamwork', 'collaboration', 'problem solving', 'problem-solving',
+    'critical thinking', 'time management', 'mentoring', 'stakeholder management', 'attention to detail',
+    'adaptability', 'creativity', 'negotiation', 'presentation', 'organizational', 'self-motivated',
+    'customer service', 'interpersonal'
+]
+
+CULTURE_TERMS = [
+    'collaborative', 'innovative', 'fast-paced', 'inclusive', 'diverse', 'diversity', 'remote-first',
+    'ownership', 'growth mindset', 'transparency', 'work-life balance', 'startup', 'mission-driven',
+    'customer-focused', 'data-driven', 'flexible'
+]
+
+CERTIFICATIONS = [
+    'pmp', 'cpa', 'cfa', 'cissp', 'ccna', 'scrum master', 'csm', 'itil', 'six sigma', 'aws certified',
+    'azure certified', 'google certified', 'comptia', 'security+', 'bls', 'acls'
+]
+
+STOPWORDS = frozenset('''
+a about above across after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each either etc every few for from
+further had has have having he her here hers him his how i if in into is it its itself just me more most
+my no nor not now of off on once only or other our ours out over own per same she should so some such
+than that the their theirs them then there these they this those through to too under until up upon us
+very via was we were what when where which while who whom why will with within without would you your
+yours
+ability able about across apply applicant applicants candidate candidates company day daily including
+include includes job looking must new plus position preferred related required requirement requirements
+responsibilities responsibility role seeking strong successful team teams well work working years year
+experience experienced knowledge skills skill understanding qualifications qualification opportunity
+join us great excellent good proven demonstrated solid deep hands-on familiarity familiar etc e.g i.e
+'''.split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./'-]*[a-z0-9+#]|[a-z0-9][+#]*")
+_PHRASE_BREAK_RE = re.compile(r"[,;:!?()\[\]{}\"•·|\n\r\t]+|\.(?=\s|$)| - | – | — ")
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+_YEARS_RE = re.compile(r'(\d+)\s*\+?\s*(?:-\s*\d+\s*)?(?:years?|yrs?)\b', re.IGNORECASE)
+_EDUCATION_RE = re.compile(r"\b(?:bachelor'?s?|master'?s?|ph\.?d|doctorate|degree|diploma|b\.?s\.?c?|m\.?s\.?c?|mba)\b", re.IGNORECASE)
+_CERTIFICATION_RE = re.compile(r'\b(?:certifi(?:ed|cation)s?|licen[cs]ed?)\b', re.IGNORECASE)
+_SENIOR_RE = re.compile(r'\b(?:senior|sr\.?|lead|principal|staff|head of|director)\b', re.IGNORECASE)
+_ENTRY_RE = re.compile(r'\b(?:junior|jr\.?|entry[- ]level|graduate|intern(?:ship)?|trainee)\b', re.IGNORECASE)
+_EXECUTIVE_RE = re.compile(r'\b(?:vp|vice president|chief|cto|ceo|cfo|executive)\b', re.IGNORECASE)
+_JOB_TYPE_RE = re.compile(r'\b(full[- ]time|part[- ]time|contract|remote|hybrid|temporary|freelance)\b', re.IGNORECASE)
+
+MAX_PHRASE_WORDS = 3
+LEXICON_BOOST = 4.0
+KEYWORDS_PER_PRIORITY = 8
+
+
+def _compile_lexicon(terms: List[str]) -> re.Pattern:
+    # Longest first so 'rest apis' wins over 'rest'; boundaries that allow c++, c#, .net
+    alternation = '|'.join(re.escape(term) for term in sorted(set(terms), key=len, reverse=True))
+    return re.compile(rf'(?<![a-z0-9])(?:{alternation})(?![a-z0-9+#])')
+
+
+class KeywordExtractor:
+    """
+    Offline job description analysis: RAKE-style phrase scoring boosted by skill lexicons
+
+    Produces the same shapes as JobAnalyzer so it can stand in for the LLM either as a
+    fallback when the API fails or as a fast "no-LLM" mode.
+    """
+
+    _lexicon_terms = sorted(set(TECHNICAL_SKILLS) | {term for terms in INDUSTRY_KEYWORDS.values() for term in terms})
+    _lexicon_re = _compile_lexicon(_lexicon_terms)
+    _soft_skills_re = _compile_lexicon(SOFT_SKILLS)
+    _culture_re = _compile_lexicon(CULTURE_TERMS)
+    _certifications_re = _compile_lexicon(CERTIFICATIONS)
+    _industry_terms = {industry: set(terms) for industry, terms in INDUSTRY_KEYWORDS.items()}
+
+    def extract_keywords(self, text: str) -> Dict[str, List[str]]:
+        """Rank keywords and split them into high/medium/low priority buckets"""
+
+        ranked = self._rank_phrases((text or '').lower())
+        n = KEYWORDS_PER_PRIORITY
+
+        return {
+            'high_priority': ranked[:n],
+            'medium_priority': ranked[n:2 * n],
+            'low_priority': ranked[2 * n:3 * n]
+        }
+
+    def _rank_phrases(self, text_lower: str) -> List[str]:
+        # RAKE: split into candidate phrases at punctuation and stopwords
+        phrases = []
+        for fragment in _PHRASE_BREAK_RE.split(text_lower):
+            current = []
+            for token in _TOKEN_RE.findall(fragment):
+                if token in STOPWORDS or not any(char.isalpha() for char in token):
+                    if current:
+                        phrases.append(tuple(current))
+                    current = []
+                else:
+                    current.append(token)
+            if current:
+                phrases.append(tuple(current))
+
+        # Word score = degree / frequency, over phrases short enough to be keywords
+        frequency = Counter()
+        degree = Counter()
+        for phrase in phrases:
+            if len(phrase) > MAX_PHRASE_WORDS:
+                continue
+            for word in phrase:
+                frequency[word] += 1
+                degree[word] += len(phrase)
+
+        scores = defaultdict(float)
+        occurrences = Counter()
+        for phrase in phrases:
+            if len(phrase) > MAX_PHRASE_WORDS:
+                continue
+            key = ' '.join(phrase)
+            if len(key) < 2:
+                continue
+            occurrences[key] += 1
+            scores[key] = sum(degree[word] / frequency[word] for word in phrase)
+
+        # Repetition and lexicon membership both signal importance
+        for key in scores:
+            scores[key] *= 1 + 0.5 * (occurrences[key] - 1)
+
+        for match in self._lexicon_re.finditer(text_lower):
+            term = match.group(0)
+            scores[term] = scores.get(term, 1.0) + LEXICON_BOOST
+
+        return [phrase for phrase, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0]))]
+
+    def analyze(self, text: str) -> Dict:
+        """Full analysis dict in the same structure analyze_job_description returns"""
+
+        text = text or ''
+        text_lower = text.lower()
+        sentences = [sentence.strip() for sentence in _SENTENCE_RE.split(text) if sentence.strip()]
+
+        technical = self._unique(self._lexicon_re.findall(text_lower))
+        certifications = self._unique(self._certifications_re.findall(text_lower))
+        certifications += [s for s in sentences if _CERTIFICATION_RE.search(s) and s.lower() not in certifications]
+
+        return {
+            'keywords': self.extract_keywords(text),
+            'requirements': {
+                'technical_skills': technical,
+                'soft_skills': self._unique(self._soft_skills_re.findall(text_lower)),
+                'education': [self._clip(s) for s in sentences if _EDUCATION_RE.search(s)],
+                'experience': [self._clip(s) for s in sentences if _YEARS_RE.search(s)],
+                'certifications': [self._clip(c) for c in certifications]
+            },
+            'experience_level': self._experience_level(text),
+            'industry': self._industry(technical),
+            'company_culture': self._unique(self._culture_re.findall(text_lower)),
+            'job_type': self._job_type(text_lower)
+        }
+
+    @staticmethod
+    def _unique(items: List[str]) -> List[str]:
+        return list(dict.fromkeys(items))
+
+    @staticmethod
+    def _clip(sentence: str, limit: int = 160) -> str:
+        return sentence if len(sentence) <= limit else sentence[:limit].rsplit(' ', 1)[0] + '...'
+
+    def _industry(self, found_terms: List[str]) -> str:
+        found = set(found_terms)
+        counts = {industry: len(found & terms) for industry, terms in self._industry_terms.items()}
+        industry, hits = max(counts.items(), key=lambda item: item[1])
+        if hits:
+            return industry
+        return 'technology' if found else 'general'
+
+    @staticmethod
+    def _experience_level(text: str) -> str:
+        if _EXECUTIVE_RE.search(text):
+            return 'executive'
+        if _SENIOR_RE.search(text):
+            return 'senior'
+        if _ENTRY_RE.search(text):
+            return 'entry'
+
+        years = [int(match) for match in _YEARS_RE.findall(text)]
+        if not years:
+            return 'mid'
+        required = min(years)
+        return 'senior' if required >= 6 else 'mid' if required >= 2 else 'entry'
+
+    @staticmethod
+    def _job_type(text_lower: str) -> str:
+        match = _JOB_TYPE_RE.search(text_lower)
+        return match.group(1).replace(' ', '-') if match else 'full-time'
+
+    def build_insights(self, analysis: Dict, resume_text: str, cover_letter_text: str) -> Dict:
+        """Keyword-gap insights in the extract_optimization_insights structure"""
+
+        keywords = analysis.get('keywords', {})
+        required_skills = analysis.get('requirements', {}).get('technical_skills', [])
+        # Concrete skills first, then the ranked phrases
+        priority_keywords = self._unique(
+            required_skills + keywords.get('high_priority', []) + keywords.get('medium_priority', [])
+        )
+        # One automaton scores both documents against the same keyword set
+        matcher = KeywordMatcher.for_keywords(priority_keywords)
+        resume_counts = matcher.count(resume_text or '')
+        cover_counts = matcher.count(cover_letter_text or '')
+
+        resume_missing = [k for k in priority_keywords if not resume_counts.get(k)]
+        cover_missing = [k for k in priority_keywords if not cover_counts.get(k)]
+        resume_matched = [k for k in priority_keywords if k not in resume_missing]
+
+        return {
+            'resume_gaps': resume_missing[:10],
+            'cover_letter_gaps': cover_missing[:10],
+            'keyword_opportunities': [k for k in resume_missing if k in cover_missing][:10] or resume_missing[:10],
+            'experience_matching': {
+                'strong_matches': resume_matched[:10],
+                'weak_matches': [k for k in resume_matched if not cover_counts.get(k)][:10],
+                'missing_experiences': [s for s in required_skills if not resume_counts.get(s)][:10]
+            },
+            'ats_recommendations': [
+                'Use standard section headers (Experience, Education, Skills)',
+                'Mirror the exact keyword spelling used in the job description'
+            ] + ([f"Add missing keywords: {', '.join(resume_missing[:5])}"] if resume_missing else []),
+            'priority_actions': [f"Show evidence of {k} in your resume" for k in resume_missing[:3]]
+                                or ['Quantify achievements for the skills you already match']
+        }
+
+    # JobAnalyzer-compatible interface, so the pipeline can run without an LLM
+
+    def analyze_job_description(self, job_description: str,
+                                on_token: Optional[Callable[[str], None]] = None) -> Dict[str, any]:
+        return {'success': True, 'analysis': self.analyze(job_description)}
+
+    def extract_optimization_insights(self, job_description: str, resume_text: str, cover_letter_text: str,
+                                      on_token: Optional[Callable[[str], None]] = None) -> Dict[str, any]:
+        analysis = self.analyze(job_description)
+        return {'success': True, 'insights': self.build_insights(analysis, resume_text, cover_letter_text)}
@@ -0,0 +1,147 @@
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+# Words are maximal letter/digit runs; every other non-space character is its own token.
+# Keywords are tokenized the same way, so 'ci/cd', 'c++' and 'node.js' match as written
+# while 'java' can never match inside 'javascript'.
+_TOKEN_RE = re.compile(r'[^\W_]+|\S')
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text)
+
+
+class KeywordMatcher:
+    """
+    Aho–Corasick automaton over word tokens for counting many keywords in one pass
+
+    Build once per keyword set (see for_keywords) and reuse it to scan the job
+    description, resume and cover letter. Matching is case-insensitive and respects
+    word boundaries.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        self._lengths: List[int] = []
+
+        seen = set()
+        for keyword in keywords:
+            tokens = tuple(tokenize(keyword.lower()))
+            if not tokens or keyword in seen:
+                continue
+            seen.add(keyword)
+            # Spellings with the same tokens ('Python', 'python') share a state and are all reported
+            self._add(tokens, len(self.keywords))
+            self.keywords.append(keyword)
+            self._lengths.append(len(tokens))
+
+        self._build_fail_links()
+
+    @classmethod
+    def for_keywords(cls, keywords: Iterable[str]) -> 'KeywordMatcher':
+        """Shared, cached matcher for a keyword set"""
+
+        return _cached_matcher(tuple(keywords))
+
+    def _add(self, tokens: Tuple[str, ...], keyword_id: int) -> None:
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += (keyword_id,)
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[next_state] = target if target != next_state else 0
+
+                # Outputs of the longest proper suffix are also matches here
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """All matches as (start, end, keyword) character spans, in text order"""
+
+        starts = []
+        matches = []
+        lengths = self._lengths
+        goto, fail, output = self._goto, self._fail, self._output
+        lowered = text.lower()
+        length = len(lowered)
+        state = 0
+
+        for match in _TOKEN_RE.finditer(lowered):
+            starts.append(match.start())
+            token = match.group()
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+
+            if output[state]:
+                end = match.end()
+                # 'c' must not match the start of 'c++' / 'c#'
+                if end < length and lowered[end] in '+#' and token[-1].isalnum():
+                    continue
+                for keyword_id in output[state]:
+                    start = starts[len(starts) - lengths[keyword_id]]
+                    matches.append((start, end, self.keywords[keyword_id]))
+
+        return matches
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Occurrences of every keyword (zero included) in a single pass"""
+
+        counts = [0] * len(self.keywords)
+        goto, fail, output = self._goto, self._fail, self._output
+        lowered = text.lower()
+        length = len(lowered)
+        state = 0
+
+        for match in _TOKEN_RE.finditer(lowered):
+            token = match.group()
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+
+            if output[state]:
+                end = match.end()
+                # 'c' must not match the start of 'c++' / 'c#'
+                if end < length and lowered[end] in '+#' and token[-1].isalnum():
+                    continue
+                for keyword_id in output[state]:
+                    counts[keyword_id] += 1
+
+        return dict(zip(self.keywords, counts))
+
+    def density(self, text: str) -> Dict[str, float]:
+        """Occurrences per 100 words for every keyword"""
+
+        word_count = len(text.split())
+        return {
+            keyword: (count / word_count) * 100 if word_count > 0 else 0
+            for keyword, count in self.count(text).items()
+        }
+
+
+@lru_cache(maxsize=256)
+def _cached_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
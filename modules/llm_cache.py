@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class LLMResponseCache:
+    """Persistent SQLite cache for LLM responses with TTL expiry and size-bounded LRU eviction"""
+
+    def __init__(self, path: str = ':memory:', ttl: int = 7 * 24 * 3600, max_entries: int = 5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def make_key(model: str, temperature: float, max_tokens: int, messages: List[Dict],
+                 json_schema: Optional[Dict] = None) -> str:
+        """Content address of a request - identical prompts asking for the same output shape share an entry"""
+
+        request = {'model': model, 'temperature': temperature, 'max_tokens': max_tokens, 'messages': messages}
+        if json_schema is not None:
+            # Left out otherwise, so keys of requests without a schema stay as they were
+            request['json_schema'] = json_schema
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so creating the app never touches disk
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            if self.path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS llm_responses ('
+                ' key TEXT PRIMARY KEY,'
+                ' response TEXT NOT NULL,'
+                ' created_at REAL NOT NULL,'
+                ' last_access REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS ix_llm_responses_last_access ON llm_responses (last_access)')
+            self._conn.commit()
+
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response, or None on a miss or expired entry"""
+
+        now = time.time()
+
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute('SELECT response, created_at FROM llm_responses WHERE key = ?', (key,)).fetchone()
+
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                if row is not None:
+                    conn.execute('DELETE FROM llm_responses WHERE key = ?', (key,))
+                    conn.commit()
+                self.misses += 1
+                return None
+
+            conn.execute('UPDATE llm_responses SET last_access = ? WHERE key = ?', (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str) -> None:
+        """Store a response and evict least recently used entries beyond max_entries"""
+
+        now = time.time()
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_responses (key, response, created_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, response, now, now)
+            )
+
+            if self.max_entries:
+                conn.execute(
+                    'DELETE FROM llm_responses WHERE key IN ('
+                    ' SELECT key FROM llm_responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+
+            conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute('DELETE FROM llm_responses WHERE key = ?', (key,))
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute('DELETE FROM llm_responses')
+            conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for this process plus the current number of stored entries"""
+
+        with self._lock:
+            entries = self._connect().execute('SELECT COUNT(*) FROM llm_responses').fetchone()[0]
+
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,88 @@
+import importlib.util
+import threading
+from collections import Counter
+from typing import Dict
+
+import openai
+
+
+class ConnectionMetrics:
+    """
+    Counts requests and new connections on a pooled HTTP client
+
+    New connections are seen through httpcore's `trace` request extension, so
+    requests minus connections opened is how many requests reused a kept-alive one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def on_request(self, request) -> None:
+        request.extensions['trace'] = self.trace
+        with self._lock:
+            self._counts['requests'] += 1
+
+    def on_response(self, response) -> None:
+        with self._lock:
+            self._counts['responses'] += 1
+            if response.http_version == 'HTTP/2':
+                self._counts['http2_responses'] += 1
+
+    def trace(self, event: str, info: dict) -> None:
+        if event == 'connection.connect_tcp.complete':
+            key = 'connections_opened'
+        elif event == 'connection.start_tls.complete':
+            key = 'tls_handshakes'
+        else:
+            return
+        with self._lock:
+            self._counts[key] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            requests = self._counts['requests']
+            opened = self._counts['connections_opened']
+            return {
+                'requests': requests,
+                'responses': self._counts['responses'],
+                'connections_opened': opened,
+                'connections_reused': max(0, requests - opened),
+                'tls_handshakes': self._counts['tls_handshakes'],
+                'http2_responses': self._counts['http2_responses']
+            }
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install httpx[http2])"""
+
+    return importlib.util.find_spec('h2') is not None
+
+
+def create_http_client(max_connections: int = 20, max_keepalive_connections: int = 10,
+                       keepalive_expiry: float = 30.0, timeout: float = 60.0,
+                       connect_timeout: float = 5.0, http2: bool = True,
+                       metrics: ConnectionMetrics = None):
+    """
+    Keep-alive HTTP client for sharing between OpenAI clients
+
+    Uses the OpenAI library's own httpx client class so its defaults (redirects,
+    proxies from the environment) still apply. HTTP/2 is only enabled when h2 is
+    installed; without it the pool falls back to HTTP/1.1 keep-alive.
+    """
+
+    limits = type(openai.DEFAULT_CONNECTION_LIMITS)(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry
+    )
+    event_hooks = None
+    if metrics is not None:
+        event_hooks = {'request': [metrics.on_request], 'response': [metrics.on_response]}
+
+    return openai.DefaultHttpxClient(
+        limits=limits,
+        timeout=openai.Timeout(timeout, connect=connect_timeout),
+        http2=http2 and http2_available(),
+        event_hooks=event_hooks
+    )
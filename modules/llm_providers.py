@@ -0,0 +1,303 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+import openai
+
+from config import Config
+from modules.keyword_extractor import KeywordExtractor
+
+logger = logging.getLogger(__name__)
+
+_ANALYSIS_PROMPT_RE = re.compile(r'Job Description:\s*(.*?)\n\s*Please provide', re.DOTALL)
+_INSIGHTS_PROMPT_RE = re.compile(
+    r'JOB DESCRIPTION:\s*(.*?)\n\s*CURRENT RESUME:\s*(.*?)\n\s*CURRENT COVER LETTER:\s*(.*?)\n\s*Provide optimization',
+    re.DOTALL
+)
+
+
+STRUCTURED_OUTPUT_MODES = ('json_schema', 'json_object', 'off')
+
+
+class LLMProvider:
+    """
+    A chat completion backend
+
+    Subclasses implement complete(); stream() defaults to delivering the whole
+    completion as one fragment. rate_limited providers have their requests go
+    through the shared LLMScheduler.
+    """
+
+    name = 'base'
+    rate_limited = False
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def complete(self, messages: List[Dict], temperature: float, max_tokens: int,
+                 model: Optional[str] = None, json_schema: Optional[Dict] = None) -> str:
+        """
+        One completion; json_schema ({'name', 'schema'}) asks for a JSON object of that
+        shape where the backend can enforce it, and is ignored where it can't
+        """
+
+        raise NotImplementedError
+
+    def stream(self, messages: List[Dict], temperature: float, max_tokens: int,
+               model: Optional[str] = None, json_schema: Optional[Dict] = None) -> Iterator[str]:
+        yield self.complete(messages, temperature, max_tokens, model, json_schema)
+
+    def cache_id(self, model: str) -> str:
+        """Model name as used in response cache keys, so backends don't share answers"""
+
+        return f'{self.name}:{model}'
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    OpenAI, or any OpenAI-compatible server (vLLM, Ollama, llama.cpp server) via base_url
+
+    structured_output picks how JSON responses are requested: 'json_schema' (strict
+    structured outputs, gpt-4o and later), 'json_object' (JSON mode) or 'off'. A
+    server that rejects response_format is sent plain requests from then on.
+    """
+
+    name = 'openai'
+
+    def __init__(self, api_key: str = None, model: str = 'gpt-3.5-turbo', base_url: Optional[str] = None,
+                 http_client=None, max_retries: Optional[int] = None, structured_output: str = 'json_object'):
+        super().__init__(model)
+        self.base_url = base_url
+        # Local servers have no provider quota to respect
+        self.rate_limited = base_url is None
+
+        if structured_output not in STRUCTURED_OUTPUT_MODES:
+            raise ValueError(f"Unknown structured output mode: {structured_output}. "
+                             f"Allowed: {', '.join(STRUCTURED_OUTPUT_MODES)}")
+        self.structured_output = structured_output
+
+        # Set the API key
+        api_key = api_key or Config.OPENAI_API_KEY or os.getenv('OPENAI_API_KEY')
+        if not api_key and base_url:
+            api_key = 'not-needed'  # local servers ignore it, the client insists on one
+
+        if not api_key:
+            raise ValueError("OpenAI API key is required. Please set OPENAI_API_KEY environment variable.")
+
+        # Initialize OpenAI client with proper error handling
+        client_kwargs = {'api_key': api_key}
+        if base_url:
+            client_kwargs['base_url'] = base_url
+        if max_retries is not None:
+            client_kwargs['max_retries'] = max_retries
+        if http_client is not None:
+            # Shared keep-alive connection pool instead of one per client
+            client_kwargs['http_client'] = http_client
+        try:
+            self.client = openai.OpenAI(**client_kwargs)
+        except Exception as e:
+            logger.warning('Error initializing OpenAI client: %s', e)
+            # Fallback: try setting the API key globally (for older versions)
+            openai.api_key = api_key
+            self.client = None
+
+    def cache_id(self, model: str) -> str:
+        # Plain model name for OpenAI itself, so existing cache entries stay valid
+        return model if self.base_url is None else f'{self.base_url}:{model}'
+
+    def _response_format(self, json_schema: Optional[Dict]) -> Dict:
+        if json_schema is None or self.structured_output == 'off':
+            return {}
+        if self.structured_output == 'json_schema':
+            return {'response_format': {'type': 'json_schema', 'json_schema': {**json_schema, 'strict': True}}}
+        return {'response_format': {'type': 'json_object'}}
+
+    def _create(self, **kwargs):
+        """chat.completions.create, dropping response_format for good if the server rejects it"""
+
+        try:
+            return self.client.chat.completions.create(**kwargs)
+        except openai.BadRequestError as e:
+            if 'response_format' not in kwargs or not re.search(r'response_format|json_(schema|object)', str(e)):
+                raise
+            logger.warning('%s does not support %s output for %s; sending plain requests: %s',
+                           self.base_url or 'OpenAI', self.structured_output, kwargs.get('model'), e)
+            self.structured_output = 'off'
+            del kwargs['response_format']
+            return self.client.chat.completions.create(**kwargs)
+
+    def complete(self, messages, temperature, max_tokens, model=None, json_schema=None) -> str:
+        """Make OpenAI API request with fallback for different library versions"""
+
+        model = model or self.model
+        try:
+            if self.client:
+                # New OpenAI library (v1.0+)
+                response = self._create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **self._response_format(json_schema)
+                )
+                return response.choices[0].message.content
+            else:
+                # Fallback for older versions
+                response = openai.ChatCompletion.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+                return response.choices[0].message.content
+
+        except Exception as e:
+            logger.error('OpenAI API Error: %s', e)
+            raise e
+
+    def stream(self, messages, temperature, max_tokens, model=None, json_schema=None) -> Iterator[str]:
+        """Yield completion text fragments as the API streams them"""
+
+        if not self.client:
+            # Older library versions - no streaming, deliver the whole response at once
+            yield self.complete(messages, temperature, max_tokens, model)
+            return
+
+        try:
+            stream = self._create(
+                model=model or self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                **self._response_format(json_schema)
+            )
+            try:
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        yield content
+            finally:
+                # Also when the caller stops reading early: release the pooled connection
+                stream.close()
+
+        except Exception as e:
+            logger.error('OpenAI API Error: %s', e)
+            raise e
+
+
+class LlamaCppProvider(LLMProvider):
+    """In-process GGUF model through llama-cpp-python, for cheap low-latency calls"""
+
+    name = 'llama_cpp'
+
+    def __init__(self, model_path: str, model: Optional[str] = None, n_ctx: int = 4096,
+                 n_threads: Optional[int] = None):
+        try:
+            from llama_cpp import Llama
+        except ImportError as e:
+            raise ImportError("The llama_cpp provider needs llama-cpp-python: pip install llama-cpp-python") from e
+
+        super().__init__(model or os.path.basename(model_path))
+        self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        # One model instance can't serve two generations at once
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _response_format(json_schema: Optional[Dict]) -> Dict:
+        # Grammar-constrained sampling: the output can only be JSON of this shape
+        if json_schema is None:
+            return {}
+        return {'response_format': {'type': 'json_object', 'schema': json_schema['schema']}}
+
+    def complete(self, messages, temperature, max_tokens, model=None, json_schema=None) -> str:
+        with self._lock:
+            response = self.llm.create_chat_completion(messages=messages, temperature=temperature,
+                                                       max_tokens=max_tokens, **self._response_format(json_schema))
+        return response['choices'][0]['message']['content']
+
+    def stream(self, messages, temperature, max_tokens, model=None, json_schema=None) -> Iterator[str]:
+        with self._lock:
+            for chunk in self.llm.create_chat_completion(messages=messages, temperature=temperature,
+                                                         max_tokens=max_tokens, stream=True,
+                                                         **self._response_format(json_schema)):
+                content = chunk['choices'][0]['delta'].get('content')
+                if content:
+                    yield content
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic offline provider for tests, demos and load tests
+
+    Answers the analysis and insights prompts with the KeywordExtractor's results as
+    JSON (or with responder(messages) if given), after `latency` seconds.
+    """
+
+    name = 'fake'
+
+    def __init__(self, model: str = 'fake', latency: float = 0.0, chunk_size: int = 16,
+                 responder: Optional[Callable[[List[Dict]], str]] = None):
+        super().__init__(model)
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.responder = responder or self.default_response
+        self.calls = 0
+        # json_schema of the latest request (JSON is what this provider answers anyway)
+        self.last_json_schema = None
+        self._lock = threading.Lock()
+
+    def complete(self, messages, temperature, max_tokens, model=None, json_schema=None) -> str:
+        with self._lock:
+            self.calls += 1
+            self.last_json_schema = json_schema
+        if self.latency:
+            time.sleep(self.latency)
+        return self.responder(messages)
+
+    def stream(self, messages, temperature, max_tokens, model=None, json_schema=None) -> Iterator[str]:
+        text = self.complete(messages, temperature, max_tokens, model, json_schema)
+        for start in range(0, len(text), self.chunk_size):
+            yield text[start:start + self.chunk_size]
+
+    @staticmethod
+    def default_response(messages: List[Dict]) -> str:
+        extractor = KeywordExtractor()
+
+        # The latest prompt it recognises - a follow-up asking for missing fields gets the full answer again
+        for message in reversed(messages):
+            if message.get('role') != 'user':
+                continue
+            prompt = message.get('content') or ''
+
+            match = _INSIGHTS_PROMPT_RE.search(prompt)
+            if match:
+                job_description, resume, cover_letter = (part.strip() for part in match.groups())
+                return json.dumps(extractor.build_insights(extractor.analyze(job_description), resume, cover_letter))
+
+            match = _ANALYSIS_PROMPT_RE.search(prompt)
+            if match:
+                return json.dumps(extractor.analyze(match.group(1).strip()))
+
+        return '{}'
+
+
+PROVIDERS = {
+    'openai': OpenAIProvider,
+    'llama_cpp': LlamaCppProvider,
+    'fake': FakeProvider,
+}
+
+
+def create_provider(kind: str, **options) -> LLMProvider:
+    """Build a provider by name; options left as None fall back to the provider's defaults"""
+
+    if kind not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {kind}. Allowed: {', '.join(PROVIDERS)}")
+    return PROVIDERS[kind](**{key: value for key, value in options.items() if value is not None})
@@ -0,0 +1,211 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import openai
+
+# Lower runs first
+PRIORITIES = {'interactive': 0, 'bulk': 1}
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying"""
+
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return isinstance(error, (openai.APIConnectionError, ConnectionError, TimeoutError))
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the provider asked us to wait (Retry-After / retry-after-ms headers), if any"""
+
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms') is not None:
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after') is not None:
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class TokenBucket:
+    """Refills `per_minute` units evenly over a minute, holding at most a minute's worth"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)"""
+
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class LLMScheduler:
+    """
+    Shared admission control for LLM requests
+
+    Requests wait for a slot under requests-per-minute and tokens-per-minute token
+    buckets and a concurrency cap, interactive requests ahead of bulk ones. Retryable
+    failures are retried with jittered exponential backoff (honouring Retry-After),
+    and a 429 pauses admission for everyone so a burst doesn't keep hammering the
+    provider. Identical requests already in flight are coalesced into one call.
+    """
+
+    def __init__(self, requests_per_minute: int = 500, tokens_per_minute: int = 200_000,
+                 max_concurrency: int = 8, max_retries: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._condition = threading.Condition()
+        self._waiting = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._running = 0
+        self._paused_until = 0.0
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._stats = Counter()
+
+    def submit(self, func: Callable[[], Any], key: Optional[Hashable] = None,
+               estimated_tokens: int = 0, priority: str = 'interactive') -> Any:
+        """
+        Call func() once admitted and return its result, retrying retryable errors
+
+        Callers passing the same key while a call is in flight share its result
+        instead of sending the request again.
+        """
+
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}. Allowed: {', '.join(PRIORITIES)}")
+
+        if key is None:
+            return self._run(func, estimated_tokens, priority)
+
+        with self._condition:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._run(func, estimated_tokens, priority)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._condition:
+                self._in_flight.pop(key, None)
+
+    def _run(self, func: Callable[[], Any], estimated_tokens: int, priority: str) -> Any:
+        for attempt in itertools.count():
+            self._acquire(estimated_tokens, PRIORITIES[priority])
+            try:
+                return func()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    with self._condition:
+                        self._stats['failed'] += 1
+                    raise
+                delay = self._backoff(attempt, e)
+            finally:
+                self._release()
+
+            with self._condition:
+                self._stats['retries'] += 1
+            time.sleep(delay)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        requested = retry_after(error)
+        if requested is not None:
+            delay = min(self.max_delay, requested) + random.uniform(0, self.base_delay)
+        else:
+            # Full jitter keeps retrying clients from synchronising
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+        if getattr(error, 'status_code', None) == 429:
+            with self._condition:
+                self._stats['rate_limited'] += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def _acquire(self, estimated_tokens: int, rank: int) -> None:
+        entry = (rank, next(self._sequence))
+
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiting[0] == entry and self._running < self.max_concurrency:
+                        now = time.monotonic()
+                        timeout = max(
+                            self._paused_until - now,
+                            self._requests.wait_time(1, now),
+                            self._tokens.wait_time(estimated_tokens, now)
+                        )
+                        if timeout <= 0:
+                            heapq.heappop(self._waiting)
+                            self._requests.take(1)
+                            self._tokens.take(estimated_tokens)
+                            self._running += 1
+                            self._stats['requests'] += 1
+                            # The next waiter is now at the head
+                            self._condition.notify_all()
+                            return
+                    self._condition.wait(timeout)
+            except BaseException:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                raise
+
+    def _release(self) -> None:
+        with self._condition:
+            self._running -= 1
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {
+                'requests': self._stats['requests'],
+                'retries': self._stats['retries'],
+                'rate_limited': self._stats['rate_limited'],
+                'coalesced': self._stats['coalesced'],
+                'failed': self._stats['failed'],
+                'running': self._running,
+                'waiting': len(self._waiting)
+            }
@@ -0,0 +1,82 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+_JSON_TYPES = {str: 'string', int: 'integer', float: 'number', bool: 'boolean'}
+
+
+def to_json_schema(spec: Any) -> Dict:
+    """
+    JSON Schema for a json_extractor.conform spec
+
+    Every object property is required and no others are allowed, as OpenAI's strict
+    structured outputs demand; models answer [] or "" for what doesn't apply.
+    """
+
+    if isinstance(spec, dict):
+        return {
+            'type': 'object',
+            'properties': {key: to_json_schema(value) for key, value in spec.items()},
+            'required': list(spec),
+            'additionalProperties': False
+        }
+    if isinstance(spec, list):
+        return {'type': 'array', 'items': to_json_schema(spec[0])}
+    return {'type': _JSON_TYPES[spec]}
+
+
+class ResponseSchema:
+    """
+    Expected shape of one JSON response from the LLM
+
+    fields is a json_extractor.conform spec of the whole object; required names the
+    top-level fields the app can't do without - those are asked for again when the
+    model leaves them out.
+    """
+
+    def __init__(self, name: str, fields: Dict[str, Any], required: Iterable[str] = ()):
+        self.name = name
+        self.fields = fields
+        self.required = tuple(required)
+
+    def json_schema(self) -> Dict:
+        """{'name', 'schema'} as providers take it for structured output"""
+
+        return {'name': self.name, 'schema': to_json_schema(self.fields)}
+
+    def subset(self, keys: Iterable[str]) -> 'ResponseSchema':
+        keys = [key for key in keys if key in self.fields]
+        return ResponseSchema(self.name, {key: self.fields[key] for key in keys},
+                              [key for key in self.required if key in keys])
+
+    def fields_to_reask(self, data: Optional[Dict]) -> List[str]:
+        """
+        Required top-level fields absent from conformed data (every field when nothing
+        usable came back); gaps inside a field that is present are tolerated
+        """
+
+        if not data:
+            return list(self.fields)
+        return [key for key in self.required if key not in data]
+
+
+ANALYSIS_SCHEMA = ResponseSchema('job_analysis', {
+    'keywords': {'high_priority': [str], 'medium_priority': [str], 'low_priority': [str]},
+    'requirements': {
+        'technical_skills': [str], 'soft_skills': [str], 'education': [str],
+        'experience': [str], 'certifications': [str]
+    },
+    'experience_level': str,
+    'industry': str,
+    'company_culture': [str],
+    'job_type': str,
+    'salary_indicators': [str],
+    'location_requirements': [str]
+}, required=('keywords', 'requirements'))
+
+INSIGHTS_SCHEMA = ResponseSchema('optimization_insights', {
+    'resume_gaps': [str],
+    'cover_letter_gaps': [str],
+    'keyword_opportunities': [str],
+    'experience_matching': {'strong_matches': [str], 'weak_matches': [str], 'missing_experiences': [str]},
+    'ats_recommendations': [str],
+    'priority_actions': [str]
+}, required=('resume_gaps', 'cover_letter_gaps', 'keyword_opportunities', 'ats_recommendations', 'priority_actions'))
@@ -0,0 +1,165 @@
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from modules.document_parser import DocumentParser
+
+# Seconds a new worker process may take to start (imports included) before it counts as broken
+WORKER_START_TIMEOUT = 60.0
+
+
+def _args(source: Any) -> Tuple:
+    return source if isinstance(source, tuple) else (source,)
+
+
+def _serve(conn) -> None:
+    """Worker process loop: run (func, args) requests from conn until the parent goes away"""
+
+    conn.send(None)  # ready
+    while True:
+        try:
+            func, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        conn.send(None)  # unpickled the request (importing func's module if needed), parsing starts now
+        try:
+            reply = (True, func(*args))
+        except Exception as e:
+            reply = (False, str(e))
+        conn.send(reply)
+
+
+class _WorkerTimeout(Exception):
+    pass
+
+
+class _Worker:
+    """One parser process, driven over a pipe by a single thread at a time"""
+
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        if not self.conn.poll(WORKER_START_TIMEOUT):
+            self.stop()
+            raise _WorkerTimeout('worker did not start')
+        self.conn.recv()
+
+    def call(self, func: Callable, args: Tuple, timeout: float) -> Tuple[bool, Any]:
+        """(True, result) or (False, error message); the timeout starts when the worker gets the file"""
+
+        self.conn.send((func, args))
+        if not self.conn.poll(WORKER_START_TIMEOUT):
+            raise _WorkerTimeout('worker did not accept the file')
+        self.conn.recv()
+        if not self.conn.poll(timeout):
+            raise _WorkerTimeout()
+        return self.conn.recv()
+
+    def stop(self) -> None:
+        self.process.terminate()
+        self.process.join(1)
+        self.conn.close()
+
+
+class ParsePool:
+    """
+    Bounded process pool for parsing uploaded documents concurrently
+
+    pdfplumber is pure Python and CPU-bound, so parsing in worker processes lets the
+    files of one upload run in parallel instead of contending for the GIL. Each of
+    the `max_workers` dispatch threads owns one worker process; a file waits for a
+    free worker and then has `timeout` seconds of its own. A parse that runs over is
+    reported as a failure and only its worker is killed and replaced, so one
+    pathological PDF cannot hang the request, hold a worker or disturb other
+    requests' parses.
+
+    With max_workers=0 documents are parsed inline in the calling thread.
+    """
+
+    def __init__(self, max_workers: int = 3, timeout: float = 30.0, start_method: str = 'spawn'):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.start_method = start_method
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._workers: Set[_Worker] = set()
+        self._lock = threading.Lock()
+
+    def parse_many(self, paths: Dict[str, Any],
+                   parse: Callable[..., Dict] = DocumentParser.parse_document) -> Dict[str, Dict]:
+        """
+        Parse several files at once
+
+        Args:
+            paths: name -> file path, or a tuple of arguments for `parse` such as (bytes, file_type)
+            parse: picklable parse function, DocumentParser.parse_document by default
+
+        Returns:
+            name -> parse result, in the DocumentParser.parse_document format
+        """
+
+        if not paths:
+            return {}
+
+        if self.max_workers <= 0:
+            return {name: parse(*_args(path)) for name, path in paths.items()}
+
+        executor = self._get_executor()
+        futures = {name: executor.submit(self._parse, parse, _args(path)) for name, path in paths.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def _parse(self, parse: Callable, args: Tuple) -> Dict:
+        """Parse one file on this dispatch thread's worker process"""
+
+        worker = getattr(self._local, 'worker', None)
+        try:
+            if worker is None:
+                worker = self._local.worker = self._start_worker()
+            ok, value = worker.call(parse, args, self.timeout)
+        except _WorkerTimeout:
+            self._stop_worker(worker)
+            return {'success': False, 'error': f'Parsing timed out after {self.timeout:g} seconds'}
+        except (EOFError, OSError):
+            self._stop_worker(worker)
+            return {'success': False, 'error': 'Document parser process crashed'}
+        except Exception as e:
+            return {'success': False, 'error': f'Error parsing document: {str(e)}'}
+
+        if ok:
+            return value
+        return {'success': False, 'error': f'Error parsing document: {value}'}
+
+    def _start_worker(self) -> _Worker:
+        worker = _Worker(multiprocessing.get_context(self.start_method))
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _stop_worker(self, worker: Optional[_Worker]) -> None:
+        """Kill a stuck or dead worker; this thread starts a fresh one for its next file"""
+
+        self._local.worker = None
+        if worker is None:
+            return
+        with self._lock:
+            self._workers.discard(worker)
+        worker.stop()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='parse')
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        with self._lock:
+            workers, self._workers = self._workers, set()
+        for worker in workers:
+            worker.stop()
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+TERMINAL_EVENTS = ('done', 'error')
+
+
+class _Channel:
+    __slots__ = ('events', 'next_id', 'closed_at')
+
+    def __init__(self, history_size: int):
+        self.events = deque(maxlen=history_size)
+        self.next_id = 1
+        self.closed_at: Optional[float] = None
+
+
+class ProgressEventBroker:
+    """
+    In-process publish/subscribe for analysis progress
+
+    Each session gets a bounded event history so a subscriber that connects late
+    (or reconnects with Last-Event-ID) replays what it missed. Channels are dropped
+    `retention` seconds after their terminal event.
+    """
+
+    def __init__(self, history_size: int = 1000, retention: float = 300):
+        self.history_size = history_size
+        self.retention = retention
+        self._channels: Dict[str, _Channel] = {}
+        self._condition = threading.Condition()
+
+    def publish(self, session_id: str, event: str, data: Any = None) -> int:
+        """Append an event to the session's channel and wake up subscribers"""
+
+        with self._condition:
+            self._purge_expired()
+
+            channel = self._channels.get(session_id)
+            if channel is None or channel.closed_at is not None:
+                # A new run starts a fresh channel
+                channel = self._channels[session_id] = _Channel(self.history_size)
+
+            event_id = channel.next_id
+            channel.next_id += 1
+            channel.events.append((event_id, event, data))
+
+            if event in TERMINAL_EVENTS:
+                channel.closed_at = time.monotonic()
+
+            self._condition.notify_all()
+            return event_id
+
+    def reset(self, session_id: str) -> None:
+        """Forget a previous run's events before starting a new one"""
+
+        with self._condition:
+            self._channels.pop(session_id, None)
+
+    def has_channel(self, session_id: str) -> bool:
+        with self._condition:
+            return session_id in self._channels
+
+    def subscribe(self, session_id: str, last_event_id: int = 0,
+                  timeout: float = 2.0) -> Iterator[Optional[Tuple[int, str, Any]]]:
+        """
+        Yield (id, event, data) tuples after last_event_id until a terminal event
+
+        Yields None whenever `timeout` seconds pass without new events so the caller
+        can send a keep-alive or check for progress made in another process.
+        """
+
+        while True:
+            with self._condition:
+                pending = self._pending(session_id, last_event_id)
+                if not pending:
+                    self._condition.wait(timeout)
+                    pending = self._pending(session_id, last_event_id)
+
+            if not pending:
+                yield None
+                continue
+
+            for event_id, event, data in pending:
+                last_event_id = event_id
+                yield event_id, event, data
+                if event in TERMINAL_EVENTS:
+                    return
+
+    def _pending(self, session_id: str, last_event_id: int):
+        channel = self._channels.get(session_id)
+        if channel is None:
+            return []
+        return [item for item in channel.events if item[0] > last_event_id]
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [
+            session_id for session_id, channel in self._channels.items()
+            if channel.closed_at is not None and now - channel.closed_at > self.retention
+        ]
+        for session_id in expired:
+            del self._channels[session_id]
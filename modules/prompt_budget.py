@@ -0,0 +1,221 @@
+import functools
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from modules.text_normalizer import is_boilerplate, normalize_whitespace, split_sentences
+
+try:
+    import tiktoken
+except ImportError:  # optional - exact counts when installed, an estimate otherwise
+    tiktoken = None
+
+# Word pieces of up to six characters and single punctuation marks; slightly
+# over-counts English compared with the OpenAI tokenizers, which is the safe side
+_TOKEN_ESTIMATE_RE = re.compile(r'\w{1,6}|[^\w\s]')
+
+# Job posting sections that rarely say anything about the role itself
+_LOW_SIGNAL_HEADING_RE = re.compile(
+    r'^(?:about (?!(?:the|this) (?:role|job|position|opportunity))[\w&.-]+|who we are|'
+    r'our (?:story|mission|values|culture)|benefits|perks|what we offer|why (?:join|work)|'
+    r'equal (?:employment )?opportunity|eeo|diversity|how to apply|disclaimer)\b',
+    re.IGNORECASE
+)
+
+TRUNCATION_MARKER = '[...]'
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+
+def count_tokens(text: str, model: str = 'gpt-3.5-turbo') -> int:
+    """Prompt tokens in text - exact with tiktoken installed, a close over-estimate without"""
+
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(_TOKEN_ESTIMATE_RE.findall(text))
+
+
+def _is_heading(line: str) -> bool:
+    words = line.split()
+    return 0 < len(words) <= 6 and not line.endswith('.') and (line.endswith(':') or line.istitle() or line.isupper())
+
+
+def compact_text(text: str, job_posting: bool = False) -> str:
+    """
+    Lossless-ish compaction: collapse whitespace, drop blank and repeated lines
+
+    Resumes and cover letters only lose a line repeating the one before it - the
+    same title or bullet under two employers means something. Job postings lose
+    repeats anywhere, and EEO statements, application instructions and similar
+    boilerplate sentences as well.
+    """
+
+    lines = []
+    seen = set()
+
+    for line in (text or '').splitlines():
+        if job_posting:
+            line = ' '.join(sentence for sentence in split_sentences(line) if not is_boilerplate(sentence))
+        line = normalize_whitespace(line)
+        if not line:
+            continue
+        key = line.lower()
+        if job_posting:
+            if key in seen:
+                continue
+            seen.add(key)
+        elif lines and key == lines[-1].lower():
+            continue
+        lines.append(line)
+
+    return '\n'.join(lines)
+
+
+def drop_low_signal_sections(text: str) -> str:
+    """
+    Remove 'About Acme:', 'Benefits' and similar job posting sections, heading and body
+
+    Only a heading starts or ends a section; a body sentence opening with
+    "Benefits..." or "Diversity..." is kept along with what follows it.
+    """
+
+    kept = []
+    skipping = False
+
+    for line in text.splitlines():
+        if _is_heading(line):
+            skipping = bool(_LOW_SIGNAL_HEADING_RE.match(line))
+        if not skipping:
+            kept.append(line)
+
+    return '\n'.join(kept)
+
+
+def truncate_to_tokens(text: str, budget: int, model: str = 'gpt-3.5-turbo') -> str:
+    """Keep whole lines from the top (most recent experience, key requirements) within budget"""
+
+    if count_tokens(text, model) <= budget:
+        return text
+
+    budget -= count_tokens(TRUNCATION_MARKER, model) + 1
+    kept = []
+    used = 0
+
+    for line in text.splitlines():
+        cost = count_tokens(line, model) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+
+    kept.append(TRUNCATION_MARKER)
+    return '\n'.join(kept)
+
+
+def allocate(sizes: Dict[str, int], weights: Dict[str, float], budget: int) -> Dict[str, int]:
+    """
+    Split a token budget between parts by weight
+
+    Parts smaller than their share keep their full size and the surplus is shared
+    among the rest, so a short cover letter leaves more room for the resume.
+    """
+
+    allocation = {}
+    remaining = dict(sizes)
+
+    while remaining:
+        total_weight = sum(weights[name] for name in remaining)
+        fits = {name: size for name, size in remaining.items()
+                if size <= budget * weights[name] / total_weight}
+        if not fits:
+            for name in remaining:
+                allocation[name] = int(budget * weights[name] / total_weight)
+            break
+        for name, size in fits.items():
+            allocation[name] = size
+            budget -= size
+            del remaining[name]
+
+    return allocation
+
+
+class PromptBudget:
+    """
+    Token counting and compaction for the documents pasted into a prompt
+
+    Every part is compacted; when the total is still over max_prompt_tokens, job
+    posting sections like 'About us' and 'Benefits' are dropped and then each part is
+    cut to its weighted share of the budget. Totals of tokens saved are kept for stats.
+    """
+
+    # Share of the budget each part gets when everything doesn't fit
+    WEIGHTS = {'job_description': 0.35, 'resume': 0.45, 'cover_letter': 0.2}
+
+    def __init__(self, max_prompt_tokens: int = 6000, max_completion_tokens: int = 1500,
+                 model: str = 'gpt-3.5-turbo'):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_completion_tokens = max_completion_tokens
+        self.model = model
+        self._lock = threading.Lock()
+        self._totals = Counter()
+
+    def fit(self, job_description: str, resume: str,
+            cover_letter: str) -> Tuple[Dict[str, str], Dict[str, object]]:
+        """Compacted (and if needed trimmed) parts, plus a report of the tokens saved"""
+
+        parts = {'job_description': job_description or '', 'resume': resume or '', 'cover_letter': cover_letter or ''}
+        before = {name: count_tokens(text, self.model) for name, text in parts.items()}
+
+        compacted = {name: compact_text(text, job_posting=name == 'job_description') for name, text in parts.items()}
+        sizes = {name: count_tokens(text, self.model) for name, text in compacted.items()}
+        trimmed: List[str] = []
+
+        if sum(sizes.values()) > self.max_prompt_tokens:
+            compacted['job_description'] = drop_low_signal_sections(compacted['job_description'])
+            sizes['job_description'] = count_tokens(compacted['job_description'], self.model)
+
+        if sum(sizes.values()) > self.max_prompt_tokens:
+            allocation = allocate(sizes, self.WEIGHTS, self.max_prompt_tokens)
+            for name, size in sizes.items():
+                if size > allocation[name]:
+                    compacted[name] = truncate_to_tokens(compacted[name], allocation[name], self.model)
+                    sizes[name] = count_tokens(compacted[name], self.model)
+                    trimmed.append(name)
+
+        report = {
+            'tokens_before': sum(before.values()),
+            'tokens_after': sum(sizes.values()),
+            'tokens_saved': sum(before.values()) - sum(sizes.values()),
+            'parts': {name: {'before': before[name], 'after': sizes[name]} for name in parts},
+            'trimmed': trimmed
+        }
+
+        with self._lock:
+            self._totals['requests'] += 1
+            self._totals['tokens_before'] += report['tokens_before']
+            self._totals['tokens_saved'] += report['tokens_saved']
+            self._totals['trimmed_requests'] += bool(trimmed)
+
+        return compacted, report
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'requests': self._totals['requests'],
+                'tokens_before': self._totals['tokens_before'],
+                'tokens_saved': self._totals['tokens_saved'],
+                'trimmed_requests': self._totals['trimmed_requests'],
+                'exact_counts': tiktoken is not None
+            }
@@ -0,0 +1,124 @@
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from werkzeug.wsgi import ClosingIterator
+
+
+def _slug(value: str) -> str:
+    return re.sub(r'[^A-Za-z0-9-]+', '_', value).strip('_')[:80] or 'root'
+
+
+class ProfilingMiddleware:
+    """
+    WSGI middleware keeping cProfile dumps of slow or sampled requests
+
+    With slow_threshold set every request is profiled and the profile kept when the
+    request took at least that many seconds - so all traffic pays cProfile's overhead
+    (often 1.5-2x on Python-heavy requests) while it is set; otherwise a sample_rate
+    fraction of requests is profiled and kept. A request lasts until the server closes
+    its response, so streamed bodies (bulk NDJSON, SSE) are profiled and timed in full.
+    Profiles are written to output_dir as
+    <time>_<ms>ms_<METHOD>_<route>[_<session id>].prof (load them with pstats or
+    snakeviz) and only the newest max_profiles are retained.
+
+    Only the thread serving the request is profiled: work in parse worker processes
+    or LLM threads shows up as time spent waiting on them.
+    """
+
+    def __init__(self, app, output_dir: str, slow_threshold: Optional[float] = None, sample_rate: float = 0.0,
+                 max_profiles: int = 50,
+                 describe: Optional[Callable[[dict, List[Tuple[str, str]]], Tuple[str, Optional[str]]]] = None):
+        self.app = app
+        self.output_dir = output_dir
+        self.slow_threshold = slow_threshold
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        # (environ, response headers) -> (route, session id) for the file name
+        self.describe = describe or (lambda environ, headers: (environ.get('PATH_INFO', ''), None))
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def __call__(self, environ, start_response):
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not sampled and self.slow_threshold is None:
+            return self.app(environ, start_response)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active (Python 3.12+ allows one at a time)
+            return self.app(environ, start_response)
+
+        response_headers = []
+
+        def capture_start_response(status, headers, exc_info=None):
+            response_headers[:] = headers
+            return start_response(status, headers, exc_info)
+
+        started = time.perf_counter()
+        finished = []
+
+        def finish():
+            if finished:
+                return
+            finished.append(True)
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+            if sampled or elapsed >= self.slow_threshold:
+                self._save(profiler, environ, response_headers, elapsed)
+
+        try:
+            app_iter = self.app(environ, capture_start_response)
+        except BaseException:
+            finish()
+            raise
+        # The body may still be generated while the server iterates it; stop when it's closed
+        return ClosingIterator(app_iter, finish)
+
+    def _save(self, profiler: cProfile.Profile, environ: dict, headers: List[Tuple[str, str]], elapsed: float) -> None:
+        try:
+            route, session_id = self.describe(environ, headers)
+        except Exception:
+            route, session_id = environ.get('PATH_INFO', ''), None
+
+        name = '_'.join(filter(None, (
+            time.strftime('%Y%m%dT%H%M%S'),
+            f'{round(elapsed * 1000)}ms',
+            environ.get('REQUEST_METHOD', 'GET'),
+            _slug(route),
+            _slug(session_id) if session_id else None
+        )))
+        with self._lock:
+            path = os.path.join(self.output_dir, name + '.prof')
+            suffix = 1
+            while os.path.exists(path):
+                path = os.path.join(self.output_dir, f'{name}-{suffix}.prof')
+                suffix += 1
+            profiler.dump_stats(path)
+            self._prune()
+
+    def _prune(self) -> None:
+        """Delete the oldest profiles beyond max_profiles"""
+
+        profiles = sorted(
+            (entry for entry in os.scandir(self.output_dir) if entry.name.endswith('.prof')),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def profiles(self) -> List[str]:
+        """Paths of the retained profiles, newest first"""
+
+        with self._lock:
+            entries = [entry for entry in os.scandir(self.output_dir) if entry.name.endswith('.prof')]
+        return [entry.path for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime, reverse=True)]
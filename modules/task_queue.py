@@ -0,0 +1,149 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TaskQueue:
+    """Runs background jobs on Celery when Redis is available, otherwise on an in-process thread pool"""
+
+    BACKENDS = ('auto', 'celery', 'thread', 'sync')
+
+    def __init__(self, app=None):
+        self.app = None
+        self.celery = None
+        self._tasks: Dict[str, Callable] = {}
+        self._celery_tasks = {}
+        self._backend: Optional[str] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['task_queue'] = self
+
+    def task(self, func: Callable) -> Callable:
+        """Register a function as a background task under its own name"""
+
+        self._tasks[func.__name__] = func
+        return func
+
+    @property
+    def backend(self) -> str:
+        """Backend in use, resolved on first use so config overrides made after create_app apply"""
+
+        if self._backend is None:
+            self._backend = self._resolve_backend()
+        return self._backend
+
+    def _resolve_backend(self) -> str:
+        backend = self.app.config.get('TASK_QUEUE_BACKEND', 'auto')
+
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown TASK_QUEUE_BACKEND: {backend}. Allowed: {', '.join(self.BACKENDS)}")
+
+        if backend in ('auto', 'celery'):
+            if self._redis_available():
+                self.make_celery()
+                # Jobs sent to a broker nobody consumes would sit in 'queued' forever
+                if backend == 'celery' or self._workers_available():
+                    return 'celery'
+                logger.warning('No Celery worker answered, using the in-process task queue')
+                self._count('task_queue_fallbacks', reason='no_worker')
+            elif backend == 'celery':
+                logger.warning('Redis is not reachable, falling back to in-process task queue')
+                self._count('task_queue_fallbacks', reason='no_redis')
+            return 'thread'
+
+        return backend
+
+    def _redis_available(self) -> bool:
+        try:
+            import redis
+            import celery  # noqa: F401
+        except ImportError:
+            return False
+
+        try:
+            client = redis.Redis.from_url(self.app.config['REDIS_URL'], socket_connect_timeout=0.5)
+            return bool(client.ping())
+        except Exception:
+            return False
+
+    def _workers_available(self) -> bool:
+        try:
+            return bool(self.celery.control.ping(timeout=1.0))
+        except Exception:
+            return False
+
+    def make_celery(self):
+        """Create the Celery app and register every task on it (also used by celery_worker.py)"""
+
+        if self.celery is not None:
+            return self.celery
+
+        from celery import Celery
+
+        broker_url = self.app.config['REDIS_URL']
+        self.celery = Celery(self.app.import_name, broker=broker_url, backend=broker_url)
+
+        for name in self._tasks:
+            self._celery_tasks[name] = self.celery.task(name=name)(self._make_runner(name))
+
+        return self.celery
+
+    def _make_runner(self, name: str) -> Callable:
+        def runner(*args):
+            return self._run(name, *args)
+        runner.__name__ = name
+        return runner
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.app.config.get('TASK_QUEUE_WORKERS', 4),
+                thread_name_prefix='task-queue'
+            )
+        return self._executor
+
+    def _run(self, name: str, *args):
+        """Run a task inside its own application context"""
+
+        with self.app.app_context():
+            try:
+                return self._tasks[name](*args)
+            except Exception as e:
+                logger.exception('Background task %s failed: %s', name, e)
+                self._count('task_failures', task=name)
+                raise
+
+    def _count(self, name: str, **labels) -> None:
+        """Bump an instrumentation counter, if the app has instrumentation"""
+
+        instrumentation = self.app.extensions.get('instrumentation')
+        if instrumentation is not None:
+            instrumentation.count(name, **labels)
+
+    def enqueue(self, name: str, *args) -> None:
+        """Submit a registered task for background execution"""
+
+        if name not in self._tasks:
+            raise KeyError(f"Unknown task: {name}")
+
+        backend = self.backend
+
+        if backend == 'celery':
+            self._celery_tasks[name].delay(*args)
+        elif backend == 'thread':
+            self._get_executor().submit(self._run, name, *args)
+        else:
+            # 'sync' runs inline - used by tests and single-process debugging, so failures surface
+            self._run(name, *args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,54 @@
+import hashlib
+import re
+from typing import List
+
+# Sentences that appear in most job postings and say nothing about the role
+BOILERPLATE_PATTERNS = [
+    r'equal (?:employment )?opportunity',
+    r'\beeo\b',
+    r'without regard to (?:race|age|religion|sex|gender|national origin|disability)',
+    r'affirmative action',
+    r'reasonable accommodations?',
+    r'\be-?verify\b',
+    r'protected (?:veteran|characteristic|class)',
+    r'we (?:do not|don\'t) accept unsolicited',
+    r'recruitment agenc(?:y|ies)',
+    r'(?:click|press) (?:the )?apply',
+    r'apply (?:now|today)',
+]
+
+_BOILERPLATE_RE = re.compile('|'.join(BOILERPLATE_PATTERNS), re.IGNORECASE)
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences and lines, dropping empty fragments"""
+
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT_RE.split(text or '') if sentence.strip()]
+
+
+def is_boilerplate(sentence: str) -> bool:
+    return bool(_BOILERPLATE_RE.search(sentence))
+
+
+def strip_boilerplate(text: str) -> str:
+    """Remove EEO statements, application instructions and similar boilerplate sentences"""
+
+    return '\n'.join(sentence for sentence in split_sentences(text) if not is_boilerplate(sentence))
+
+
+def normalize_whitespace(text: str) -> str:
+    return _WHITESPACE_RE.sub(' ', text or '').strip()
+
+
+def normalize_job_description(text: str) -> str:
+    """Canonical form of a job posting: boilerplate removed, lowercased, whitespace collapsed"""
+
+    return normalize_whitespace(strip_boilerplate(text)).lower()
+
+
+def job_description_hash(text: str) -> str:
+    """SHA-256 of the normalized posting, so trivially different copies share one analysis"""
+
+    return hashlib.sha256(normalize_job_description(text).encode('utf-8')).hexdigest()
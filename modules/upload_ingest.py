@@ -0,0 +1,138 @@
+import codecs
+import hashlib
+import io
+import os
+import tempfile
+from typing import Optional
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# Leading bytes of each supported format; DOCX files are ZIP archives
+SIGNATURES = (
+    (b'%PDF-', 'pdf'),
+    (b'PK\x03\x04', 'docx'),
+)
+# Unicode text that may contain NUL bytes (UTF-16/32) announces itself with a byte order mark
+TEXT_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+SNIFF_SIZE = 512
+
+
+def sniff_file_type(head: bytes) -> Optional[str]:
+    """File type from the first bytes of a file, or None for unrecognised binary data"""
+
+    for signature, file_type in SIGNATURES:
+        if head.startswith(signature):
+            return file_type
+    if head.startswith(TEXT_BOMS) or b'\x00' not in head:
+        return 'txt'
+    return None
+
+
+class IngestBuffer(io.RawIOBase):
+    """
+    Upload container filled by Werkzeug while it reads the request body
+
+    Hashes, size-checks and sniffs the file in the same pass that stores it. Small
+    files stay in memory; larger ones spill to a temporary file in the upload folder
+    so DocumentStore can move them into place without copying.
+    """
+
+    def __init__(self, spill_dir: str, memory_limit: int, max_size: Optional[int] = None):
+        super().__init__()
+        self.spill_dir = spill_dir
+        self.memory_limit = memory_limit
+        self.max_size = max_size
+        self.size = 0
+        self.head = b''
+        self.spill_path: Optional[str] = None
+        self._claimed = False
+        self._digest = hashlib.sha256()
+        self._file = io.BytesIO()
+
+    # Write side, used by the form parser
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise RequestEntityTooLarge(f'Uploaded file exceeds {self.max_size} bytes')
+
+        if len(self.head) < SNIFF_SIZE:
+            self.head += bytes(data[:SNIFF_SIZE - len(self.head)])
+        self._digest.update(data)
+
+        if self.spill_path is None and self.size > self.memory_limit:
+            self._spill()
+        return self._file.write(data)
+
+    def _spill(self) -> None:
+        os.makedirs(self.spill_dir, exist_ok=True)
+        fd, self.spill_path = tempfile.mkstemp(dir=self.spill_dir, suffix='.part')
+        spilled = os.fdopen(fd, 'w+b')
+        spilled.write(self._file.getbuffer())
+        self._file = spilled
+
+    # Read side, used by FileStorage
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        return self._file.readinto(buffer)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    # Results
+
+    @property
+    def content_hash(self) -> str:
+        return self._digest.hexdigest()
+
+    @property
+    def file_type(self) -> Optional[str]:
+        return sniff_file_type(self.head)
+
+    @property
+    def in_memory(self) -> bool:
+        return self.spill_path is None
+
+    def getvalue(self) -> bytes:
+        """The upload's bytes (in-memory uploads only; BytesIO shares rather than copies them)"""
+
+        return self._file.getvalue()
+
+    def detach_spill(self) -> str:
+        """Hand the spilled temporary file over to the caller, who must move or delete it"""
+
+        self._file.close()
+        self._claimed = True
+        return self.spill_path
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+            if self.spill_path is not None and not self._claimed and os.path.exists(self.spill_path):
+                os.unlink(self.spill_path)
+        super().close()
+
+
+class IngestRequest(Request):
+    """Request whose uploaded files stream into IngestBuffers instead of Werkzeug's spooled temp files"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        config = current_app.config
+        return IngestBuffer(
+            spill_dir=config['UPLOAD_FOLDER'],
+            memory_limit=config.get('UPLOAD_MEMORY_LIMIT', 1024 * 1024),
+            max_size=config.get('MAX_UPLOAD_FILE_SIZE') or config.get('MAX_CONTENT_LENGTH')
+        )
@@ -3,11 +3,13 @@ import pytest
 import tempfile
 import os
 import shutil
+import threading
 from unittest.mock import Mock, patch
 import json
 import uuid
 from app import create_app
 from database.models import db, ProcessingSession, DocumentVersion, FeedbackHistory
+from tests.fake_openai import FakeOpenAIServer
 
 @pytest.fixture
 def app():
@@ -25,8 +27,8 @@ def app():
     # Create temporary database file
     db_fd, db_path = tempfile.mkstemp()
     
-    app = create_app('development')
-    app.config.update({
+    # Overrides apply before Flask-SQLAlchemy builds the engine, so the suite never touches instance/
+    app = create_app('development', overrides={
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
         'WTF_CSRF_ENABLED': False,
@@ -36,7 +38,9 @@ def app():
         'TEMP_FOLDER': temp_test_dir,
         'MAX_CONTENT_LENGTH': 16 * 1024 * 1024,
         'ALLOWED_EXTENSIONS': {'pdf', 'docx', 'txt'},
-        'OPENAI_API_KEY': 'test-api-key'  # Mock API key for testing
+        'OPENAI_API_KEY': 'test-api-key',  # Mock API key for testing
+        'TASK_QUEUE_BACKEND': 'sync',  # Run background jobs inline
+        'PARSE_POOL_WORKERS': 0  # Parse inline so the mocked DocumentParser applies
     })
     
     # Create the database and tables
@@ -48,6 +52,9 @@ def app():
     # Clean up temporary files
     os.close(db_fd)
     os.unlink(db_path)
+    for suffix in ('-wal', '-shm'):  # WAL mode side files
+        if os.path.exists(db_path + suffix):
+            os.unlink(db_path + suffix)
     shutil.rmtree(temp_dir)
 
 @pytest.fixture
@@ -186,4 +193,15 @@ def sample_files():
     yield files
     
     # Cleanup
-    shutil.rmtree(temp_dir)
\ No newline at end of file
+    shutil.rmtree(temp_dir)
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """Fake OpenAI server the client is pointed at through OPENAI_BASE_URL."""
+    server = FakeOpenAIServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv('OPENAI_BASE_URL', server.url)
+    yield server
+    server.shutdown()
+    server.server_close()
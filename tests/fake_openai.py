@@ -0,0 +1,75 @@
+# tests/fake_openai.py - Local fake OpenAI chat completions server for tests and benchmarks
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Chat completions endpoint answering with scripted status codes, then 200s."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeOpenAIHandler)
+        self.statuses = []  # consumed one per request before answering 200
+        self.delay = 0.0
+        self.error_message = None  # body of scripted errors; defaults to 'status <code>'
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/v1'
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so clients can reuse connections
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server = self.server
+        with server.lock:
+            server.requests.append(body)
+            status = server.statuses.pop(0) if server.statuses else 200
+        time.sleep(server.delay)
+
+        if status != 200:
+            message = server.error_message or f'status {status}'
+            payload = json.dumps({'error': {'message': message, 'type': 'rate_limit'}}).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        content = 'Echo: ' + body['messages'][-1]['content']
+        if body.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            # No length up front; the stream ends when the connection closes
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+            self.end_headers()
+            for word in content.split(' '):
+                chunk = {'id': 'c1', 'object': 'chat.completion.chunk', 'created': 0, 'model': body['model'],
+                         'choices': [{'index': 0, 'delta': {'content': word + ' '}, 'finish_reason': None}]}
+                self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+            self.wfile.write(b'data: [DONE]\n\n')
+            return
+
+        payload = json.dumps({
+            'id': 'c1', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 5, 'completion_tokens': 5, 'total_tokens': 10}
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
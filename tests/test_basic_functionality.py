@@ -2,6 +2,7 @@
 import pytest
 import os
 import json
+import socket
 import uuid
 from database.models import ProcessingSession, DocumentVersion
 from unittest.mock import Mock
@@ -158,13 +159,69 @@ class TestAPIEndpoints:
         """Test document analysis API endpoint."""
         response = client.post(f'/api/analyze/{sample_session}')
         
+        # Analysis is queued and the client polls the status URL
+        assert response.status_code == 202
+        data = response.get_json()
+        assert data['success'] is True
+        assert data['status_url'] == f'/api/analyze/{sample_session}/status'
+        
+        response = client.get(data['status_url'])
         assert response.status_code == 200
         data = response.get_json()
         assert data['success'] is True
+        assert data['status'] == 'completed'
+        assert data['progress'] == 100
         assert 'analysis' in data
         assert 'insights' in data
         assert 'scores' in data
 
+    def test_analyze_endpoint_local_mode(self, client, app, sample_session):
+        """Test the no-LLM mode analyses the posting with the offline extractor."""
+        app.config['ANALYSIS_MODE'] = 'local'
+        client.post(f'/api/analyze/{sample_session}')
+        
+        data = client.get(f'/api/analyze/{sample_session}/status').get_json()
+        assert data['status'] == 'completed'
+        assert 'python' in data['analysis']['keywords']['high_priority']
+        assert data['insights']['resume_gaps'] is not None
+
+    def test_analyze_falls_back_to_local_extraction(self, client, app, sample_session):
+        """Test API errors fall back to keywords from the posting, not a fixed list."""
+        # A port nothing listens on: every LLM call fails with a connection error
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        app.config.update({'LLM_BASE_URL': f'http://127.0.0.1:{port}/v1', 'LLM_MAX_RETRIES': 0,
+                           'LLM_CACHE_ENABLED': False})
+        client.post(f'/api/analyze/{sample_session}')
+        
+        data = client.get(f'/api/analyze/{sample_session}/status').get_json()
+        assert data['status'] == 'completed'
+        keywords = [k for bucket in data['analysis']['keywords'].values() for k in bucket]
+        assert 'python' in keywords
+        assert 'docker' not in keywords
+
+    def test_analysis_status_reports_stages(self, client, sample_session):
+        """Test status endpoint before analysis has been queued."""
+        response = client.get(f'/api/analyze/{sample_session}/status')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['status'] == 'uploaded'
+        assert data['progress'] == 0
+        assert data['stages'] == {
+            'analyzing_job': 'pending',
+            'generating_insights': 'pending',
+            'scoring': 'pending'
+        }
+
+    def test_analysis_status_with_invalid_session(self, client):
+        """Test status endpoint with invalid session ID."""
+        fake_id = str(uuid.uuid4())
+        response = client.get(f'/api/analyze/{fake_id}/status')
+        data = response.get_json()
+        assert data['success'] is False
+
     def test_analyze_endpoint_with_invalid_session(self, client):
         """Test analysis endpoint with invalid session ID."""
         fake_id = str(uuid.uuid4())
@@ -288,8 +345,8 @@ class TestErrorHandling:
         # Should redirect back to index with error message
         assert response.status_code == 302
 
-    def test_job_analyzer_failure(self, client, sample_session, mock_job_analyzer):
-        """Test handling when job analysis fails."""
+    def test_job_analyzer_failure(self, client, app, sample_session, mock_job_analyzer):
+        """Test a failed LLM analysis falls back to local extraction that isn't reused."""
         # Configure mock to return failure
         mock_job_analyzer.analyze_job_description.return_value = {
             'success': False,
@@ -297,11 +354,54 @@ class TestErrorHandling:
         }
         
         response = client.post(f'/api/analyze/{sample_session}')
+        assert response.status_code == 202
         
-        assert response.status_code == 200
+        response = client.get(f'/api/analyze/{sample_session}/status')
         data = response.get_json()
-        assert data['success'] is False
-        assert 'error' in data
+        assert data['status'] == 'completed'
+        assert 'python' in data['analysis']['keywords']['high_priority']
+        with app.app_context():
+            assert ProcessingSession.query.get(sample_session).job_description.get_analysis() is None
+    
+    def test_job_analyzer_misconfigured(self, client, app, sample_session):
+        """Test an analyzer that can't be created falls back to local extraction."""
+        app.config['LLM_PROVIDER'] = 'no-such-provider'
+        client.post(f'/api/analyze/{sample_session}')
+        
+        data = client.get(f'/api/analyze/{sample_session}/status').get_json()
+        assert data['status'] == 'completed'
+        assert data['insights']['resume_gaps'] is not None
+
+    def test_unexpected_analysis_error_can_be_retried(self, client, sample_session, mock_job_analyzer, monkeypatch):
+        """Test an exception mid-analysis fails the running stage instead of leaving it stuck."""
+        monkeypatch.setattr(ProcessingSession, 'set_scores', Mock(side_effect=RuntimeError('disk full')))
+        client.post(f'/api/analyze/{sample_session}')
+        
+        data = client.get(f'/api/analyze/{sample_session}/status').get_json()
+        assert data['status'] == 'failed'
+        assert data['stages']['scoring'] == 'failed'
+        assert data['error'] == 'Analysis error: disk full'
+        
+        monkeypatch.undo()
+        client.post(f'/api/analyze/{sample_session}')
+        assert client.get(f'/api/analyze/{sample_session}/status').get_json()['status'] == 'completed'
+
+    def test_stale_queued_session_is_requeued(self, client, app, sample_session, mock_job_analyzer):
+        """Test a session stuck in 'queued' runs again once it is older than ANALYSIS_STALE_AFTER."""
+        from database.models import db
+        with app.app_context():
+            session = ProcessingSession.query.get(sample_session)
+            session.status = 'queued'
+            db.session.commit()
+        
+        client.post(f'/api/analyze/{sample_session}')
+        assert client.get(f'/api/analyze/{sample_session}/status').get_json()['status'] == 'queued'
+        assert mock_job_analyzer.analyze_job_description.call_count == 0
+        
+        app.config['ANALYSIS_STALE_AFTER'] = 0
+        client.post(f'/api/analyze/{sample_session}')
+        assert client.get(f'/api/analyze/{sample_session}/status').get_json()['status'] == 'completed'
+        assert mock_job_analyzer.analyze_job_description.call_count == 1
 
     def test_missing_job_description(self, client):
         """Test upload without job description (file or text)."""
@@ -312,4 +412,115 @@ class TestErrorHandling:
         }
         
         response = client.post('/upload', data=data, content_type='multipart/form-data')
-        assert response.status_code == 302  # Redirect with error
\ No newline at end of file
+        assert response.status_code == 302  # Redirect with error
+
+
+class TestJobDescriptionDedupe:
+    """Test job postings are stored and analysed once across sessions."""
+    
+    def test_equivalent_postings_share_one_row(self, app):
+        """Test whitespace, case and EEO boilerplate don't create new rows."""
+        from database.models import db, JobDescription
+        with app.app_context():
+            first = ProcessingSession(id=str(uuid.uuid4()), job_description_text="Python Developer\n\nBuild REST APIs.")
+            second = ProcessingSession(
+                id=str(uuid.uuid4()),
+                job_description_text="python developer   build rest apis.\nWe are an Equal Opportunity Employer."
+            )
+            db.session.add_all([first, second])
+            db.session.commit()
+            
+            assert JobDescription.query.count() == 1
+            assert first.job_description_id == second.job_description_id
+            assert second.job_description_text == "Python Developer\n\nBuild REST APIs."
+    
+    def test_job_fields_set_in_any_order(self, app):
+        """Test job-level fields can be passed before the job description text."""
+        from database.models import db
+        with app.app_context():
+            session = ProcessingSession(
+                id=str(uuid.uuid4()),
+                extracted_keywords='{"high_priority": ["python"]}',
+                job_requirements='{"technical_skills": ["Python"]}',
+                job_description_text="Python developer position"
+            )
+            db.session.add(session)
+            db.session.commit()
+            
+            assert session.job_description.keywords == '{"high_priority": ["python"]}'
+            assert session.job_requirements == '{"technical_skills": ["Python"]}'
+    
+    def test_job_fields_need_a_job_description(self, app):
+        """Test setting job-level fields without a posting fails clearly."""
+        with app.app_context():
+            session = ProcessingSession(id=str(uuid.uuid4()))
+            with pytest.raises(ValueError, match='without a job description'):
+                session.extracted_keywords = '{}'
+            with pytest.raises(ValueError, match='without a job description'):
+                session.job_requirements = '{}'
+    
+    def test_posting_is_analysed_once(self, client, app, mock_job_analyzer):
+        """Test a second candidate for the same posting reuses the stored analysis."""
+        from database.models import db
+        with app.app_context():
+            session_ids = []
+            for resume in ('Resume one', 'Resume two'):
+                session = ProcessingSession(
+                    id=str(uuid.uuid4()),
+                    job_description_text="Python developer position",
+                    original_resume_text=resume,
+                    original_cover_letter_text="Cover letter"
+                )
+                db.session.add(session)
+                session_ids.append(session.id)
+            db.session.commit()
+        
+        for session_id in session_ids:
+            client.post(f'/api/analyze/{session_id}')
+            data = client.get(f'/api/analyze/{session_id}/status').get_json()
+            assert data['status'] == 'completed'
+            assert data['analysis']['keywords']['high_priority'] == ['python', 'sql', 'api']
+        
+        assert mock_job_analyzer.analyze_job_description.call_count == 1
+        assert mock_job_analyzer.extract_optimization_insights.call_count == 2
+
+class TestUploadDedupe:
+    """Test identical uploads are stored and parsed once."""
+    
+    def _upload(self, client, resume=b'Resume content', cover_letter=b'Cover letter content'):
+        data = {
+            'resume': (BytesIO(resume), 'resume.txt'),
+            'cover_letter': (BytesIO(cover_letter), 'cover_letter.txt'),
+            'job_description_text': 'Python developer position'
+        }
+        return client.post('/upload', data=data, content_type='multipart/form-data')
+    
+    def test_reupload_skips_parsing_and_writes(self, client, app, mock_document_parser):
+        """Test a re-uploaded resume reuses the stored file and cached parse."""
+        assert self._upload(client).status_code == 302
+        assert mock_document_parser.parse_document.call_count == 2
+        files = sorted(os.listdir(app.config['UPLOAD_FOLDER']))
+        
+        assert self._upload(client, cover_letter=b'A different cover letter').status_code == 302
+        
+        # Only the new cover letter was parsed and written
+        assert mock_document_parser.parse_document.call_count == 3
+        assert len(os.listdir(app.config['UPLOAD_FOLDER'])) == len(files) + 1
+        
+        with app.app_context():
+            sessions = ProcessingSession.query.all()
+            assert len(sessions) == 2
+            assert sessions[0].original_resume_path == sessions[1].original_resume_path
+            assert sessions[1].original_resume_text == 'Parsed document content'
+    
+    def test_failed_parse_is_not_cached(self, client, app, mock_document_parser):
+        """Test a failed parse is retried on the next upload."""
+        mock_document_parser.parse_document.return_value = {'success': False, 'error': 'Failed to parse document'}
+        self._upload(client)
+        
+        mock_document_parser.parse_document.return_value = {'success': True, 'text': 'Parsed document content'}
+        self._upload(client)
+        
+        assert mock_document_parser.parse_document.call_count == 4
+        with app.app_context():
+            assert ProcessingSession.query.count() == 1
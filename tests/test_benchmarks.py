@@ -0,0 +1,44 @@
+# tests/test_benchmarks.py - Benchmark harness smoke tests
+from benchmarks import bench_document_parser, bench_pipeline
+from benchmarks.compare import compare
+from benchmarks.harness import percentile, summarize
+
+
+class TestHarness:
+    """Test the latency summaries and result comparison."""
+
+    def test_percentiles(self):
+        """Test nearest-rank percentiles over 1..100 ms."""
+        summary = summarize(range(1, 101), errors=2)
+
+        assert (summary['p50_ms'], summary['p95_ms'], summary['p99_ms']) == (50, 95, 99)
+        assert summary['errors'] == 2
+        assert percentile([], 0.5) is None
+
+    def test_compare_flags_regressions(self):
+        """Test slower latencies and lower throughput are flagged as worse."""
+        before = {'commit': 'a', 'stages': {'upload': {'p95_ms': 100}}, 'requests_per_second': 10}
+        after = {'commit': 'b', 'stages': {'upload': {'p95_ms': 150}}, 'requests_per_second': 12}
+
+        rows = {metric: verdict for metric, _, _, _, verdict in compare(before, after)}
+
+        assert rows == {'stages.upload.p95_ms': 'worse', 'requests_per_second': 'better'}
+
+
+class TestBenchmarks:
+    """Test the benchmarks run end to end at a tiny size."""
+
+    def test_pipeline(self):
+        """Test every stage completes against the fake LLM."""
+        results = bench_pipeline.run(sessions=3, concurrency=3, llm_latency=0.01)
+
+        assert results['sessions_completed'] == 3
+        assert results['failures'] == []
+        assert all(results['stages'][stage]['count'] == 3 for stage in bench_pipeline.STAGES)
+
+    def test_document_parser(self, tmp_path):
+        """Test the generated corpus parses in every format."""
+        results = bench_document_parser.run(bench_document_parser.make_corpus(str(tmp_path), 3), repeat=1)
+
+        assert sorted(results['parse']) == ['docx', 'pdf', 'txt']
+        assert all(summary['errors'] == 0 for summary in results['parse'].values())
@@ -0,0 +1,136 @@
+# tests/test_bulk_optimize.py - Bulk optimization API and CLI tests
+import json
+import time
+from io import BytesIO
+from database.models import JobDescription, ProcessingSession
+from modules.document_parser import DocumentParser
+
+JOB = 'Senior Python developer. Python, SQL and API design required; Docker and Git a plus.'
+
+CANDIDATES = [
+    {'name': 'weak', 'resume': 'Retail assistant experienced in customer service.', 'cover_letter': 'Hello'},
+    {'name': 'strong', 'resume': 'Python developer building SQL backed API services with Docker and Git.',
+     'cover_letter': 'I build Python APIs.'},
+    {'name': 'medium', 'resume': 'Developer using Python and Git.', 'cover_letter': ''},
+]
+
+
+class SlowParser:
+    """DocumentParser taking 0.3s per file, importable by the parse pool's worker processes"""
+
+    @staticmethod
+    def parse_document(source, file_type=None, **budgets):
+        time.sleep(0.3)
+        return DocumentParser.parse_document(source, file_type, **budgets)
+
+
+def read_events(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+
+
+class TestBulkOptimize:
+    """Test ranking many candidates against one job posting."""
+
+    def test_job_analysed_once_and_candidates_ranked(self, client, app, mock_job_analyzer):
+        """Test one job analysis, one insight request per candidate and a ranked result."""
+        response = client.post('/api/bulk', json={'job_description': JOB, 'candidates': CANDIDATES})
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+
+        events = read_events(response)
+        assert events[0]['event'] == 'job'
+        assert events[0]['candidates'] == 3
+        assert sorted(event['name'] for event in events if event['event'] == 'candidate') == ['medium', 'strong', 'weak']
+
+        ranking = events[-1]
+        assert ranking['event'] == 'ranking'
+        assert [result['name'] for result in ranking['results']] == ['strong', 'medium', 'weak']
+        assert [result['rank'] for result in ranking['results']] == [1, 2, 3]
+
+        assert mock_job_analyzer.analyze_job_description.call_count == 1
+        assert mock_job_analyzer.extract_optimization_insights.call_count == 3
+
+        with app.app_context():
+            assert JobDescription.query.count() == 1
+            sessions = ProcessingSession.query.all()
+            assert len(sessions) == 3
+            assert all(session.status == 'completed' for session in sessions)
+
+    def test_second_run_reuses_job_analysis(self, client, mock_job_analyzer):
+        """Test a later batch for the same posting doesn't analyse it again."""
+        client.post('/api/bulk', json={'job_description': JOB, 'candidates': CANDIDATES[:1]})
+        events = read_events(client.post('/api/bulk', json={'job_description': JOB, 'candidates': CANDIDATES[1:]}))
+
+        assert events[0]['reused_analysis'] is True
+        assert mock_job_analyzer.analyze_job_description.call_count == 1
+
+    def test_llm_failures_fall_back(self, client, mock_job_analyzer):
+        """Test failed analysis and insight requests still produce ranked candidates."""
+        failure = {'success': False, 'error': '429 Too Many Requests'}
+        mock_job_analyzer.analyze_job_description.return_value = failure
+        mock_job_analyzer.extract_optimization_insights.return_value = failure
+
+        events = read_events(client.post('/api/bulk', json={'job_description': JOB, 'candidates': CANDIDATES}))
+
+        assert 'python' in events[0]['analysis']['keywords']['high_priority']
+        candidates = [event for event in events if event['event'] == 'candidate']
+        assert len(candidates) == 3
+        assert all('resume_gaps' in event['insights'] for event in candidates)
+
+    def test_file_upload(self, client, mock_job_analyzer):
+        """Test resumes and cover letters uploaded as files, paired by position."""
+        data = {
+            'job_description_text': JOB,
+            'resumes': [(BytesIO(c['resume'].encode()), f"{c['name']}.txt") for c in CANDIDATES],
+            'cover_letters': [(BytesIO(c['cover_letter'].encode() or b' '), f"{c['name']}_cl.txt") for c in CANDIDATES],
+        }
+        events = read_events(client.post('/api/bulk', data=data, content_type='multipart/form-data'))
+
+        assert [result['name'] for result in events[-1]['results']] == ['strong.txt', 'medium.txt', 'weak.txt']
+
+    def test_validation(self, client):
+        """Test missing job description, missing candidates and mismatched files are rejected."""
+        assert client.post('/api/bulk', json={'candidates': CANDIDATES}).status_code == 400
+        assert client.post('/api/bulk', json={'job_description': JOB, 'candidates': []}).status_code == 400
+
+        data = {
+            'job_description_text': JOB,
+            'resumes': [(BytesIO(b'one'), 'a.txt'), (BytesIO(b'two'), 'b.txt')],
+            'cover_letters': [(BytesIO(b'only one'), 'a_cl.txt')],
+        }
+        response = client.post('/api/bulk', data=data, content_type='multipart/form-data')
+        assert response.status_code == 400
+        assert 'one cover letter per resume' in response.get_json()['error']
+
+    def test_cli(self, app, runner, mock_job_analyzer, tmp_path):
+        """Test the bulk-optimize command prints ranked JSON lines."""
+        job = tmp_path / 'job.txt'
+        job.write_text(JOB)
+        args = ['bulk-optimize', '--job', str(job), '--workers', '2']
+        for candidate in CANDIDATES:
+            resume = tmp_path / f"{candidate['name']}.txt"
+            resume.write_text(candidate['resume'])
+            args += ['--resume', str(resume)]
+
+        result = runner.invoke(args=args)
+        assert result.exit_code == 0, result.output
+
+        events = [json.loads(line) for line in result.output.splitlines() if line.startswith('{')]
+        assert events[-1]['results'][0]['name'] == 'strong.txt'
+        assert mock_job_analyzer.extract_optimization_insights.call_count == 3
+
+    def test_large_upload_is_not_cut_off_by_the_parse_timeout(self, client, app, mock_job_analyzer, monkeypatch):
+        """Test more resumes than the workers can parse within one timeout are all ranked."""
+        monkeypatch.setattr('app.DocumentParser', SlowParser)
+        app.config.update({'PARSE_POOL_WORKERS': 2, 'PARSE_TIMEOUT': 1.0})
+        data = {
+            'job_description_text': JOB,
+            'resumes': [(BytesIO(f'Python developer number {index}'.encode()), f'r{index}.txt') for index in range(12)],
+        }
+        try:
+            events = read_events(client.post('/api/bulk', data=data, content_type='multipart/form-data'))
+        finally:
+            app.extensions['parse_pool'].shutdown()
+
+        assert [event.get('error') for event in events if event['event'] == 'candidate'] == [None] * 12
+        assert len(events[-1]['results']) == 12
@@ -0,0 +1,161 @@
+# tests/test_document_parser.py - Document parser tests
+import json
+import pickle
+import sys
+import pytest
+from io import BytesIO
+from unittest.mock import patch
+from docx import Document
+from benchmarks.bench_document_parser import make_pdf
+from benchmarks.bench_docx_reader import double_parse, make_resume
+from modules.document_parser import DocumentParser
+from modules.document_structure import DocumentStructure
+from modules.docx_reader import DocxReader
+
+
+RESUME_PAGE = [
+    'Jane Doe - Senior Python Developer',
+    'Built REST APIs and data pipelines with Python, SQL and Docker for eight years.',
+    'Led a team of five engineers and reduced infrastructure costs by thirty percent.',
+]
+
+
+class TestPdfParsing:
+    """Test page-streaming PDF extraction."""
+
+    def test_plain_pdf_uses_pypdf2(self):
+        """Test text-flow PDFs take the cheaper PyPDF2 path."""
+        result = DocumentParser.parse_document(make_pdf([RESUME_PAGE, RESUME_PAGE]), 'pdf')
+
+        assert result['success'] is True
+        assert 'Senior Python Developer' in result['text']
+        assert result['metadata']['engine'] == 'pypdf2'
+        assert result['metadata']['total_pages'] == 2
+        assert result['metadata']['truncated'] is False
+
+    def test_layout_heavy_pdf_uses_pdfplumber(self):
+        """Test fragmented table-like text switches to pdfplumber."""
+        table = ['Skill', '|', 'Yrs', '|', 'Py', '|', '8', '|', 'Go', '|', '3'] * 3
+        result = DocumentParser.parse_document(make_pdf([table]), 'pdf')
+
+        assert result['success'] is True
+        assert result['metadata']['engine'] == 'pdfplumber'
+
+    def test_page_budget(self, tmp_path):
+        """Test pages past the page budget are not extracted."""
+        path = tmp_path / 'long.pdf'
+        path.write_bytes(make_pdf([[f'Page {n} of a very long document with plenty of text on it.'] * 5
+                                   for n in range(1, 31)]))
+
+        result = DocumentParser.parse_document(str(path), pdf_max_pages=5)
+
+        assert result['metadata']['total_pages'] == 30
+        assert result['metadata']['parsed_pages'] == 5
+        assert result['metadata']['truncated_reason'] == 'max_pages'
+        assert 'Page 5 ' in result['text'] and 'Page 6 ' not in result['text']
+
+    def test_time_budget(self):
+        """Test extraction stops once the time budget is spent."""
+        pdf = make_pdf([[f'Page {n} of a very long document with plenty of text on it.'] * 5 for n in range(20)])
+        result = DocumentParser.parse_document(pdf, 'pdf', pdf_time_budget=0)
+
+        assert result['success'] is True
+        assert result['metadata']['truncated_reason'] == 'time_budget'
+        assert result['metadata']['parsed_pages'] < 20
+
+    def test_corrupt_pdf_fails_cleanly(self):
+        """Test unreadable PDFs return an error instead of raising."""
+        result = DocumentParser.parse_document(b'%PDF-1.4\nnot really a pdf', 'pdf')
+
+        assert result['success'] is False
+        assert 'error' in result
+
+
+class TestDocumentStructure:
+    """Test the offset-based structure representation."""
+
+    def test_txt_lines_and_paragraphs(self):
+        """Test spans index back into the single text string."""
+        text = 'Jane Doe\nPython Developer\n\n  \nExperience\n- Built APIs\n'
+        result = DocumentParser.parse_document(text.encode(), 'txt')
+        structure = result['structure']
+
+        assert structure.texts(result['text'], 'lines') == ['Jane Doe', 'Python Developer', '  ', 'Experience', '- Built APIs']
+        assert structure.texts(result['text'], 'paragraphs') == ['Jane Doe\nPython Developer', 'Experience\n- Built APIs']
+
+    def test_pdf_pages(self):
+        """Test page spans cover each page's text."""
+        result = DocumentParser.parse_document(make_pdf([['First page text'], ['Second page text']]), 'pdf')
+        pages = result['structure'].texts(result['text'], 'pages')
+
+        assert [page.strip() for page in pages] == ['First page text', 'Second page text']
+
+    def test_docx_paragraph_styles(self, tmp_path):
+        """Test DOCX paragraphs keep their styles without copying their text."""
+        document = Document()
+        document.add_heading('Experience', level=1)
+        document.add_paragraph('Built REST APIs in Python.')
+        path = tmp_path / 'resume.docx'
+        document.save(str(path))
+
+        result = DocumentParser.parse_document(str(path))
+        structure = result['structure']
+
+        assert structure.texts(result['text'], 'paragraphs') == ['Experience', 'Built REST APIs in Python.']
+        assert [structure.paragraph_style(i) for i in range(2)] == ['Heading 1', 'Normal']
+
+    def test_round_trips_through_json(self):
+        """Test the structure survives JSON and pickle for caching and the parse pool."""
+        structure = DocumentParser.parse_document(b'a\nb\n\nc', 'txt')['structure']
+
+        assert DocumentStructure.from_dict(json.loads(json.dumps(structure.to_dict()))) == structure
+        assert pickle.loads(pickle.dumps(structure)) == structure
+
+    def test_structure_is_smaller_than_text(self):
+        """Test the structure no longer duplicates the text."""
+        text = '\n'.join(f'Line {n}: shipped Python services to production' for n in range(2000))
+        structure = DocumentParser.parse_document(text.encode(), 'txt')['structure']
+
+        assert sys.getsizeof(structure.lines) + sys.getsizeof(structure.paragraphs) < sys.getsizeof(text) / 3
+
+
+class TestDocxReader:
+    """Test the single-pass DOCX reader."""
+
+    def test_matches_double_parse(self):
+        """Test text, paragraphs and styles match python-docx + docx2txt."""
+        data = make_resume(60)
+        legacy_text, legacy_paragraphs = double_parse(data)
+        paragraphs = list(DocxReader(BytesIO(data)).paragraphs())
+
+        body = [(p.text, p.style) for p in paragraphs if p.part == 'body' and p.text.strip()]
+        assert body[:len(legacy_paragraphs)] == legacy_paragraphs
+        assert ' '.join(p.text for p in paragraphs).split() == legacy_text.split()
+
+    def test_headers_tabs_and_breaks(self):
+        """Test page headers come first and tabs and line breaks are kept."""
+        document = Document()
+        document.sections[0].header.paragraphs[0].text = 'Jane Doe'
+        run = document.add_paragraph().add_run('Python\tSQL')
+        run.add_break()
+        run.add_text('Docker')
+        buffer = BytesIO()
+        document.save(buffer)
+
+        paragraphs = [p for p in DocxReader(BytesIO(buffer.getvalue())).paragraphs() if p.text]
+
+        assert paragraphs[0] == ('Jane Doe', 'Header', 'header')
+        assert paragraphs[1] == ('Python\tSQL\nDocker', 'Normal', 'body')
+
+    def test_parser_reads_archive_once(self, tmp_path):
+        """Test _parse_docx no longer goes through python-docx or docx2txt."""
+        path = tmp_path / 'resume.docx'
+        path.write_bytes(make_resume(30))
+
+        with patch('docx2txt.process') as docx2txt_process, patch('docx.Document') as python_docx:
+            result = DocumentParser.parse_document(str(path))
+
+        assert result['success'] is True
+        assert result['metadata']['total_paragraphs'] > 30
+        docx2txt_process.assert_not_called()
+        python_docx.assert_not_called()
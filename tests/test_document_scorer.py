@@ -0,0 +1,116 @@
+# tests/test_document_scorer.py - Local, incremental document scoring tests
+from modules import document_scorer
+from modules.document_scorer import DocumentScorer, LineStats
+
+KEYWORDS = {
+    'high_priority': ['python', 'sql', 'rest api'],
+    'medium_priority': ['docker', 'git'],
+    'low_priority': ['agile']
+}
+REQUIREMENTS = {'technical_skills': ['Python', 'SQL', 'Kubernetes']}
+
+RESUME = '\n'.join([
+    'Jane Doe',
+    'jane@example.com | (555) 123-4567',
+    'Summary',
+    'Backend engineer building Python services and REST API integrations for payments.',
+    'Experience',
+    '- Reduced SQL query latency by 40% across the reporting stack',
+    '- Containerised twelve services with Docker and automated releases with Git hooks',
+    '- Led an agile team of five engineers through a platform migration',
+    'Education',
+    'BSc Computer Science, State University',
+    'Skills',
+    'Python, SQL, Docker, Git'
+] + ['- Delivered internal tooling used by hundreds of staff every single day'] * 15)
+
+
+class TestDocumentScorer:
+    """Test keyword, ATS and relevance scoring."""
+
+    def test_scores_are_in_range(self):
+        """Test every score is a 0-10 value rounded to one decimal."""
+        scores = DocumentScorer(KEYWORDS, REQUIREMENTS).score(RESUME)
+
+        assert set(scores) == {'keyword_match', 'ats_compatibility', 'content_relevance', 'overall'}
+        for value in scores.values():
+            assert 0 <= value <= 10
+            assert round(value, 1) == value
+
+    def test_more_keywords_score_higher(self):
+        """Test adding missing keywords raises the keyword match score."""
+        scorer = DocumentScorer(KEYWORDS, REQUIREMENTS)
+        before = scorer.score(RESUME)
+        after = scorer.score(RESUME + '\nDeployed workloads on Kubernetes')
+
+        assert after['keyword_match'] > before['keyword_match']
+        assert after['content_relevance'] > before['content_relevance']
+
+    def test_resume_structure_affects_ats(self):
+        """Test a resume without standard sections or contact details scores lower."""
+        scorer = DocumentScorer(KEYWORDS, REQUIREMENTS)
+        unstructured = 'I know Python and SQL and Docker and Git.'
+
+        assert scorer.score(unstructured)['ats_compatibility'] < scorer.score(RESUME)['ats_compatibility']
+
+    def test_empty_documents(self):
+        """Test empty text and empty keyword sets don't raise."""
+        assert DocumentScorer({}).score('')['keyword_match'] == 0
+        assert DocumentScorer(KEYWORDS).score_session('', '')['overall'] >= 0
+
+    def test_rescore_reuses_unchanged_lines(self):
+        """Test only the edited line is re-analysed."""
+        scorer = DocumentScorer(KEYWORDS, REQUIREMENTS)
+        scorer.score(RESUME)
+        cached = dict(scorer._lines)
+
+        edited = RESUME.replace('Jane Doe', 'Jane A. Doe')
+        scorer.score(edited)
+
+        new_lines = set(scorer._lines) - set(cached)
+        assert new_lines == {'Jane A. Doe'}
+        assert all(scorer._lines[line] is stats for line, stats in cached.items())
+
+    def test_rescore_after_edit_scans_one_line(self, monkeypatch):
+        """Test re-scoring a long document after a one-line edit scans only that line."""
+        scorer = DocumentScorer(KEYWORDS, REQUIREMENTS)
+        document = '\n'.join(f'- Line {i}: shipped Python and SQL services with Docker' for i in range(2000))
+        scorer.score(document)
+
+        scanned = []
+        monkeypatch.setattr(document_scorer, 'LineStats',
+                            lambda line, matcher: scanned.append(line) or LineStats(line, matcher))
+        scorer.score(document.replace('Line 1000:', 'Line 1000 (edited):'))
+
+        assert scanned == ['- Line 1000 (edited): shipped Python and SQL services with Docker']
+
+    def test_score_endpoint_does_not_persist(self, app, client, completed_session):
+        """Test live scoring returns scores without saving the edit."""
+        response = client.post(
+            f'/api/score/{completed_session}',
+            json={'document_type': 'resume', 'content': RESUME}
+        )
+
+        data = response.get_json()
+        assert data['success'] is True
+        assert 0 <= data['scores']['overall'] <= 10
+
+        from database.models import ProcessingSession
+        with app.app_context():
+            session = ProcessingSession.query.get(completed_session)
+            assert session.optimized_resume_text == 'Optimized resume content'
+
+    def test_update_document_rescores(self, app, client, completed_session):
+        """Test saving an edit stores the real scores for the new content."""
+        response = client.post(
+            f'/api/update-document/{completed_session}',
+            json={'document_type': 'resume', 'content': RESUME}
+        )
+        scores = response.get_json()['scores']
+
+        live = client.post(
+            f'/api/score/{completed_session}',
+            json={'document_type': 'resume', 'content': RESUME}
+        ).get_json()['scores']
+
+        assert scores == live
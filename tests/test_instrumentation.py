@@ -0,0 +1,158 @@
+# tests/test_instrumentation.py - Per-stage timing and /metrics tests
+import time
+from io import BytesIO
+from modules.instrumentation import ELAPSED_KEY, NULL_SPAN, Instrumentation, timed_result
+from modules.job_analyzer import run_concurrently
+
+
+class TestInstrumentation:
+    """Test spans, histograms, traces and the Prometheus output."""
+
+    def test_disabled_records_nothing(self):
+        """Test a disabled instance hands out the shared no-op span."""
+        instrumentation = Instrumentation()
+
+        with instrumentation.span('parse', file_type='pdf') as span:
+            span.annotate(pages=3)
+        instrumentation.count('llm_tokens', 10)
+        with instrumentation.trace('session') as trace:
+            instrumentation.observe('parse', 0.5)
+
+        assert span is NULL_SPAN
+        assert instrumentation.stats() == {}
+        assert trace.spans == []
+        assert instrumentation.get_trace('session') is None
+
+    def test_histogram_buckets(self):
+        """Test observations land in cumulative buckets with a sum and count."""
+        instrumentation = Instrumentation(enabled=True, buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.5, 0.7, 3.0):
+            instrumentation.observe('parse', seconds, file_type='pdf')
+        instrumentation.count('llm_tokens', 120, kind='prompt')
+
+        text = instrumentation.render_prometheus({'llm_cache_hits': 4})
+
+        assert 'job_optimizer_stage_duration_seconds_bucket{stage="parse",file_type="pdf",le="0.1"} 1' in text
+        assert 'job_optimizer_stage_duration_seconds_bucket{stage="parse",file_type="pdf",le="1.0"} 3' in text
+        assert 'job_optimizer_stage_duration_seconds_bucket{stage="parse",file_type="pdf",le="+Inf"} 4' in text
+        assert 'job_optimizer_stage_duration_seconds_sum{stage="parse",file_type="pdf"} 4.25' in text
+        assert 'job_optimizer_stage_duration_seconds_count{stage="parse",file_type="pdf"} 4' in text
+        assert 'job_optimizer_llm_tokens_total{kind="prompt"} 120' in text
+        assert 'job_optimizer_llm_cache_hits 4' in text
+        assert instrumentation.stats()['parse'] == {'count': 4, 'total_ms': 4250.0, 'mean_ms': 1062.5}
+
+    def test_label_values_are_escaped(self):
+        """Test quotes and backslashes in label values keep the output parseable."""
+        instrumentation = Instrumentation(enabled=True)
+        instrumentation.observe('template_render', 0.01, template='a"b\\c')
+
+        assert 'template="a\\"b\\\\c"' in instrumentation.render_prometheus()
+
+    def test_trace_follows_concurrent_calls(self):
+        """Test spans finished on run_concurrently threads are collected by the caller's trace."""
+        instrumentation = Instrumentation(enabled=True)
+
+        def work(name):
+            with instrumentation.span('llm_call', provider=name) as span:
+                span.annotate(prompt_tokens=5)
+
+        with instrumentation.trace('session-1'):
+            run_concurrently([(work, ('a',)), (work, ('b',))])
+        instrumentation.observe('parse', 0.1)
+
+        spans = instrumentation.get_trace('session-1')
+        assert sorted(span['provider'] for span in spans) == ['a', 'b']
+        assert all(span['stage'] == 'llm_call' and span['prompt_tokens'] == 5 for span in spans)
+
+    def test_trace_retention_is_bounded(self):
+        """Test only the most recent traces are kept."""
+        instrumentation = Instrumentation(enabled=True, max_traces=2)
+        for key in ('a', 'b', 'c'):
+            with instrumentation.trace(key):
+                instrumentation.observe('parse', 0.01)
+
+        assert instrumentation.get_trace('a') is None
+        assert len(instrumentation.get_trace('c')) == 1
+
+    def test_failed_span_is_marked(self):
+        """Test a span that raises is still recorded, with the exception type."""
+        instrumentation = Instrumentation(enabled=True)
+        with instrumentation.trace() as trace:
+            try:
+                with instrumentation.span('json_extract'):
+                    raise ValueError('bad json')
+            except ValueError:
+                pass
+
+        assert trace.spans[0]['error'] == 'ValueError'
+
+    def test_timed_result(self):
+        """Test timed_result adds the call's duration to the result."""
+        result = timed_result(lambda delay: time.sleep(delay) or {'success': True}, 0.01)
+
+        assert result['success'] is True
+        assert result[ELAPSED_KEY] >= 0.01
+
+
+class TestAppInstrumentation:
+    """Test the hot-path hooks in the app."""
+
+    def test_analysis_timings(self, app, client, sample_session):
+        """Test ?timings=1 returns the LLM, JSON extraction and commit spans of the analysis."""
+        app.config.update({'LLM_PROVIDER': 'fake', 'LLM_CACHE_ENABLED': False})
+        app.extensions['instrumentation'].enabled = True
+
+        body = client.post(f'/api/analyze/{sample_session}?timings=1').get_json()
+        stages = [span['stage'] for span in body['timings']]
+
+        assert body['status'] == 'completed'
+        assert stages.count('llm_call') == 2
+        assert stages.count('json_extract') == 2
+        assert 'db_commit' in stages
+        llm_call = next(span for span in body['timings'] if span['stage'] == 'llm_call')
+        assert llm_call['provider'] == 'fake' and llm_call['prompt_tokens'] > 0 and llm_call['completion_tokens'] > 0
+        assert client.get(f'/api/analyze/{sample_session}/status?timings=1').get_json()['timings'] == body['timings']
+
+        metrics = client.get('/metrics')
+        assert metrics.mimetype == 'text/plain'
+        assert 'stage="llm_call"' in metrics.get_data(as_text=True)
+        assert 'job_optimizer_llm_tokens_total{kind="completion",provider="fake"}' in metrics.get_data(as_text=True)
+
+    def test_upload_and_render(self, app, client):
+        """Test uploads time saving and parsing per file type, and pages time their template."""
+        instrumentation = app.extensions['instrumentation']
+        instrumentation.enabled = True
+
+        client.post('/upload', data={
+            'job_description_text': 'Python developer with SQL experience',
+            'resume': (BytesIO(b'Jane Doe\nPython developer\n'), 'resume.txt'),
+            'cover_letter': (BytesIO(b'Dear Hiring Manager,\nI write Python.\n'), 'cover_letter.txt'),
+        }, content_type='multipart/form-data')
+        client.get('/')
+
+        stats = instrumentation.stats()
+        assert stats['upload_save']['count'] == 2
+        assert stats['parse']['count'] == 2
+        assert stats['template_render']['count'] == 1
+        assert 'file_type="txt"' in client.get('/metrics').get_data(as_text=True)
+
+    def test_fallbacks_are_logged_and_counted(self, app, client, sample_session, caplog):
+        """Test an analyzer that can't be created is logged as a warning and counted at /metrics."""
+        app.config['LLM_PROVIDER'] = 'no-such-provider'
+        app.extensions['instrumentation'].enabled = True
+
+        client.post(f'/api/analyze/{sample_session}')
+
+        assert any(record.levelname == 'WARNING' and 'analyzer_init failed' in record.getMessage()
+                   for record in caplog.records)
+        assert 'job_optimizer_llm_fallbacks_total{stage="analyzer_init"} 1' in client.get('/metrics').get_data(as_text=True)
+
+    def test_disabled_by_default(self, app, client, sample_session):
+        """Test no timings are kept or returned unless enabled."""
+        app.config.update({'LLM_PROVIDER': 'fake', 'LLM_CACHE_ENABLED': False})
+
+        body = client.post(f'/api/analyze/{sample_session}?timings=1').get_json()
+
+        assert 'timings' not in body
+        assert app.extensions['instrumentation'].stats() == {}
+        assert 'job_optimizer_stage_duration_seconds_count' not in client.get('/metrics').get_data(as_text=True)
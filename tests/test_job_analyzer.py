@@ -0,0 +1,100 @@
+# tests/test_job_analyzer.py - JobAnalyzer unit tests (no OpenAI calls)
+import json
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from modules.job_analyzer import JobAnalyzer, run_concurrently
+
+
+@pytest.fixture
+def analyzer():
+    return JobAnalyzer(api_key='test-api-key')
+
+
+class StubStreamingClient:
+    """Stands in for openai.OpenAI and streams canned chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        assert kwargs['stream'] is True
+        for text in self.chunks:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+        yield SimpleNamespace(choices=[])  # usage-only chunk
+
+
+class TestConcurrentRequests:
+    """Test fanning out independent LLM calls."""
+
+    def test_run_concurrently_overlaps_calls(self):
+        """Test that independent calls run at the same time and keep their order."""
+        def slow(value):
+            time.sleep(0.2)
+            return value
+
+        started = time.perf_counter()
+        results = run_concurrently([(slow, ('analysis',)), (slow, ('insights',))])
+        elapsed = time.perf_counter() - started
+
+        assert results == ['analysis', 'insights']
+        assert elapsed < 0.35
+
+    def test_run_concurrently_returns_exceptions(self):
+        """Test that one failing call doesn't discard the other result."""
+        def fail():
+            raise RuntimeError('rate limited')
+
+        results = run_concurrently([(fail, ()), (len, ('abc',))], return_exceptions=True)
+        assert isinstance(results[0], RuntimeError)
+        assert results[1] == 3
+
+        with pytest.raises(RuntimeError):
+            run_concurrently([(fail, ())])
+
+    def test_complete_many_respects_concurrency_cap(self, analyzer):
+        """Test that complete_many never exceeds max_concurrency in-flight requests."""
+        lock = threading.Lock()
+        in_flight = {'now': 0, 'peak': 0}
+
+        def fake_request(messages, **kwargs):
+            with lock:
+                in_flight['now'] += 1
+                in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+            time.sleep(0.05)
+            with lock:
+                in_flight['now'] -= 1
+            return messages[0]['content'].upper()
+
+        analyzer._make_openai_request = fake_request
+        prompts = [[{'role': 'user', 'content': f'prompt {i}'}] for i in range(6)]
+
+        results = analyzer.complete_many(prompts, max_concurrency=2, max_tokens=10)
+
+        assert results == [f'PROMPT {i}' for i in range(6)]
+        assert in_flight['peak'] == 2
+
+
+class TestStreaming:
+    """Test streamed completions."""
+
+    def test_analysis_streams_tokens(self, analyzer):
+        """Test on_token sees every fragment and the joined text is still parsed."""
+        payload = json.dumps({'keywords': {'high_priority': ['python']}, 'requirements': {}})
+        chunks = [payload[i:i + 7] for i in range(0, len(payload), 7)]
+        analyzer.client = StubStreamingClient(chunks)
+        tokens = []
+
+        result = analyzer.analyze_job_description('Python developer', on_token=tokens.append)
+
+        assert tokens == chunks
+        assert result['success'] is True
+        assert result['analysis']['keywords']['high_priority'] == ['python']
+
+    def test_stream_completion_skips_empty_deltas(self, analyzer):
+        analyzer.client = StubStreamingClient(['Hel', None, 'lo'])
+        assert list(analyzer.stream_completion([{'role': 'user', 'content': 'hi'}])) == ['Hel', 'lo']
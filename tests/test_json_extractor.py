@@ -0,0 +1,159 @@
+# tests/test_json_extractor.py - JSON extraction from LLM responses
+import json
+import time
+from modules.job_analyzer import JobAnalyzer
+from modules.json_extractor import JSONLocator, conform, extract_json
+from modules.llm_providers import FakeProvider
+from modules.llm_schemas import INSIGHTS_SCHEMA
+
+INSIGHTS = {
+    'resume_gaps': ['docker'],
+    'cover_letter_gaps': ['company values'],
+    'keyword_opportunities': ['kubernetes', 'aws'],
+    'experience_matching': {'strong_matches': ['python'], 'weak_matches': [], 'missing_experiences': ['ci/cd']},
+    'ats_recommendations': ['Use standard headings'],
+    'priority_actions': ['Add Docker projects']
+}
+
+
+class TestExtractJSON:
+    """Test locating the JSON object in a response."""
+
+    def test_response_formats(self):
+        """Test bare JSON, fenced blocks and JSON wrapped in prose."""
+        payload = json.dumps(INSIGHTS)
+
+        assert extract_json(payload).data == INSIGHTS
+        assert extract_json(f'```json\n{payload}\n```').data == INSIGHTS
+        assert extract_json(f'Here is the analysis:\n{payload}\nLet me know {{if}} you need more.').data == INSIGHTS
+
+    def test_braces_in_prose_and_strings(self):
+        """Test braces before the object and inside string values don't confuse the scan."""
+        text = 'Use {placeholders} like {this}. {"note": "a } and a \\" quote {", "items": ["[x]"]}'
+
+        assert extract_json(text).data == {'note': 'a } and a " quote {', 'items': ['[x]']}
+
+    def test_no_json(self):
+        """Test a response without an object says why."""
+        result = extract_json('Sorry, I cannot help with that.')
+
+        assert result.data is None
+        assert result.errors == ['no JSON object in response']
+        assert extract_json('').errors == ['empty response']
+
+    def test_linear_on_pathological_input(self):
+        """Test a long unterminated response is rejected quickly (no regex backtracking)."""
+        text = 'x{' * 100000
+
+        started = time.perf_counter()
+        assert extract_json(text).data is None
+        assert time.perf_counter() - started < 2
+
+
+class TestTruncationRepair:
+    """Test closing responses cut off by max_tokens."""
+
+    def test_unterminated_array(self):
+        """Test a response cut off after a complete list item keeps that item."""
+        result = extract_json('{"resume_gaps": ["docker", "aws"')
+
+        assert result.repaired is True
+        assert result.data == {'resume_gaps': ['docker', 'aws']}
+
+    def test_cut_inside_a_string(self):
+        """Test the half-written value is dropped, not kept as a fragment."""
+        result = extract_json('```json\n{"resume_gaps": ["docker"], "priority_actions": ["Add Dock')
+
+        assert result.data == {'resume_gaps': ['docker'], 'priority_actions': []}
+
+    def test_cut_after_a_key(self):
+        """Test a dangling key is dropped."""
+        assert extract_json('{"a": {"b": 1}, "c": [1, 2], "d":').data == {'a': {'b': 1}, 'c': [1, 2]}
+        assert extract_json('{"a": 1, "tr').data == {'a': 1}
+        assert extract_json('{"a": tru').data is None
+
+    def test_missing_fields_are_reported(self):
+        """Test the schema lists what the truncated response never got to."""
+        payload = json.dumps(INSIGHTS)
+        result = extract_json(payload[:payload.index('"ats_recommendations"') + 30], INSIGHTS_SCHEMA.fields)
+
+        assert result.repaired is True
+        assert result.missing == ['priority_actions']
+        assert result.data['ats_recommendations'] == []
+        assert result.data['experience_matching'] == INSIGHTS['experience_matching']
+
+
+class TestStreaming:
+    """Test feeding the locator streamed chunks."""
+
+    def test_completes_when_the_object_closes(self):
+        """Test feed() reports completion at the closing brace and ignores what follows."""
+        text = 'Sure! ' + json.dumps(INSIGHTS) + '\n\nHope this helps.'
+        close = text.index('\n\nHope')
+        locator = JSONLocator()
+
+        done_at = next(index for index in range(len(text)) if locator.feed(text[index]))
+
+        assert done_at == close - 1
+        assert locator.value == INSIGHTS
+
+    def test_escape_split_across_chunks(self):
+        """Test a backslash at the end of one chunk still escapes the next character."""
+        locator = JSONLocator()
+
+        assert locator.feed('{"quote": "say \\') is False
+        assert locator.feed('"hi\\"", "n": 1}') is True
+        assert locator.value == {'quote': 'say "hi"', 'n': 1}
+
+    def test_abandoned_candidate_spanning_chunks(self):
+        """Test prose braces split over chunks are rescanned from the full text, not just the last chunk."""
+        text = 'Fill {name} in {' + json.dumps(INSIGHTS)[:-1] + '}}'
+        locator = JSONLocator()
+
+        for start in range(0, len(text), 3):
+            locator.feed(text[start:start + 3])
+
+        assert locator.value == INSIGHTS
+        assert locator.text == text
+
+    def test_stream_stops_early(self):
+        """Test the analyzer stops reading the stream once the insights object is complete."""
+        trailing = ' More notes.' * 200
+        provider = FakeProvider(chunk_size=8, responder=lambda messages: json.dumps(INSIGHTS) + trailing)
+        tokens = []
+
+        insights = JobAnalyzer(providers={'default': provider}).extract_optimization_insights(
+            'Python developer', 'resume', 'cover letter', on_token=tokens.append
+        )
+
+        assert insights['insights'] == INSIGHTS
+        assert 'More notes' not in ''.join(tokens)
+
+
+class TestConform:
+    """Test checking extracted data against a schema."""
+
+    def test_mismatches_are_dropped(self):
+        """Test wrong types are removed and nulls count as missing."""
+        data = {
+            'resume_gaps': 'docker',
+            'keyword_opportunities': ['aws', 3, 'gcp'],
+            'experience_matching': {'strong_matches': ['python'], 'weak_matches': None},
+            'priority_actions': None,
+            'extra': 1
+        }
+
+        clean, errors, missing = conform(data, INSIGHTS_SCHEMA.fields)
+
+        assert clean == {
+            'keyword_opportunities': ['aws', 'gcp'],
+            'experience_matching': {'strong_matches': ['python']},
+            'extra': 1
+        }
+        assert errors == ['resume_gaps: expected a list', 'keyword_opportunities[1]: expected str']
+        assert missing == ['resume_gaps', 'cover_letter_gaps', 'experience_matching.weak_matches',
+                           'experience_matching.missing_experiences', 'ats_recommendations', 'priority_actions']
+
+    def test_top_level_must_be_an_object(self):
+        """Test a non-object response is rejected."""
+        assert conform(['a'], INSIGHTS_SCHEMA.fields)[0] is None
@@ -0,0 +1,80 @@
+# tests/test_keyword_extractor.py - Offline keyword extraction tests
+import time
+import pytest
+from modules.keyword_extractor import KeywordExtractor
+
+JOB_DESCRIPTION = """Senior Backend Engineer (Remote)
+We are a fast-paced, collaborative fintech startup looking for a Senior Backend Engineer to build REST APIs.
+Requirements:
+- 5+ years of experience with Python and Django
+- Strong SQL skills (PostgreSQL) and Kafka
+- Experience with Docker, Kubernetes and AWS
+- Bachelor's degree in Computer Science or related field
+- Excellent communication and leadership skills
+We are an equal opportunity employer."""
+
+
+@pytest.fixture
+def extractor():
+    return KeywordExtractor()
+
+
+class TestKeywordExtractor:
+    """Test the offline extractor output."""
+
+    def test_analysis_has_llm_shape(self, extractor):
+        """Test the result matches the analyze_job_description structure."""
+        analysis = extractor.analyze(JOB_DESCRIPTION)
+
+        assert set(analysis['keywords']) == {'high_priority', 'medium_priority', 'low_priority'}
+        assert set(analysis['requirements']) == {
+            'technical_skills', 'soft_skills', 'education', 'experience', 'certifications'
+        }
+        assert analysis['experience_level'] == 'senior'
+        assert analysis['industry'] == 'technology'
+        assert analysis['job_type'] == 'remote'
+        assert 'fast-paced' in analysis['company_culture']
+
+    def test_extracts_skills_from_posting(self, extractor):
+        """Test lexicon skills are found and ranked, stopwords are not."""
+        analysis = extractor.analyze(JOB_DESCRIPTION)
+        keywords = [k for bucket in analysis['keywords'].values() for k in bucket]
+
+        for skill in ('python', 'django', 'kafka', 'docker', 'kubernetes', 'aws'):
+            assert skill in analysis['requirements']['technical_skills']
+            assert skill in keywords
+        assert 'communication' in analysis['requirements']['soft_skills']
+        assert 'the' not in keywords and 'experience' not in keywords
+        assert any('5+ years' in line for line in analysis['requirements']['experience'])
+        assert any("Bachelor's" in line for line in analysis['requirements']['education'])
+
+    def test_is_deterministic(self, extractor):
+        assert extractor.analyze(JOB_DESCRIPTION) == KeywordExtractor().analyze(JOB_DESCRIPTION)
+
+    def test_empty_text(self, extractor):
+        analysis = extractor.analyze('')
+        assert analysis['keywords']['high_priority'] == []
+        assert analysis['industry'] == 'general'
+
+    def test_runs_in_single_digit_milliseconds(self, extractor):
+        """Test a typical posting is analysed fast enough to run on every request."""
+        extractor.analyze(JOB_DESCRIPTION)
+        started = time.perf_counter()
+        for _ in range(20):
+            extractor.analyze(JOB_DESCRIPTION * 5)
+        assert (time.perf_counter() - started) / 20 < 0.01
+
+    def test_insights_report_keyword_gaps(self, extractor):
+        """Test local insights compare the resume against the posting."""
+        result = extractor.extract_optimization_insights(
+            JOB_DESCRIPTION,
+            'Backend developer: Python, Django and PostgreSQL.',
+            'I would love to join your team.'
+        )
+        insights = result['insights']
+
+        assert result['success'] is True
+        assert 'kubernetes' in insights['resume_gaps']
+        assert 'python' not in insights['resume_gaps']
+        assert 'python' in insights['experience_matching']['strong_matches']
+        assert 'python' in insights['cover_letter_gaps']
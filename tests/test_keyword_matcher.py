@@ -0,0 +1,61 @@
+# tests/test_keyword_matcher.py - Aho–Corasick keyword matcher tests
+import re
+from modules.job_analyzer import JobAnalyzer
+from modules.keyword_matcher import KeywordMatcher
+from benchmarks.bench_keyword_matcher import make_corpus, naive_counts
+
+
+class TestKeywordMatcher:
+    """Test single-pass multi-keyword matching."""
+
+    def test_respects_word_boundaries(self):
+        """Test 'java' isn't counted inside 'javascript' and 'c' not inside 'c++'."""
+        matcher = KeywordMatcher(['java', 'javascript', 'c', 'c++', 'sql'])
+        counts = matcher.count('JavaScript, Java and C++; plain C. NoSQL is not SQL.')
+
+        assert counts == {'java': 1, 'javascript': 1, 'c': 1, 'c++': 1, 'sql': 1}
+
+    def test_multi_word_and_punctuated_keywords(self):
+        """Test phrases, overlapping keywords and keywords containing punctuation."""
+        matcher = KeywordMatcher(['rest api', 'api', 'ci/cd', 'node.js', 'machine learning'])
+        counts = matcher.count('Built a REST\n API with Node.js, ci/cd and machine-learning; api docs.')
+
+        assert counts == {'rest api': 1, 'api': 2, 'ci/cd': 1, 'node.js': 1, 'machine learning': 0}
+
+    def test_find_all_positions(self):
+        text = 'Python and REST APIs; python again'
+        matcher = KeywordMatcher(['python', 'rest apis'])
+
+        spans = [(text[start:end], keyword) for start, end, keyword in matcher.find_all(text)]
+        assert spans == [('Python', 'python'), ('REST APIs', 'rest apis'), ('python', 'python')]
+
+    def test_matches_whole_word_reference(self):
+        """Test counts against a per-keyword whole-word regex on a generated corpus."""
+        keywords, text = make_corpus(200, 20000)
+        counts = KeywordMatcher(keywords).count(text)
+
+        for keyword in keywords:
+            pattern = r'(?<![^\W_])' + r'\s+'.join(map(re.escape, keyword.split())) + r'(?![^\W_])'
+            assert counts[keyword] == len(re.findall(pattern, text)), keyword
+
+        # The old substring count over-reports
+        assert sum(naive_counts(text, keywords).values()) > sum(counts.values())
+
+    def test_keywords_differing_only_in_case(self):
+        """Test every spelling of the same keyword is counted and found."""
+        text = 'Python and python'
+        matcher = KeywordMatcher(['Python', 'python', 'SQL'])
+
+        assert matcher.count(text) == {'Python': 2, 'python': 2, 'SQL': 0}
+        assert [keyword for _, _, keyword in matcher.find_all(text)] == ['Python', 'python', 'Python', 'python']
+        assert matcher.density(text) == {'Python': 2 / 3 * 100, 'python': 2 / 3 * 100, 'SQL': 0}
+
+    def test_density_and_shared_matcher(self):
+        assert KeywordMatcher.for_keywords(['python']) is KeywordMatcher.for_keywords(['python'])
+        assert KeywordMatcher(['python']).density('python python sql go') == {'python': 50.0}
+        assert KeywordMatcher(['python']).density('') == {'python': 0}
+
+    def test_job_analyzer_density_uses_whole_words(self):
+        analyzer = JobAnalyzer(api_key='test-api-key')
+        density = analyzer._calculate_keyword_density('JavaScript developer, some Java', ['java', 'javascript'])
+        assert density == {'java': 25.0, 'javascript': 25.0}
@@ -0,0 +1,121 @@
+# tests/test_llm_cache.py - LLM response cache tests
+import os
+import time
+import pytest
+from modules.job_analyzer import JobAnalyzer
+from modules.llm_cache import LLMResponseCache
+
+MESSAGES = [{'role': 'user', 'content': 'Analyze: Python developer'}]
+
+
+@pytest.fixture
+def cache():
+    cache = LLMResponseCache(':memory:', ttl=60, max_entries=3)
+    yield cache
+    cache.close()
+
+
+class TestLLMResponseCache:
+    """Test cache keys, expiry, eviction and counters."""
+
+    def test_key_covers_request_parameters(self):
+        """Test that every request parameter changes the key."""
+        base = LLMResponseCache.make_key('gpt-3.5-turbo', 0.3, 2000, MESSAGES)
+        assert base == LLMResponseCache.make_key('gpt-3.5-turbo', 0.3, 2000, [dict(m) for m in MESSAGES])
+        assert base != LLMResponseCache.make_key('gpt-4', 0.3, 2000, MESSAGES)
+        assert base != LLMResponseCache.make_key('gpt-3.5-turbo', 0.7, 2000, MESSAGES)
+        assert base != LLMResponseCache.make_key('gpt-3.5-turbo', 0.3, 1500, MESSAGES)
+        with_schema = LLMResponseCache.make_key('gpt-3.5-turbo', 0.3, 2000, MESSAGES, {'name': 'analysis'})
+        assert base != with_schema
+        assert with_schema != LLMResponseCache.make_key('gpt-3.5-turbo', 0.3, 2000, MESSAGES, {'name': 'insights'})
+
+    def test_hit_and_miss_counters(self, cache):
+        """Test hit/miss accounting."""
+        assert cache.get('a') is None
+        cache.set('a', '{"ok": true}')
+        assert cache.get('a') == '{"ok": true}'
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entries'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_expired_entries_are_misses(self, cache):
+        """Test TTL expiry."""
+        cache.ttl = 0.05
+        cache.set('a', 'value')
+        time.sleep(0.1)
+        assert cache.get('a') is None
+        assert cache.stats()['entries'] == 0
+
+    def test_lru_eviction(self, cache):
+        """Test that the least recently used entry is evicted first."""
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+            time.sleep(0.01)
+        cache.get('a')  # 'b' is now the least recently used
+        cache.set('d', 'd')
+
+        assert cache.stats()['entries'] == 3
+        assert cache.get('b') is None
+        assert cache.get('a') == 'a'
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test the on-disk backend survives a restart."""
+        path = os.path.join(tmp_path, 'nested', 'cache.db')
+        first = LLMResponseCache(path)
+        first.set('a', 'value')
+        first.close()
+
+        second = LLMResponseCache(path)
+        assert second.get('a') == 'value'
+        second.close()
+
+
+class TestJobAnalyzerCaching:
+    """Test JobAnalyzer answers repeat requests from the cache."""
+
+    def test_repeat_request_skips_api(self, cache):
+        analyzer = JobAnalyzer(api_key='test-api-key', cache=cache)
+        calls = []
+
+        def fake_send(messages, temperature, max_tokens, model, provider=None, json_schema=None):
+            calls.append(messages)
+            return '{"keywords": {"high_priority": ["python"]}, "requirements": {}}'
+
+        analyzer._send_openai_request = fake_send
+
+        first = analyzer.analyze_job_description('Python developer')
+        second = analyzer.analyze_job_description('Python developer')
+
+        assert first == second
+        assert len(calls) == 1
+        assert cache.stats()['hits'] == 1
+
+    def test_response_shape_is_part_of_the_key(self, cache):
+        """Test the same messages asked for another JSON schema are sent again, not answered from cache."""
+        analyzer = JobAnalyzer(api_key='test-api-key', cache=cache)
+        schemas = []
+
+        def fake_send(messages, temperature, max_tokens, model, provider=None, json_schema=None):
+            schemas.append(json_schema)
+            return '{}'
+
+        analyzer._send_openai_request = fake_send
+
+        analyzer._make_openai_request(MESSAGES, json_schema={'name': 'analysis'})
+        analyzer._make_openai_request(MESSAGES, json_schema={'name': 'insights'})
+        analyzer._make_openai_request(MESSAGES, json_schema={'name': 'analysis'})
+
+        assert schemas == [{'name': 'analysis'}, {'name': 'insights'}]
+        assert cache.stats()['hits'] == 1
+
+    def test_unparseable_response_is_not_reused(self, cache):
+        analyzer = JobAnalyzer(api_key='test-api-key', cache=cache)
+        analyzer._send_openai_request = lambda *args: 'Sorry, I cannot help with that.'
+
+        result = analyzer.analyze_job_description('Python developer')
+
+        assert result['success'] is False
+        assert cache.stats()['entries'] == 0
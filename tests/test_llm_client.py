@@ -0,0 +1,60 @@
+# tests/test_llm_client.py - Pooled OpenAI HTTP client tests against a local fake OpenAI server
+from unittest.mock import patch
+from modules.job_analyzer import JobAnalyzer
+from modules.llm_client import ConnectionMetrics, create_http_client
+
+
+def ask(analyzer, prompt):
+    return analyzer._make_openai_request([{'role': 'user', 'content': prompt}])
+
+
+class TestPooledClient:
+    """Test the shared keep-alive connection pool and its metrics."""
+
+    def test_connections_are_reused_across_analyzers(self, fake_openai):
+        """Test analyzers sharing the pool reuse one kept-alive connection."""
+        metrics = ConnectionMetrics()
+        http_client = create_http_client(metrics=metrics, http2=False)
+
+        for n in range(5):
+            assert ask(JobAnalyzer(api_key='test', http_client=http_client), f'prompt {n}') == f'Echo: prompt {n}'
+
+        stats = metrics.stats()
+        assert stats['requests'] == 5
+        assert stats['connections_opened'] == 1
+        assert stats['connections_reused'] == 4
+
+    def test_pool_settings(self):
+        """Test pool size and timeouts are applied to the client."""
+        http_client = create_http_client(max_connections=7, timeout=12, connect_timeout=2, http2=False)
+        pool = http_client._transport._pool
+
+        assert pool._max_connections == 7
+        assert http_client.timeout.read == 12
+        assert http_client.timeout.connect == 2
+
+    def test_http2_needs_h2(self):
+        """Test HTTP/2 falls back to HTTP/1.1 when h2 isn't installed."""
+        with patch('modules.llm_client.http2_available', return_value=False):
+            http_client = create_http_client(http2=True)
+        assert http_client._transport._pool._http2 is False
+
+
+class TestAppScopedAnalyzer:
+    """Test create_app's shared analyzer."""
+
+    def test_analyzer_is_created_once_per_priority(self, app, client, mock_job_analyzer, sample_session):
+        """Test repeated analyses reuse the app's analyzer and its pooled client."""
+        with patch('app.JobAnalyzer') as analyzer_class:
+            analyzer_class.return_value = mock_job_analyzer
+            client.post(f'/api/analyze/{sample_session}')
+            client.post(f'/api/analyze/{sample_session}')
+
+        assert analyzer_class.call_count == 1
+        kwargs = analyzer_class.call_args.kwargs
+        assert kwargs['providers']['default'].client._client is app.extensions['llm_http_client']
+        assert kwargs['priority'] == 'interactive'
+
+    def test_stats_endpoint(self, client):
+        """Test the stats endpoint reports connection reuse once the pool exists."""
+        assert client.get('/api/llm/stats').get_json()['connections'] is None
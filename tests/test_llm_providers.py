@@ -0,0 +1,137 @@
+# tests/test_llm_providers.py - Pluggable LLM provider tests
+import pytest
+from modules.job_analyzer import JobAnalyzer
+from modules.llm_cache import LLMResponseCache
+from modules.llm_providers import FakeProvider, OpenAIProvider, create_provider
+from modules.llm_scheduler import LLMScheduler
+
+JOB = 'Senior Python developer. 5+ years of Python, SQL and Docker required. Remote.'
+
+
+class TestFakeProvider:
+    """Test the deterministic offline provider."""
+
+    def test_analysis_and_insights_without_a_network(self):
+        """Test the full analysis and insights shapes come back from the fake provider."""
+        analyzer = JobAnalyzer(providers={'default': FakeProvider()})
+
+        analysis = analyzer.analyze_job_description(JOB)
+        insights = analyzer.extract_optimization_insights(JOB, 'Java developer.', 'Dear team,')
+
+        assert analysis['success'] is True
+        assert 'python' in analysis['analysis']['all_keywords']
+        assert insights['success'] is True
+        assert 'resume_gaps' in insights['insights']
+
+    def test_deterministic(self):
+        """Test the same prompt always gets the same answer."""
+        messages = [{'role': 'user', 'content': f'Job Description:\n{JOB}\n\nPlease provide JSON'}]
+        provider = FakeProvider()
+
+        assert provider.complete(messages, 0.3, 100) == provider.complete(messages, 0.3, 100)
+        assert provider.calls == 2
+
+    def test_streams_in_chunks(self):
+        """Test streamed output arrives in fragments that join to the full answer."""
+        provider = FakeProvider(chunk_size=4, responder=lambda messages: '{"ok": true}')
+        tokens = []
+
+        analyzer = JobAnalyzer(providers={'default': provider})
+        assert analyzer._make_openai_request([{'role': 'user', 'content': 'hi'}], on_token=tokens.append) == '{"ok": true}'
+        assert tokens == ['{"ok', '": t', 'rue}']
+
+
+class TestRouting:
+    """Test choosing a provider per task and per call."""
+
+    def test_tasks_use_their_routed_provider(self):
+        """Test analysis runs on the cheap provider while insights use the default."""
+        cheap, large = FakeProvider(model='small'), FakeProvider(model='large')
+        analyzer = JobAnalyzer(providers={'default': large, 'fast': cheap}, routes={'analysis': 'fast'})
+
+        analyzer.analyze_job_description(JOB)
+        analyzer.extract_optimization_insights(JOB, 'resume', 'cover letter')
+
+        assert cheap.calls == 1
+        assert large.calls == 1
+
+    def test_per_call_override(self):
+        """Test a provider passed to the call wins over the route."""
+        default, other = FakeProvider(), FakeProvider()
+        analyzer = JobAnalyzer(providers={'default': default, 'other': other})
+
+        analyzer.analyze_job_description(JOB, provider='other')
+        analyzer.extract_optimization_insights(JOB, 'resume', 'cover letter', provider=other)
+
+        assert other.calls == 2 and default.calls == 0
+
+    def test_unknown_provider(self):
+        """Test unknown provider names are rejected."""
+        analyzer = JobAnalyzer(providers={'default': FakeProvider()})
+        with pytest.raises(ValueError):
+            analyzer.get_provider('missing')
+        with pytest.raises(ValueError):
+            create_provider('missing')
+
+    def test_cache_keys_are_per_provider(self, tmp_path):
+        """Test two backends answering the same prompt don't share cache entries."""
+        cache = LLMResponseCache(path=str(tmp_path / 'cache.db'))
+        first = FakeProvider(responder=lambda messages: 'first')
+        second = FakeProvider(model='other', responder=lambda messages: 'second')
+        analyzer = JobAnalyzer(cache=cache, providers={'default': first, 'second': second})
+        messages = [{'role': 'user', 'content': 'hi'}]
+
+        assert analyzer._make_openai_request(messages) == 'first'
+        assert analyzer._make_openai_request(messages, provider='second') == 'second'
+        cache.close()
+
+    def test_only_remote_providers_are_rate_limited(self):
+        """Test fake and local-server providers skip the scheduler."""
+        scheduler = LLMScheduler()
+        analyzer = JobAnalyzer(scheduler=scheduler, providers={'default': FakeProvider()})
+
+        analyzer.analyze_job_description(JOB)
+
+        assert scheduler.stats()['requests'] == 0
+        assert OpenAIProvider(api_key='test').rate_limited is True
+        assert OpenAIProvider(base_url='http://localhost:8080/v1').rate_limited is False
+
+
+class TestOpenAICompatibleServer:
+    """Test pointing the OpenAI provider at a local OpenAI-compatible server."""
+
+    def test_base_url(self, fake_openai, monkeypatch):
+        """Test requests go to the configured server without an OpenAI key."""
+        monkeypatch.delenv('OPENAI_BASE_URL')
+        monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+        monkeypatch.setattr('modules.llm_providers.Config.OPENAI_API_KEY', None)
+        provider = OpenAIProvider(base_url=fake_openai.url, model='local-model')
+
+        assert provider.complete([{'role': 'user', 'content': 'hi'}], 0.3, 10) == 'Echo: hi'
+        assert fake_openai.requests[0]['model'] == 'local-model'
+
+
+class TestAppProviders:
+    """Test create_app builds providers from configuration."""
+
+    def test_fake_provider_runs_the_pipeline(self, app, client, sample_session):
+        """Test LLM_PROVIDER=fake completes an analysis with no API calls."""
+        app.config.update({'LLM_PROVIDER': 'fake', 'LLM_CACHE_ENABLED': False})
+
+        client.post(f'/api/analyze/{sample_session}')
+        status = client.get(f'/api/analyze/{sample_session}/status').get_json()
+
+        assert status['status'] == 'completed'
+        assert 'python' in status['analysis']['all_keywords']
+
+    def test_task_override(self, app, client, sample_session):
+        """Test LLM_ANALYSIS_MODEL gives job analysis its own provider of the same kind."""
+        app.config.update({'LLM_PROVIDER': 'fake', 'LLM_MODEL': 'large', 'LLM_ANALYSIS_MODEL': 'small',
+                           'LLM_CACHE_ENABLED': False})
+
+        client.post(f'/api/analyze/{sample_session}')
+        providers, routes = app.extensions['llm_providers']
+
+        assert routes == {'analysis': 'analysis'}
+        assert (providers['analysis'].model, providers['analysis'].calls) == ('small', 1)
+        assert (providers['default'].model, providers['default'].calls) == ('large', 1)
@@ -0,0 +1,121 @@
+# tests/test_llm_scheduler.py - LLM request scheduler tests against a local fake OpenAI server
+import threading
+import time
+import pytest
+from modules.job_analyzer import JobAnalyzer
+from modules.llm_scheduler import LLMScheduler, TokenBucket
+
+
+def ask(analyzer, prompt, **kwargs):
+    return analyzer._make_openai_request([{'role': 'user', 'content': prompt}], **kwargs)
+
+
+class TestLLMScheduler:
+    """Test rate limiting, retries, coalescing and priorities."""
+
+    def test_retries_rate_limits_with_backoff(self, fake_openai):
+        """Test 429s and 5xxs from the provider are retried until the request succeeds."""
+        fake_openai.statuses = [429, 503]
+        scheduler = LLMScheduler(base_delay=0.01)
+        analyzer = JobAnalyzer(api_key='test', scheduler=scheduler)
+
+        assert ask(analyzer, 'hello') == 'Echo: hello'
+        assert len(fake_openai.requests) == 3
+        assert scheduler.stats()['retries'] == 2
+        assert scheduler.stats()['rate_limited'] == 1
+
+    def test_gives_up_after_max_retries(self, fake_openai):
+        """Test persistent 429s are re-raised once retries are exhausted."""
+        fake_openai.statuses = [429] * 5
+        analyzer = JobAnalyzer(api_key='test', scheduler=LLMScheduler(max_retries=2, base_delay=0.01))
+
+        with pytest.raises(Exception) as error:
+            ask(analyzer, 'hello')
+        assert getattr(error.value, 'status_code', None) == 429
+        assert len(fake_openai.requests) == 3
+
+    def test_client_errors_are_not_retried(self, fake_openai):
+        """Test a 400 fails straight away."""
+        fake_openai.statuses = [400]
+        analyzer = JobAnalyzer(api_key='test', scheduler=LLMScheduler(base_delay=0.01))
+
+        with pytest.raises(Exception):
+            ask(analyzer, 'hello')
+        assert len(fake_openai.requests) == 1
+
+    def test_identical_requests_coalesce(self, fake_openai):
+        """Test concurrent identical prompts reach the provider once and all get the answer."""
+        fake_openai.delay = 0.3
+        analyzer = JobAnalyzer(api_key='test', scheduler=LLMScheduler())
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(ask(analyzer, 'same prompt'))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ['Echo: same prompt'] * 5
+        assert len(fake_openai.requests) == 1
+        assert analyzer.scheduler.stats()['coalesced'] == 4
+
+    def test_streaming_goes_through_scheduler(self, fake_openai):
+        """Test streamed completions are retried before the first token and delivered in fragments."""
+        fake_openai.statuses = [429]
+        analyzer = JobAnalyzer(api_key='test', scheduler=LLMScheduler(base_delay=0.01))
+        fragments = []
+
+        assert ask(analyzer, 'stream me', on_token=fragments.append).strip() == 'Echo: stream me'
+        assert len(fragments) > 1
+        assert len(fake_openai.requests) == 2
+
+    def test_interactive_requests_jump_the_bulk_queue(self):
+        """Test queued interactive requests are admitted before queued bulk ones."""
+        scheduler = LLMScheduler(max_concurrency=1)
+        release = threading.Event()
+        order = []
+
+        blocker = threading.Thread(target=scheduler.submit, args=(release.wait,))
+        blocker.start()
+        while scheduler.stats()['running'] == 0:
+            time.sleep(0.01)
+
+        threads = []
+        for name, priority in [('bulk-1', 'bulk'), ('bulk-2', 'bulk'), ('interactive', 'interactive')]:
+            thread = threading.Thread(target=scheduler.submit,
+                                      args=(lambda name=name: order.append(name),), kwargs={'priority': priority})
+            thread.start()
+            threads.append(thread)
+            while scheduler.stats()['waiting'] < len(threads):
+                time.sleep(0.01)
+
+        release.set()
+        for thread in [blocker] + threads:
+            thread.join()
+
+        assert order == ['interactive', 'bulk-1', 'bulk-2']
+
+    def test_requests_per_minute_limit(self):
+        """Test requests past the per-minute budget wait for the bucket to refill."""
+        scheduler = LLMScheduler(requests_per_minute=600)  # 10 per second once the burst is spent
+        scheduler._requests.tokens = 0
+
+        start = time.monotonic()
+        for _ in range(3):
+            scheduler.submit(lambda: None)
+
+        assert time.monotonic() - start >= 0.25
+
+    def test_token_bucket_wait_time(self):
+        """Test the token bucket reports how long until a request's tokens are available."""
+        bucket = TokenBucket(per_minute=6000)
+        now = bucket.updated
+        bucket.take(6000)
+
+        assert bucket.wait_time(100, now) == pytest.approx(1.0)
+        assert bucket.wait_time(100, now + 1.0) == 0
+        assert bucket.wait_time(10 ** 9, now + 60) == 0  # requests larger than the bucket are clamped
+
+    def test_unknown_priority(self):
+        """Test unknown priorities are rejected."""
+        with pytest.raises(ValueError):
+            LLMScheduler().submit(lambda: None, priority='urgent')
@@ -0,0 +1,150 @@
+# tests/test_parse_pool.py - Concurrent document parsing tests
+import os
+import threading
+import time
+from modules.parse_pool import ParsePool
+
+
+def slow_parse(path):
+    """Parse function that hangs on files named *hang*."""
+    if 'hang' in os.path.basename(path):
+        time.sleep(60)
+    time.sleep(0.5)
+    return {'success': True, 'text': os.path.basename(path)}
+
+
+def steady_parse(path):
+    time.sleep(0.4)
+    return {'success': True, 'text': os.path.basename(path)}
+
+
+def failing_parse(path):
+    raise ValueError('corrupt file')
+
+
+def crashing_parse(path):
+    os._exit(1)
+
+
+class TestParsePool:
+    """Test the bounded parsing process pool."""
+
+    def _files(self, tmp_path, *names):
+        paths = {}
+        for name in names:
+            path = tmp_path / f'{name}.txt'
+            path.write_text(f'{name} content\nsecond line')
+            paths[name] = str(path)
+        return paths
+
+    def test_parses_real_documents(self, tmp_path):
+        """Test the default DocumentParser runs in the worker processes."""
+        pool = ParsePool(max_workers=2, timeout=30)
+        try:
+            results = pool.parse_many(self._files(tmp_path, 'resume', 'cover_letter'))
+        finally:
+            pool.shutdown()
+
+        assert results['resume']['success'] is True
+        assert results['resume']['text'] == 'resume content\nsecond line'
+        assert results['cover_letter']['metadata']['file_type'] == 'txt'
+
+    def test_files_are_parsed_concurrently(self, tmp_path):
+        """Test three 0.5s parses take about as long as one."""
+        pool = ParsePool(max_workers=3, timeout=30)
+        paths = self._files(tmp_path, 'job_description', 'resume', 'cover_letter')
+        try:
+            pool.parse_many(paths, slow_parse)  # Warm up the worker processes
+
+            started = time.perf_counter()
+            results = pool.parse_many(paths, slow_parse)
+            elapsed = time.perf_counter() - started
+        finally:
+            pool.shutdown()
+
+        assert all(result['success'] for result in results.values())
+        assert elapsed < 1.2
+
+    def test_timeout_does_not_hang_request(self, tmp_path):
+        """Test a hanging parse fails after the timeout while the others succeed."""
+        pool = ParsePool(max_workers=3, timeout=3)
+        paths = self._files(tmp_path, 'resume', 'hang_cover_letter')
+        try:
+            started = time.perf_counter()
+            results = pool.parse_many(paths, slow_parse)
+            elapsed = time.perf_counter() - started
+
+            # The stuck worker was replaced, so the pool keeps working
+            again = pool.parse_many(self._files(tmp_path, 'resume'), slow_parse)
+        finally:
+            pool.shutdown()
+
+        assert elapsed < 10
+        assert results['resume']['success'] is True
+        assert results['hang_cover_letter']['success'] is False
+        assert 'timed out' in results['hang_cover_letter']['error']
+        assert again['resume']['success'] is True
+
+    def test_timeout_is_per_file(self, tmp_path):
+        """Test files queued behind others get their own timeout, not a share of one batch deadline."""
+        pool = ParsePool(max_workers=1, timeout=1.0)
+        paths = self._files(tmp_path, *(f'f{index}' for index in range(6)))
+        try:
+            pool.parse_many(self._files(tmp_path, 'warm_up'), steady_parse)
+            results = pool.parse_many(paths, steady_parse)
+        finally:
+            pool.shutdown()
+
+        assert all(result['success'] for result in results.values())
+
+    def test_timeout_only_recycles_the_hung_worker(self, tmp_path):
+        """Test another request's parse in flight survives a timeout elsewhere in the pool."""
+        pool = ParsePool(max_workers=2, timeout=1.0)
+        other = {}
+        try:
+            pool.parse_many(self._files(tmp_path, 'a', 'b'), steady_parse)  # Start both workers
+            thread = threading.Thread(target=lambda: other.update(
+                pool.parse_many(self._files(tmp_path, 'hang_resume'), slow_parse)
+            ))
+            thread.start()
+            time.sleep(0.7)
+            # Submitted while the hang is in progress; still running when it times out
+            results = pool.parse_many(self._files(tmp_path, 'resume'), slow_parse)
+            thread.join()
+        finally:
+            pool.shutdown()
+
+        assert 'timed out' in other['hang_resume']['error']
+        assert results['resume']['success'] is True
+
+    def test_crashed_worker_is_replaced(self, tmp_path):
+        """Test a worker dying mid-parse fails that file and the pool keeps working."""
+        pool = ParsePool(max_workers=1, timeout=30)
+        try:
+            crashed = pool.parse_many(self._files(tmp_path, 'resume'), crashing_parse)
+            again = pool.parse_many(self._files(tmp_path, 'resume'), steady_parse)
+        finally:
+            pool.shutdown()
+
+        assert crashed['resume'] == {'success': False, 'error': 'Document parser process crashed'}
+        assert again['resume']['success'] is True
+
+    def test_parse_errors_are_reported(self, tmp_path):
+        """Test an exception in a worker becomes a failed result."""
+        pool = ParsePool(max_workers=1, timeout=30)
+        try:
+            results = pool.parse_many(self._files(tmp_path, 'resume'), failing_parse)
+        finally:
+            pool.shutdown()
+
+        assert results['resume'] == {'success': False, 'error': 'Error parsing document: corrupt file'}
+
+    def test_inline_mode(self, tmp_path):
+        """Test max_workers=0 parses in the calling process."""
+        calls = []
+        results = ParsePool(max_workers=0).parse_many(
+            self._files(tmp_path, 'resume'), lambda path: calls.append(path) or {'success': True, 'text': ''}
+        )
+
+        assert len(calls) == 1
+        assert results['resume']['success'] is True
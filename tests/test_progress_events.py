@@ -0,0 +1,118 @@
+# tests/test_progress_events.py - Progress event broker and SSE endpoint tests
+import json
+import threading
+import time
+from modules.progress_events import ProgressEventBroker
+
+
+def parse_sse(body):
+    """Turn an SSE response body into a list of (event, data) tuples."""
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class TestProgressEventBroker:
+    """Test publish/subscribe semantics."""
+
+    def test_late_subscriber_replays_history(self):
+        broker = ProgressEventBroker()
+        broker.publish('s1', 'stage', {'stage': 'scoring', 'state': 'running'})
+        broker.publish('s1', 'done', {})
+
+        events = list(broker.subscribe('s1'))
+        assert [event for _, event, _ in events] == ['stage', 'done']
+
+        # Resuming from an id skips what was already seen
+        assert [event for _, event, _ in broker.subscribe('s1', last_event_id=1)] == ['done']
+
+    def test_live_subscriber_is_woken(self):
+        broker = ProgressEventBroker()
+        received = []
+
+        def consume():
+            for item in broker.subscribe('s1', timeout=5):
+                received.append(item[1])
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        broker.publish('s1', 'token', {'text': 'a'})
+        broker.publish('s1', 'error', {'error': 'boom'})
+        consumer.join(5)
+
+        assert received == ['token', 'error']
+
+    def test_subscriber_gets_heartbeats(self):
+        broker = ProgressEventBroker()
+        assert next(broker.subscribe('missing', timeout=0.01)) is None
+
+
+class TestAnalysisEventsEndpoint:
+    """Test the Server-Sent Events endpoint."""
+
+    def test_streams_stages_and_tokens(self, client, sample_session, mock_job_analyzer):
+        """Test stage events and partial output reach the client in order."""
+        analysis = mock_job_analyzer.analyze_job_description.return_value
+
+        def streamed_analysis(text, on_token=None):
+            for chunk in ('{"keywords"', ': {...}}'):
+                on_token(chunk)
+            return analysis
+
+        mock_job_analyzer.analyze_job_description.side_effect = streamed_analysis
+        client.post(f'/api/analyze/{sample_session}')
+
+        response = client.get(f'/api/analyze/{sample_session}/events')
+        assert response.mimetype == 'text/event-stream'
+        events = parse_sse(response.get_data(as_text=True))
+
+        names = [event for event, _ in events]
+        assert names[0] == 'status'
+        assert names[-1] == 'done'
+        assert ('stage', {'stage': 'parsing', 'state': 'done'}) in events
+        assert ('stage', {'stage': 'scoring', 'state': 'done'}) in events
+
+        tokens = [data['text'] for event, data in events if event == 'token']
+        assert tokens == ['{"keywords"', ': {...}}']
+        assert events[-1][1]['status'] == 'completed'
+
+    def test_finished_session_without_live_channel(self, client, completed_session):
+        """Test a completed session closes the stream immediately."""
+        response = client.get(f'/api/analyze/{completed_session}/events')
+        events = parse_sse(response.get_data(as_text=True))
+        assert [event for event, _ in events] == ['status', 'done']
+
+    def test_progress_from_another_worker_after_keep_alive(self, client, app, sample_session):
+        """Test the stream survives keep-alives and reports progress it only finds in the database."""
+        from database.models import db, ProcessingSession
+        app.config['SSE_POLL_INTERVAL'] = 0.05
+
+        def set_status(status):
+            with app.app_context():
+                db.session.get(ProcessingSession, sample_session).status = status
+                db.session.commit()
+
+        def stream():
+            # A thread of its own, like a server's, so the request doesn't inherit this test's app context
+            body.append(client.get(f'/api/analyze/{sample_session}/events').get_data(as_text=True))
+
+        # Stands in for a Celery worker: it updates the row but publishes nothing in this process
+        set_status('analyzing_job')
+        body = []
+        reader = threading.Thread(target=stream)
+        reader.start()
+        time.sleep(0.3)
+        set_status('completed')
+        reader.join(5)
+
+        assert body, 'the stream raised instead of finishing'
+        body = body[0]
+
+        assert ': keep-alive' in body
+        events = parse_sse(body)
+        assert [event for event, _ in events] == ['status', 'status', 'done']
+        assert events[0][1]['status'] == 'analyzing_job'
+        assert events[-1][1]['status'] == 'completed'
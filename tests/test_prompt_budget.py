@@ -0,0 +1,120 @@
+# tests/test_prompt_budget.py - Prompt token budgeting and compaction tests
+from modules.job_analyzer import JobAnalyzer
+from modules.prompt_budget import (PromptBudget, TRUNCATION_MARKER, allocate, compact_text, count_tokens,
+                                   drop_low_signal_sections)
+
+JOB = """Senior Python Developer
+
+About the role:
+Build APIs in   Python and   SQL.
+Build APIs in Python and SQL.
+
+About Acme:
+Acme has been delighting customers since 1990 with a passion for widgets.
+We are a family.
+
+Requirements:
+5+ years of Python. Docker and Git.
+
+Benefits:
+Free lunch, gym membership and unlimited holidays.
+
+Acme is an equal opportunity employer. We consider applicants without regard to race or religion.
+Apply now!"""
+
+
+class TestCompaction:
+    """Test whitespace, duplicate and boilerplate removal."""
+
+    def test_compact_text(self):
+        """Test repeated lines, extra whitespace and EEO sentences are dropped."""
+        compacted = compact_text(JOB, job_posting=True)
+
+        assert compacted.count('Build APIs in Python and SQL.') == 1
+        assert '  ' not in compacted and '\n\n' not in compacted
+        assert 'equal opportunity' not in compacted
+        assert 'Apply now' not in compacted
+        assert '5+ years of Python. Docker and Git.' in compacted
+
+    def test_resumes_keep_boilerplate_like_text(self):
+        """Test only job postings lose boilerplate sentences."""
+        resume = 'Ran the equal opportunity hiring programme.'
+        assert compact_text(resume) == resume
+
+    def test_resumes_keep_repeated_lines_under_different_employers(self):
+        """Test only consecutive repeats are dropped outside job postings."""
+        resume = 'Acme\nSoftware Engineer\n- Built APIs\n- Built APIs\nGlobex\nSoftware Engineer\n- Built APIs'
+
+        assert compact_text(resume) == 'Acme\nSoftware Engineer\n- Built APIs\nGlobex\nSoftware Engineer\n- Built APIs'
+
+    def test_body_sentences_do_not_start_a_low_signal_section(self):
+        """Test a requirement starting with 'Diversity' isn't mistaken for a section heading."""
+        text = 'Requirements:\nDiversity of experience across Python and Go.\nFive years of SQL.\nBenefits:\nFree lunch'
+
+        assert drop_low_signal_sections(text) == 'Requirements:\nDiversity of experience across Python and Go.\nFive years of SQL.'
+
+    def test_drop_low_signal_sections(self):
+        """Test company blurbs and benefits go, the role and requirements stay."""
+        text = drop_low_signal_sections(compact_text(JOB, job_posting=True))
+
+        assert 'About the role:' in text and 'Build APIs' in text
+        assert 'Requirements:' in text and 'Docker' in text
+        assert 'Acme has been' not in text
+        assert 'Free lunch' not in text
+
+
+class TestBudget:
+    """Test fitting the insights prompt inputs to a token budget."""
+
+    def test_allocate_shares_surplus(self):
+        """Test a short part's unused share goes to the others."""
+        allocation = allocate({'a': 100, 'b': 1000, 'c': 10}, {'a': 0.35, 'b': 0.45, 'c': 0.2}, 500)
+
+        assert allocation['c'] == 10
+        assert allocation['a'] == 100
+        assert allocation['b'] == 390
+
+    def test_fit_within_budget_only_compacts(self):
+        """Test short inputs are compacted but not trimmed."""
+        parts, report = PromptBudget(max_prompt_tokens=6000).fit(JOB, 'Python developer.', 'Dear team,')
+
+        assert report['trimmed'] == []
+        assert report['tokens_saved'] > 0
+        assert report['tokens_after'] == sum(count_tokens(text) for text in parts.values())
+        assert 'Free lunch' in parts['job_description']
+
+    def test_fit_trims_long_inputs(self):
+        """Test oversized inputs end up within the budget, keeping the top of each document."""
+        resume = '\n'.join(f'Role {n}: shipped Python service number {n} to production' for n in range(2000))
+        budget = PromptBudget(max_prompt_tokens=1000)
+
+        parts, report = budget.fit(JOB, resume, 'Dear team, I would love to join.')
+
+        assert report['tokens_after'] <= 1000
+        assert report['trimmed'] == ['resume']
+        assert parts['resume'].startswith('Role 0:') and parts['resume'].endswith(TRUNCATION_MARKER)
+        assert 'Free lunch' not in parts['job_description']
+        assert parts['cover_letter'] == 'Dear team, I would love to join.'
+        assert budget.stats()['tokens_saved'] == report['tokens_saved']
+        assert budget.stats()['trimmed_requests'] == 1
+
+
+class TestInsightsPrompt:
+    """Test extract_optimization_insights sends the budgeted prompt."""
+
+    def test_insights_prompt_is_budgeted(self, fake_openai):
+        """Test the prompt stays within budget and the tokens saved are recorded."""
+        budget = PromptBudget(max_prompt_tokens=800, max_completion_tokens=600)
+        analyzer = JobAnalyzer(api_key='test', prompt_budget=budget)
+        resume = '\n'.join(f'Role {n}: shipped Python service number {n}' for n in range(1000))
+
+        # The fake server echoes the prompt, which is no insights object
+        result = analyzer.extract_optimization_insights(JOB, resume, 'Dear team,')
+
+        assert result['success'] is False
+        assert budget.stats()['tokens_saved'] > 0
+        request = fake_openai.requests[0]
+        assert request['max_tokens'] == 600
+        prompt = request['messages'][-1]['content']
+        assert 'Role 999' not in prompt and 'equal opportunity' not in prompt
+        assert count_tokens(prompt) < 800 + 300  # budget plus the fixed instructions and JSON template
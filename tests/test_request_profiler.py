@@ -0,0 +1,121 @@
+# tests/test_request_profiler.py - Slow and sampled request profiling tests
+import os
+import pstats
+import time
+from io import BytesIO
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+from app import create_app
+from database.models import db
+from modules.request_profiler import ProfilingMiddleware
+
+
+def make_wsgi_app(delays):
+    """WSGI app sleeping for the ?delay= given in seconds"""
+    def wsgi_app(environ, start_response):
+        delay = float(environ.get('QUERY_STRING', '').partition('=')[2] or 0)
+        delays.append(delay)
+        time.sleep(delay)
+        return Response('ok')(environ, start_response)
+    return wsgi_app
+
+
+def streamed_wsgi_app(environ, start_response):
+    """WSGI app returning at once and doing its slow work while the body is read"""
+    def generate():
+        for chunk in (b'one\n', b'two\n'):
+            time.sleep(0.04)
+            yield chunk
+    return Response(generate())(environ, start_response)
+
+
+class TestProfilingMiddleware:
+    """Test which requests are profiled and how long profiles are kept."""
+
+    def test_only_slow_requests_are_kept(self, tmp_path):
+        """Test a profile is written for the request over the threshold only."""
+        middleware = ProfilingMiddleware(make_wsgi_app([]), str(tmp_path), slow_threshold=0.05)
+        client = Client(middleware)
+
+        # Buffered, so the test client closes each response as a server does
+        assert client.get('/fast', buffered=True).status_code == 200
+        client.get('/slow?delay=0.06', buffered=True)
+
+        profiles = middleware.profiles()
+        assert len(profiles) == 1
+        assert '_GET_slow' in os.path.basename(profiles[0])
+        assert pstats.Stats(profiles[0]).total_tt > 0
+
+    def test_streamed_body_is_profiled(self, tmp_path):
+        """Test a response slow only while its body streams is timed and profiled to the end."""
+        middleware = ProfilingMiddleware(streamed_wsgi_app, str(tmp_path), slow_threshold=0.05)
+
+        response = Client(middleware).get('/stream', buffered=True)
+        assert response.get_data() == b'one\ntwo\n'
+
+        profiles = middleware.profiles()
+        assert len(profiles) == 1
+        functions = [name for _, _, name in pstats.Stats(profiles[0]).stats]
+        assert 'generate' in functions
+
+    def test_sampled_requests(self, tmp_path):
+        """Test sampled requests are kept whatever their latency."""
+        always = ProfilingMiddleware(make_wsgi_app([]), str(tmp_path / 'always'), sample_rate=1.0)
+        never = ProfilingMiddleware(make_wsgi_app([]), str(tmp_path / 'never'), sample_rate=0.0)
+
+        Client(always).get('/', buffered=True)
+        Client(never).get('/', buffered=True)
+
+        assert len(always.profiles()) == 1
+        assert never.profiles() == []
+
+    def test_retention_is_bounded(self, tmp_path):
+        """Test only the newest max_profiles are kept."""
+        middleware = ProfilingMiddleware(make_wsgi_app([]), str(tmp_path), sample_rate=1.0, max_profiles=3)
+        client = Client(middleware)
+
+        for index in range(5):
+            client.get(f'/page-{index}', buffered=True)
+
+        names = [os.path.basename(path) for path in middleware.profiles()]
+        assert len(names) == 3
+        assert '_GET_page-4' in names[0]
+        assert not any('_GET_page-0' in name for name in names)
+
+
+class TestAppProfiling:
+    """Test profiling configured through create_app."""
+
+    def test_profiles_are_named_after_route_and_session(self, tmp_path):
+        """Test upload and analysis profiles carry the route and the session id."""
+        app = create_app('development', overrides={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'profile.db'}",
+            'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+            'PROCESSED_FOLDER': str(tmp_path / 'processed'),
+            'TEMP_FOLDER': str(tmp_path / 'temp'),
+            'TASK_QUEUE_BACKEND': 'sync',
+            'PARSE_POOL_WORKERS': 0,
+            'LLM_PROVIDER': 'fake',
+            'LLM_CACHE_ENABLED': False,
+            'PROFILE_SAMPLE_RATE': 1.0,
+        })
+        with app.app_context():
+            db.create_all()
+        client = app.test_client()
+
+        response = client.post('/upload', data={
+            'job_description_text': 'Python developer with SQL experience',
+            'resume': (BytesIO(b'Jane Doe\nPython developer\n'), 'resume.txt'),
+            'cover_letter': (BytesIO(b'Dear Hiring Manager,\nI write Python.\n'), 'cover_letter.txt'),
+        }, content_type='multipart/form-data', buffered=True)
+        session_id = response.headers['Location'].rstrip('/').rsplit('/', 1)[-1]
+        client.post(f'/api/analyze/{session_id}', buffered=True)
+
+        names = sorted(os.listdir(tmp_path / 'temp' / 'profiles'))
+        assert any(f'_POST_upload_{session_id}.prof' in name for name in names)
+        assert any(f'_POST_api_analyze_session_id_{session_id}.prof' in name for name in names)
+
+    def test_off_by_default(self, app):
+        """Test the app isn't wrapped unless profiling is configured."""
+        assert not isinstance(app.wsgi_app, ProfilingMiddleware)
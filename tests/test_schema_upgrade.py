@@ -0,0 +1,62 @@
+# tests/test_schema_upgrade.py - Upgrading databases created by earlier versions
+import json
+import sqlite3
+from app import create_app
+from database.models import db, ProcessingSession
+
+# processing_sessions as the first release created it
+LEGACY_SCHEMA = """
+CREATE TABLE processing_sessions (
+    id VARCHAR(36) PRIMARY KEY, created_at DATETIME, updated_at DATETIME, status VARCHAR(20),
+    job_description TEXT, original_resume_path VARCHAR(255), original_cover_letter_path VARCHAR(255),
+    job_description_text TEXT, original_resume_text TEXT, original_cover_letter_text TEXT,
+    optimized_resume_text TEXT, optimized_cover_letter_text TEXT,
+    extracted_keywords TEXT, job_requirements TEXT,
+    keyword_match_score FLOAT, ats_compatibility_score FLOAT, content_relevance_score FLOAT, overall_score FLOAT,
+    detailed_feedback TEXT
+)
+"""
+
+KEYWORDS = {'high_priority': ['python'], 'medium_priority': [], 'low_priority': []}
+
+
+def make_legacy_db(path):
+    connection = sqlite3.connect(path)
+    connection.execute(LEGACY_SCHEMA)
+    for session_id in ('s1', 's2'):
+        connection.execute(
+            'INSERT INTO processing_sessions (id, created_at, status, job_description_text, original_resume_text, '
+            'extracted_keywords, job_requirements) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (session_id, '2024-01-01 00:00:00.000000', 'completed', 'Python developer wanted', 'resume', json.dumps(KEYWORDS),
+             json.dumps({'technical_skills': ['Python']}))
+        )
+    connection.commit()
+    connection.close()
+
+
+class TestUpgradeSchema:
+    """Test the upgrade-db command on a first-release database."""
+
+    def test_sessions_keep_their_job_description(self, tmp_path):
+        """Test legacy per-session job descriptions are moved to one shared row."""
+        make_legacy_db(tmp_path / 'legacy.db')
+        app = create_app('development', overrides={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'legacy.db'}",
+            'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+            'PROCESSED_FOLDER': str(tmp_path / 'processed'),
+            'TEMP_FOLDER': str(tmp_path / 'temp'),
+        })
+
+        result = app.test_cli_runner().invoke(args=['upgrade-db'])
+        assert '2 session(s) moved' in result.output
+        assert '0 session(s) moved' in app.test_cli_runner().invoke(args=['upgrade-db']).output
+
+        with app.app_context():
+            first, second = db.session.get(ProcessingSession, 's1'), db.session.get(ProcessingSession, 's2')
+            assert first.job_description_id == second.job_description_id
+            assert first.job_description_text == 'Python developer wanted'
+            assert json.loads(first.extracted_keywords) == KEYWORDS
+            assert json.loads(first.job_analysis)['requirements'] == {'technical_skills': ['Python']}
+            assert first.job_description.get_analysis() is None  # not reused for new sessions
+            assert first.to_dict()['status'] == 'completed'
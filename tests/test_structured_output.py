@@ -0,0 +1,157 @@
+# tests/test_structured_output.py - Structured output requests and partial re-ask tests
+import json
+import openai
+import pytest
+from modules.job_analyzer import JobAnalyzer
+from modules.llm_providers import FakeProvider, OpenAIProvider
+from modules.llm_schemas import ANALYSIS_SCHEMA, INSIGHTS_SCHEMA, to_json_schema
+
+INSIGHTS = {
+    'resume_gaps': ['docker'],
+    'cover_letter_gaps': ['company values'],
+    'keyword_opportunities': ['kubernetes'],
+    'experience_matching': {'strong_matches': ['python'], 'weak_matches': [], 'missing_experiences': []},
+    'ats_recommendations': ['Use standard headings'],
+    'priority_actions': ['Add Docker projects']
+}
+
+MESSAGES = [{'role': 'user', 'content': 'Please provide JSON'}]
+
+
+def scripted(*replies):
+    """Responder returning the given replies in turn and recording the prompts it got"""
+    prompts = []
+
+    def responder(messages):
+        prompts.append(messages)
+        return replies[min(len(prompts), len(replies)) - 1]
+    responder.prompts = prompts
+    return responder
+
+
+class TestSchemas:
+    """Test the typed response schemas."""
+
+    def test_json_schema_is_strict(self):
+        """Test every object lists all its properties as required and allows no others."""
+        schema = ANALYSIS_SCHEMA.json_schema()
+
+        assert schema['name'] == 'job_analysis'
+        assert schema['schema']['additionalProperties'] is False
+        assert schema['schema']['required'] == list(ANALYSIS_SCHEMA.fields)
+        assert schema['schema']['properties']['keywords']['properties']['high_priority'] == {
+            'type': 'array', 'items': {'type': 'string'}
+        }
+        assert to_json_schema({'score': float}) == {
+            'type': 'object', 'properties': {'score': {'type': 'number'}},
+            'required': ['score'], 'additionalProperties': False
+        }
+
+    def test_fields_to_reask(self):
+        """Test only absent required fields are asked for, or everything when nothing came back."""
+        partial = {key: value for key, value in INSIGHTS.items() if key != 'priority_actions'}
+        no_optional = {key: value for key, value in INSIGHTS.items() if key != 'experience_matching'}
+
+        assert INSIGHTS_SCHEMA.fields_to_reask(partial) == ['priority_actions']
+        assert INSIGHTS_SCHEMA.fields_to_reask(no_optional) == []
+        assert INSIGHTS_SCHEMA.fields_to_reask(None) == list(INSIGHTS_SCHEMA.fields)
+
+
+class TestResponseFormat:
+    """Test how the OpenAI provider asks for JSON."""
+
+    @pytest.mark.parametrize('mode, expected', [
+        ('json_object', {'type': 'json_object'}),
+        ('json_schema', {'type': 'json_schema', 'json_schema': dict(INSIGHTS_SCHEMA.json_schema(), strict=True)}),
+        ('off', None),
+    ])
+    def test_modes(self, fake_openai, mode, expected):
+        """Test each structured output mode sends the matching response_format."""
+        provider = OpenAIProvider(base_url=fake_openai.url, structured_output=mode)
+
+        provider.complete(MESSAGES, 0.3, 10, json_schema=INSIGHTS_SCHEMA.json_schema())
+        provider.complete(MESSAGES, 0.3, 10)
+
+        assert fake_openai.requests[0].get('response_format') == expected
+        assert 'response_format' not in fake_openai.requests[1]
+
+    def test_unknown_mode(self):
+        """Test a misspelt mode is rejected up front."""
+        with pytest.raises(ValueError, match='structured output mode'):
+            OpenAIProvider(api_key='test', structured_output='json')
+
+    def test_unsupported_server_falls_back(self, fake_openai):
+        """Test a server rejecting response_format is retried, and then sent plain requests."""
+        fake_openai.statuses = [400]
+        fake_openai.error_message = "Invalid parameter: 'response_format' of type 'json_schema' is not supported"
+        provider = OpenAIProvider(base_url=fake_openai.url, structured_output='json_schema')
+
+        assert provider.complete(MESSAGES, 0.3, 10, json_schema=INSIGHTS_SCHEMA.json_schema()) == 'Echo: Please provide JSON'
+        provider.complete(MESSAGES, 0.3, 10, json_schema=INSIGHTS_SCHEMA.json_schema())
+
+        assert provider.structured_output == 'off'
+        assert [('response_format' in request) for request in fake_openai.requests] == [True, False, False]
+
+    def test_other_bad_requests_are_raised(self, fake_openai):
+        """Test a 400 unrelated to response_format isn't mistaken for missing support."""
+        fake_openai.statuses = [400]
+        fake_openai.error_message = 'maximum context length exceeded'
+        provider = OpenAIProvider(base_url=fake_openai.url, max_retries=0)
+
+        with pytest.raises(openai.BadRequestError):
+            provider.complete(MESSAGES, 0.3, 10, json_schema=INSIGHTS_SCHEMA.json_schema())
+        assert provider.structured_output == 'json_object'
+
+
+class TestPartialReask:
+    """Test asking again for only the fields a response left out."""
+
+    def test_missing_field_is_asked_for_and_merged(self):
+        """Test one follow-up asks for just the missing field and its answer fills the gap."""
+        partial = {key: value for key, value in INSIGHTS.items() if key != 'priority_actions'}
+        responder = scripted(json.dumps(partial), json.dumps({'priority_actions': ['Add Docker projects']}))
+        provider = FakeProvider(responder=responder)
+
+        insights = JobAnalyzer(providers={'default': provider}).extract_optimization_insights(
+            'Python developer', 'resume', 'cover letter'
+        )
+
+        assert insights['insights'] == INSIGHTS
+        assert provider.calls == 2
+        followup = responder.prompts[1]
+        assert followup[-2] == {'role': 'assistant', 'content': json.dumps(partial)}
+        assert 'priority_actions' in followup[-1]['content']
+        assert 'resume_gaps' not in followup[-1]['content']
+        assert list(provider.last_json_schema['schema']['properties']) == ['priority_actions']
+
+    def test_complete_response_is_not_reasked(self):
+        """Test a response with every required field costs a single request."""
+        provider = FakeProvider(responder=scripted(json.dumps(INSIGHTS)))
+
+        JobAnalyzer(providers={'default': provider}).extract_optimization_insights('Python developer', 'r', 'c')
+
+        assert provider.calls == 1
+        assert provider.last_json_schema == INSIGHTS_SCHEMA.json_schema()
+
+    def test_reask_can_be_disabled(self):
+        """Test reask_missing=False keeps the first answer as it is."""
+        partial = {key: value for key, value in INSIGHTS.items() if key != 'priority_actions'}
+        provider = FakeProvider(responder=scripted(json.dumps(partial)))
+
+        insights = JobAnalyzer(providers={'default': provider}, reask_missing=False).extract_optimization_insights(
+            'Python developer', 'resume', 'cover letter'
+        )
+
+        assert provider.calls == 1
+        assert 'priority_actions' not in insights['insights']
+
+    def test_unparseable_insights_fail(self):
+        """Test insights that are still garbage after the follow-up are reported as a failure."""
+        provider = FakeProvider(responder=scripted('Sorry, I cannot help with that.', 'Still no JSON here'))
+
+        insights = JobAnalyzer(providers={'default': provider}).extract_optimization_insights(
+            'Python developer', 'resume', 'cover letter'
+        )
+
+        assert provider.calls == 2
+        assert insights == {'success': False, 'error': 'Failed to parse insights response'}
@@ -0,0 +1,78 @@
+# tests/test_task_queue.py - Background task queue tests
+import threading
+import pytest
+from flask import Flask, current_app
+from modules.task_queue import TaskQueue
+
+
+@pytest.fixture
+def queue_app():
+    app = Flask(__name__)
+    app.config.update({'TASK_QUEUE_BACKEND': 'thread', 'TASK_QUEUE_WORKERS': 2, 'REDIS_URL': 'redis://localhost:1/0'})
+    return app
+
+
+class TestTaskQueue:
+    """Test background task execution backends."""
+
+    def test_thread_backend_runs_in_app_context(self, queue_app):
+        """Test that thread-pool tasks run off the caller thread with an app context."""
+        queue = TaskQueue(queue_app)
+        done = threading.Event()
+        seen = {}
+
+        @queue.task
+        def record(value):
+            seen['value'] = value
+            seen['app'] = current_app.name
+            seen['thread'] = threading.current_thread().name
+            done.set()
+
+        queue.enqueue('record', 42)
+        assert done.wait(5)
+        queue.shutdown()
+
+        assert queue.backend == 'thread'
+        assert seen['value'] == 42
+        assert seen['app'] == queue_app.name
+        assert seen['thread'].startswith('task-queue')
+
+    def test_auto_backend_falls_back_without_redis(self, queue_app):
+        """Test that 'auto' uses the in-process pool when Redis is unreachable."""
+        queue_app.config['TASK_QUEUE_BACKEND'] = 'auto'
+        queue = TaskQueue(queue_app)
+        assert queue.backend == 'thread'
+
+    def test_sync_backend_raises_task_errors(self, queue_app):
+        """Test that a failing inline task isn't hidden from the caller."""
+        queue_app.config['TASK_QUEUE_BACKEND'] = 'sync'
+        queue = TaskQueue(queue_app)
+
+        @queue.task
+        def explode():
+            raise RuntimeError('boom')
+
+        with pytest.raises(RuntimeError, match='boom'):
+            queue.enqueue('explode')
+
+    def test_auto_backend_needs_a_celery_worker(self, queue_app, monkeypatch):
+        """Test that 'auto' stays in-process when Redis answers but no worker does."""
+        queue_app.config['TASK_QUEUE_BACKEND'] = 'auto'
+        queue = TaskQueue(queue_app)
+        monkeypatch.setattr(queue, '_redis_available', lambda: True)
+        monkeypatch.setattr(queue, 'make_celery', lambda: None)
+        monkeypatch.setattr(queue, '_workers_available', lambda: False)
+
+        assert queue.backend == 'thread'
+
+    def test_unknown_task_and_backend(self, queue_app):
+        """Test error handling for unregistered tasks and bad config."""
+        queue = TaskQueue(queue_app)
+        with pytest.raises(KeyError):
+            queue.enqueue('missing')
+
+        queue_app.config['TASK_QUEUE_BACKEND'] = 'rabbit'
+        queue = TaskQueue(queue_app)
+        queue.task(lambda: None)
+        with pytest.raises(ValueError):
+            queue.enqueue('<lambda>')
@@ -0,0 +1,130 @@
+# tests/test_upload_ingest.py - Streaming upload ingest tests
+import hashlib
+import os
+import pytest
+from io import BytesIO
+from werkzeug.exceptions import RequestEntityTooLarge
+from database.models import ProcessingSession
+from modules.document_store import DocumentStore
+from modules.upload_ingest import IngestBuffer, sniff_file_type
+
+
+class TestIngestBuffer:
+    """Test hashing, sniffing and spilling while an upload is written."""
+
+    def _fill(self, buffer, data, chunk_size=1000):
+        for start in range(0, len(data), chunk_size):
+            buffer.write(data[start:start + chunk_size])
+        buffer.seek(0)
+        return buffer
+
+    def test_sniff_file_type(self):
+        """Test file types are recognised from their leading bytes."""
+        assert sniff_file_type(b'%PDF-1.7\n...') == 'pdf'
+        assert sniff_file_type(b'PK\x03\x04\x14\x00') == 'docx'
+        assert sniff_file_type('Résumé\n'.encode('utf-8')) == 'txt'
+        assert sniff_file_type('Résumé\n'.encode('utf-16')) == 'txt'
+        assert sniff_file_type('Résumé\n'.encode('utf-32')) == 'txt'
+        assert sniff_file_type(b'\x89PNG\r\n\x1a\n\x00\x00') is None
+
+    def test_small_upload_stays_in_memory(self, tmp_path):
+        """Test hash, size and content of an in-memory upload."""
+        data = b'Jane Doe\nPython developer\n' * 10
+        buffer = self._fill(IngestBuffer(str(tmp_path), memory_limit=1024), data)
+
+        assert buffer.in_memory
+        assert buffer.content_hash == hashlib.sha256(data).hexdigest()
+        assert buffer.size == len(data)
+        assert buffer.file_type == 'txt'
+        assert buffer.read() == data
+        assert os.listdir(tmp_path) == []
+
+    def test_large_upload_is_moved_not_copied(self, tmp_path):
+        """Test a spilled upload is renamed into the store."""
+        data = b'%PDF-1.4\n' + b'x' * 5000
+        buffer = self._fill(IngestBuffer(str(tmp_path), memory_limit=1024), data)
+        assert not buffer.in_memory
+        spill_inode = os.stat(buffer.spill_path).st_ino
+
+        stored = DocumentStore(str(tmp_path)).save(buffer, 'resume.pdf')
+        buffer.close()
+
+        assert stored.created
+        assert os.listdir(tmp_path) == [os.path.basename(stored.path)]
+        assert os.stat(stored.path).st_ino == spill_inode
+        with open(stored.path, 'rb') as f:
+            assert f.read() == data
+
+    def test_unclaimed_spill_is_removed(self, tmp_path):
+        """Test closing a buffer that was never stored deletes its temporary file."""
+        buffer = self._fill(IngestBuffer(str(tmp_path), memory_limit=10), b'x' * 100)
+        assert os.listdir(tmp_path)
+
+        buffer.close()
+        assert os.listdir(tmp_path) == []
+
+    def test_size_limit_enforced_while_streaming(self, tmp_path):
+        """Test an oversized upload is rejected before it is fully read."""
+        buffer = IngestBuffer(str(tmp_path), memory_limit=10, max_size=2500)
+        with pytest.raises(RequestEntityTooLarge):
+            self._fill(buffer, b'x' * 5000)
+        buffer.close()
+        assert os.listdir(tmp_path) == []
+
+
+class TestStreamingUpload:
+    """Test the upload endpoint with the streaming ingest."""
+
+    def _data(self, resume=(b'Resume content', 'resume.txt')):
+        return {
+            'resume': (BytesIO(resume[0]), resume[1]),
+            'cover_letter': (BytesIO(b'Cover letter content'), 'cover_letter.txt'),
+            'job_description_text': 'Python developer position'
+        }
+
+    def test_upload_parsed_from_memory(self, client, app):
+        """Test uploads are parsed with the real parser and stored once."""
+        response = client.post('/upload', data=self._data(), content_type='multipart/form-data')
+        assert response.status_code == 302
+        assert '/process/' in response.location
+
+        with app.app_context():
+            session = ProcessingSession.query.one()
+            assert session.original_resume_text == 'Resume content'
+            assert session.original_cover_letter_text == 'Cover letter content'
+            assert os.path.basename(session.original_resume_path) == \
+                hashlib.sha256(b'Resume content').hexdigest() + '.txt'
+
+    def test_spilled_upload_leaves_no_temp_files(self, client, app):
+        """Test uploads above the memory limit are stored and parsed from disk."""
+        app.config['UPLOAD_MEMORY_LIMIT'] = 16
+        resume = b'Experienced Python developer\n' * 100
+
+        response = client.post('/upload', data=self._data((resume, 'resume.txt')), content_type='multipart/form-data')
+        assert '/process/' in response.location
+
+        assert not [name for name in os.listdir(app.config['UPLOAD_FOLDER']) if name.endswith('.part')]
+        with app.app_context():
+            assert ProcessingSession.query.one().original_resume_text == resume.decode()
+
+    def test_utf16_text_upload_accepted(self, client, app):
+        """Test a UTF-16 .txt resume, NUL bytes and all, is accepted and decoded."""
+        resume = 'Jane Doe\nPython développeuse\n'
+        response = client.post(
+            '/upload', data=self._data((resume.encode('utf-16'), 'resume.txt')), content_type='multipart/form-data'
+        )
+        assert '/process/' in response.location
+
+        with app.app_context():
+            assert ProcessingSession.query.one().original_resume_text == resume
+
+    def test_mismatched_content_rejected(self, client, app):
+        """Test a file whose bytes don't match its extension is refused."""
+        response = client.post(
+            '/upload', data=self._data((b'not really a pdf', 'resume.pdf')), content_type='multipart/form-data'
+        )
+        assert response.status_code == 302
+        assert '/process/' not in response.location
+
+        with app.app_context():
+            assert ProcessingSession.query.count() == 0